@@ -109,6 +109,20 @@ class AdminDashboard:
             
             stats['coin_stats'] = coin_stats
             
+            # Ledger-vs-wallet reconciliation written by the bot
+            cursor.execute('''
+                SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'reconciliation'
+            ''')
+            reconciliation = {}
+            if cursor.fetchone():
+                cursor.execute('SELECT * FROM reconciliation ORDER BY coin_symbol')
+                for row in cursor.fetchall():
+                    check = dict(row)
+                    check['findings'] = json.loads(check['findings'] or '[]')
+                    reconciliation[check.pop('coin_symbol')] = check
+            
+            stats['reconciliation'] = reconciliation
+            
             conn.close()
             return stats
             
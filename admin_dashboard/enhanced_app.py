@@ -26,6 +26,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from enhanced_database import EnhancedDatabase
 from enhanced_wallet_manager import EnhancedWalletManager
+from daemon_health import DEFAULT_SNAPSHOT_PATH, load_snapshot
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -363,7 +364,37 @@ def get_recent_activity():
     return []
 
 def get_wallet_status():
-    """Get wallet connection status"""
+    """Get wallet connection status from the bot's health snapshot"""
+    health_config = config.get('daemon', {}).get('health', {})
+    snapshot = load_snapshot(health_config.get('snapshot_path', DEFAULT_SNAPSHOT_PATH))
+    
+    # Only probe the daemons ourselves if the bot is not keeping the snapshot fresh
+    if not snapshot or not snapshot.get('updated_at'):
+        return _probe_wallet_status()
+    
+    age = (datetime.now() - datetime.fromisoformat(snapshot['updated_at'])).total_seconds()
+    if age > 3 * snapshot.get('refresh_interval', 30):
+        return _probe_wallet_status()
+    
+    status = {}
+    for coin_symbol, health in snapshot['coins'].items():
+        if health['available']:
+            status[coin_symbol] = {
+                'status': 'connected',
+                'blocks': health.get('blocks') or 0,
+                'last_success': health.get('last_success')
+            }
+        else:
+            status[coin_symbol] = {
+                'status': 'error',
+                'error': health.get('last_error') or 'Daemon unavailable',
+                'last_success': health.get('last_success')
+            }
+    
+    return status
+
+def _probe_wallet_status():
+    """Query each wallet daemon directly"""
     status = {}
     
     for coin_symbol in config['coins']:
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test fixtures - Mock coin daemons and a bot configuration pointing at them
+Powered By Aegisum EcoSystem
+"""
+
+import json
+import socket
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def mock_coins():
+    """Start an AEGS mock daemon without automatic blocks; yields its "coins" config section"""
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / "scripts" / "mock_daemon.py"), 'serve',
+         '--coin', f"AEGS:{free_port()}", '--block-interval', '0'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        # The daemon prints its coins config once it is listening
+        output = ''
+        while True:
+            line = process.stdout.readline()
+            if not line:
+                raise RuntimeError("Mock daemon exited before it was ready")
+            output += line
+            if line.startswith('}'):
+                break
+        
+        coins = json.loads(output)
+        for coin_config in coins.values():
+            coin_config.update(decimals=8, min_confirmations=3, withdrawal_fee=0.1, network_fee=0.01)
+        yield coins
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@pytest.fixture
+def config(mock_coins):
+    """Bot configuration using the mock daemons"""
+    return {
+        'coins': mock_coins,
+        'notifications': {'pending_tx': True, 'confirmed_tx': True, 'deposits': True,
+                          'withdrawals': True, 'tips': True}
+    }
@@ -0,0 +1,846 @@
+#!/usr/bin/env python3
+"""
+Mock Coin Daemon - Local stand-in for Bitcoin-style coin daemons
+Powered By Aegisum EcoSystem
+
+Serves the JSON-RPC surface the tipbot uses, with in-memory accounts,
+simulated blocks, configurable latency and failure injection.
+
+Run the daemons (one port per coin):
+    python3 scripts/mock_daemon.py serve --coin AEGS:18332 --coin SHIC:18333 --cli-dir data/mock_cli
+
+Like -walletnotify/-blocknotify, --walletnotify and --blocknotify run a shell command per
+transaction or block, with %s replaced by the txid or block hash and %c by the coin symbol:
+    --walletnotify 'scripts/notify_hook.py %c wallet %s' --blocknotify 'scripts/notify_hook.py %c block %s'
+
+Use it like a coin CLI (the generated wrappers in --cli-dir do this for you):
+    python3 scripts/mock_daemon.py -rpcport=18332 getbalance user_1
+
+Extra methods for tests and benchmarks:
+    mock_receive <address> <amount>   credit an external deposit to a wallet address; a JSON list of
+                                      amounts pays the address once per amount in one transaction
+    mock_mine [blocks]                mine blocks immediately
+    mock_set <json>                   change latency_ms, jitter_ms, failure_rate, error_rate, down
+                                      or disabled_methods (to mimic an older daemon)
+    mock_stats                        request counters
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import http.client
+import json
+import logging
+import os
+import random
+import secrets
+import stat
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COIN = 100_000_000  # base units per coin
+BASE58 = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+class RPCFault(Exception):
+    """An error returned to the caller as a JSON-RPC error object"""
+    
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def to_units(amount: Any) -> int:
+    """Convert a coin amount to integer base units"""
+    try:
+        return int(round(float(amount) * COIN))
+    except (TypeError, ValueError):
+        raise RPCFault(-3, "Invalid amount")
+
+
+def to_coins(units: int) -> float:
+    """Convert integer base units to a coin amount"""
+    return round(units / COIN, 8)
+
+
+class MockWallet:
+    """In-memory accounts, UTXOs, transactions and blocks for one coin"""
+    
+    def __init__(self, coin_symbol: str, fee: float = 0.0001, start_height: int = 1000):
+        self.coin_symbol = coin_symbol
+        self.fee = to_units(fee)
+        
+        self.accounts: Dict[str, int] = {'': 0}
+        self.addresses: Dict[str, str] = {}  # address -> account
+        self.utxos: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self.transactions: Dict[str, Dict[str, Any]] = {}
+        self.entries: List[Dict[str, Any]] = []  # listtransactions entries, oldest first
+        self.imported_keys: Dict[str, str] = {}
+        
+        self.blocks: List[str] = [self._block_hash(h) for h in range(start_height + 1)]
+        # One block a minute up to now, so timestamps map back to heights
+        now = int(time.time())
+        self.block_times: List[int] = [now - 60 * (start_height - h) for h in range(start_height + 1)]
+        self.mempool: List[str] = []
+        
+        # Called with ('wallet', txid) or ('block', hash), like the daemon notify options
+        self.notify: Optional[Callable[[str, str], None]] = None
+    
+    def _notify(self, kind: str, item_hash: str):
+        if self.notify is not None:
+            self.notify(kind, item_hash)
+    
+    # Chain
+    
+    @property
+    def height(self) -> int:
+        return len(self.blocks) - 1
+    
+    def _block_hash(self, height: int) -> str:
+        return hashlib.sha256(f"{self.coin_symbol}:{height}:{secrets.token_hex(4)}".encode()).hexdigest()
+    
+    def mine(self, count: int = 1) -> List[str]:
+        """Mine blocks, confirming everything in the mempool into the first"""
+        mined = []
+        for _ in range(max(1, count)):
+            block_hash = self._block_hash(len(self.blocks))
+            self.blocks.append(block_hash)
+            self.block_times.append(int(time.time()))
+            mined.append(block_hash)
+            
+            for txid in self.mempool:
+                tx = self.transactions[txid]
+                tx['height'] = self.height
+                tx['blockhash'] = block_hash
+                self._notify('wallet', txid)
+            self.mempool = []
+            self._notify('block', block_hash)
+        
+        return mined
+    
+    def confirmations(self, tx: Dict[str, Any]) -> int:
+        return 0 if tx['height'] is None else self.height - tx['height'] + 1
+    
+    # Addresses
+    
+    def _random_address(self) -> str:
+        return self.coin_symbol[0].upper() + ''.join(secrets.choice(BASE58) for _ in range(33))
+    
+    def new_address(self, account: str = '') -> str:
+        address = self._random_address()
+        self.addresses[address] = account
+        self.accounts.setdefault(account, 0)
+        return address
+    
+    def account_address(self, account: str) -> str:
+        for address, owner in self.addresses.items():
+            if owner == account:
+                return address
+        return self.new_address(account)
+    
+    def set_account(self, address: str, account: str):
+        """Relabel an address; like legacy wallets, past receipts follow it"""
+        old_account = self.addresses[address]
+        self.addresses[address] = account
+        self.accounts.setdefault(account, 0)
+        
+        for entry in self.entries:
+            if entry.get('address') == address and entry['category'] == 'receive' and entry['account'] == old_account:
+                entry['account'] = account
+                self.accounts[old_account] -= entry['amount']
+                self.accounts[account] += entry['amount']
+    
+    # Transactions
+    
+    def _new_tx(self, category_entries: List[Dict[str, Any]], fee: int = 0) -> str:
+        txid = secrets.token_hex(32)
+        tx = {
+            'txid': txid,
+            'height': None,
+            'blockhash': None,
+            'time': int(time.time()),
+            'fee': fee,
+            'entries': category_entries
+        }
+        self.transactions[txid] = tx
+        self.mempool.append(txid)
+        
+        for vout, entry in enumerate(category_entries):
+            entry['txid'] = txid
+            entry.setdefault('vout', vout)
+            self.entries.append(entry)
+        
+        self._notify('wallet', txid)
+        return txid
+    
+    def _add_output(self, txid: str, vout: int, address: str, amount: int):
+        self.utxos[(txid, vout)] = {'txid': txid, 'vout': vout, 'address': address, 'amount': amount}
+    
+    def receive(self, address: str, amounts: List[int]) -> str:
+        """Credit an external payment to a wallet address, one output per amount"""
+        if address not in self.addresses:
+            raise RPCFault(-5, "Address not found in wallet")
+        
+        account = self.addresses[address]
+        txid = self._new_tx([
+            {'account': account, 'address': address, 'category': 'receive', 'amount': amount}
+            for amount in amounts
+        ])
+        for vout, amount in enumerate(amounts):
+            self._add_output(txid, vout, address, amount)
+        self.accounts[account] = self.accounts.get(account, 0) + sum(amounts)
+        return txid
+    
+    def move(self, from_account: str, to_account: str, amount: int) -> bool:
+        if amount <= 0:
+            raise RPCFault(-3, "Invalid amount")
+        if self.accounts.get(from_account, 0) < amount:
+            raise RPCFault(-6, "Account has insufficient funds")
+        
+        self.accounts[from_account] -= amount
+        self.accounts[to_account] = self.accounts.get(to_account, 0) + amount
+        
+        now = int(time.time())
+        self.entries.append({'account': from_account, 'category': 'move', 'amount': -amount,
+                             'otheraccount': to_account, 'time': now})
+        self.entries.append({'account': to_account, 'category': 'move', 'amount': amount,
+                             'otheraccount': from_account, 'time': now})
+        return True
+    
+    def send(self, from_account: Optional[str], recipients: Dict[str, int], comment: str = '') -> str:
+        """Pay external or wallet addresses from an account (None: the whole wallet) in one transaction"""
+        total = sum(recipients.values())
+        if total <= 0 or any(amount <= 0 for amount in recipients.values()):
+            raise RPCFault(-3, "Invalid amount")
+        if from_account is None:
+            # Like sendtoaddress, spend any of the wallet's coins and charge the default account
+            from_account = ''
+        elif self.accounts.get(from_account, 0) < total + self.fee:
+            raise RPCFault(-6, "Account has insufficient funds")
+        
+        # Spend the largest outputs first, returning change to a new address
+        selected, selected_total = [], 0
+        for key, utxo in sorted(self.utxos.items(), key=lambda item: -item[1]['amount']):
+            if selected_total >= total + self.fee:
+                break
+            selected.append(key)
+            selected_total += utxo['amount']
+        if selected_total < total + self.fee:
+            raise RPCFault(-6, "Insufficient funds")
+        
+        for key in selected:
+            del self.utxos[key]
+        self.accounts[from_account] -= total + self.fee
+        
+        entries = []
+        for address, amount in recipients.items():
+            entries.append({'account': from_account, 'address': address, 'category': 'send',
+                            'amount': -amount, 'fee': -self.fee})
+            if comment:
+                entries[-1]['comment'] = comment
+        txid = self._new_tx(entries, self.fee)
+        
+        vout = 0
+        for address, amount in recipients.items():
+            if address in self.addresses:
+                # Paying ourselves: the output stays in the wallet
+                account = self.addresses[address]
+                self._add_output(txid, vout, address, amount)
+                self.accounts[account] = self.accounts.get(account, 0) + amount
+                self.entries.append({'account': account, 'address': address, 'category': 'receive',
+                                     'amount': amount, 'txid': txid, 'vout': vout})
+            vout += 1
+        
+        change = selected_total - total - self.fee
+        if change > 0:
+            self._add_output(txid, vout, self._random_address(), change)
+        
+        return txid
+    
+    def send_raw(self, inputs: List[Dict[str, Any]], outputs: Dict[str, int]) -> str:
+        """Broadcast a transaction spending specific wallet outputs; the difference is the fee"""
+        keys = [(spent['txid'], spent['vout']) for spent in inputs]
+        if not keys or any(key not in self.utxos for key in keys):
+            raise RPCFault(-25, "Missing inputs")
+        
+        total_in = sum(self.utxos[key]['amount'] for key in keys)
+        total_out = sum(outputs.values())
+        if total_out <= 0 or total_out > total_in:
+            raise RPCFault(-26, "Insufficient fee")
+        
+        for key in keys:
+            del self.utxos[key]
+        # The fee leaves the wallet; outputs to wallet addresses stay with it
+        fee = total_in - total_out
+        self.accounts[''] -= fee
+        
+        txid = self._new_tx([{'account': '', 'category': 'send', 'amount': 0, 'fee': -fee}], fee)
+        for vout, (address, amount) in enumerate(outputs.items()):
+            self._add_output(txid, vout, address, amount)
+        return txid
+    
+    def entry_view(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """An entry as listtransactions/listsinceblock report it"""
+        view = {k: v for k, v in entry.items() if k not in ('amount', 'fee')}
+        view['amount'] = to_coins(entry['amount'])
+        if 'fee' in entry:
+            view['fee'] = to_coins(entry['fee'])
+        
+        tx = self.transactions.get(entry.get('txid'))
+        if tx:
+            view['confirmations'] = self.confirmations(tx)
+            view['time'] = tx['time']
+            if tx['blockhash']:
+                view['blockhash'] = tx['blockhash']
+                view['blockheight'] = tx['height']
+        return view
+
+
+class MockDaemon:
+    """JSON-RPC front end for one MockWallet"""
+    
+    def __init__(self, wallet: MockWallet, rpc_user: str = '', rpc_password: str = '',
+                 latency_ms: float = 0, jitter_ms: float = 0,
+                 failure_rate: float = 0, error_rate: float = 0):
+        self.wallet = wallet
+        self.rpc_user = rpc_user
+        self.rpc_password = rpc_password
+        
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.down = False
+        self.disabled_methods: List[str] = []
+        
+        self.stats = {'connections': 0, 'requests': 0, 'calls': 0, 'dropped': 0, 'errors': 0, 'rescans': 0}
+        self.method_calls: Dict[str, int] = {}
+    
+    # HTTP
+    
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats['connections'] += 1
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                headers, body = request
+                
+                # Test controls always get through so a downed daemon can be revived
+                control = b'"mock_' in body
+                if not control and (self.down or random.random() < self.failure_rate):
+                    # Drop the connection without answering, like a crashed daemon
+                    self.stats['dropped'] += 1
+                    break
+                
+                if not self._authorized(headers):
+                    self._write_response(writer, 401, b'')
+                    await writer.drain()
+                    continue
+                
+                delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+                if delay:
+                    await asyncio.sleep(delay / 1000)
+                
+                status, payload = self._handle_body(body)
+                self._write_response(writer, status, payload)
+                await writer.drain()
+                
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        
+        body = await reader.readexactly(int(headers.get('content-length', 0)))
+        self.stats['requests'] += 1
+        return headers, body
+    
+    def _authorized(self, headers: Dict[str, str]) -> bool:
+        if not self.rpc_user:
+            return True
+        
+        expected = base64.b64encode(f"{self.rpc_user}:{self.rpc_password}".encode()).decode()
+        return headers.get('authorization', '') == f"Basic {expected}"
+    
+    def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: bytes):
+        reason = {200: 'OK', 401: 'Unauthorized', 404: 'Not Found', 500: 'Internal Server Error'}.get(status, 'OK')
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: keep-alive\r\n\r\n".encode() + payload
+        )
+    
+    def _handle_body(self, body: bytes) -> Tuple[int, bytes]:
+        try:
+            request = json.loads(body)
+        except json.JSONDecodeError:
+            return 500, json.dumps(self._error_reply(None, -32700, "Parse error")).encode()
+        
+        if isinstance(request, list):
+            return 200, json.dumps([self._handle_call(call) for call in request]).encode()
+        
+        reply = self._handle_call(request)
+        # Bitcoin Core answers single-call errors with HTTP 500 (404 for unknown methods)
+        status = 200
+        if reply['error']:
+            status = 404 if reply['error']['code'] == -32601 else 500
+        return status, json.dumps(reply).encode()
+    
+    # JSON-RPC
+    
+    def _error_reply(self, call_id: Any, code: int, message: str) -> Dict[str, Any]:
+        return {'result': None, 'error': {'code': code, 'message': message}, 'id': call_id}
+    
+    def _handle_call(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        call_id = call.get('id')
+        method = call.get('method', '')
+        params = call.get('params') or []
+        
+        self.stats['calls'] += 1
+        self.method_calls[method] = self.method_calls.get(method, 0) + 1
+        
+        if self.error_rate and random.random() < self.error_rate and not method.startswith('mock_'):
+            self.stats['errors'] += 1
+            return self._error_reply(call_id, -1, "Injected failure")
+        
+        handler = getattr(self, f"rpc_{method}", None)
+        if handler is None or method in self.disabled_methods:
+            return self._error_reply(call_id, -32601, "Method not found")
+        
+        try:
+            return {'result': handler(*params), 'error': None, 'id': call_id}
+        except RPCFault as e:
+            return self._error_reply(call_id, e.code, e.message)
+        except TypeError:
+            return self._error_reply(call_id, -1, f"Invalid parameters for {method}")
+    
+    # Wallet methods
+    
+    def rpc_getnewaddress(self, account: str = '', *_):
+        return self.wallet.new_address(account)
+    
+    def rpc_getaccountaddress(self, account: str):
+        return self.wallet.account_address(account)
+    
+    def rpc_setaccount(self, address: str, account: str):
+        if address not in self.wallet.addresses:
+            raise RPCFault(-5, "Invalid address")
+        self.wallet.set_account(address, account)
+        return None
+    
+    def rpc_getaccount(self, address: str):
+        return self.wallet.addresses.get(address, '')
+    
+    def rpc_getbalance(self, account: str = '*', minconf: int = 1, *_):
+        if account == '*' or account is None:
+            return to_coins(sum(self.wallet.accounts.values()))
+        return to_coins(self.wallet.accounts.get(account, 0))
+    
+    def rpc_listaccounts(self, minconf: int = 1, *_):
+        return {account: to_coins(balance) for account, balance in self.wallet.accounts.items()}
+    
+    def rpc_move(self, from_account: str, to_account: str, amount: Any, *_):
+        return self.wallet.move(from_account, to_account, to_units(amount))
+    
+    def rpc_sendfrom(self, from_account: str, address: str, amount: Any, *_):
+        return self.wallet.send(from_account, {address: to_units(amount)})
+    
+    def rpc_sendtoaddress(self, address: str, amount: Any, *_):
+        return self.wallet.send(None, {address: to_units(amount)})
+    
+    def rpc_sendmany(self, from_account: str, amounts: Dict[str, Any], minconf: int = 1, comment: str = '', *_):
+        if not isinstance(amounts, dict) or not amounts:
+            raise RPCFault(-8, "Invalid amounts")
+        # Current daemons ignore the account and spend from the whole wallet
+        recipients = {address: to_units(amount) for address, amount in amounts.items()}
+        return self.wallet.send(from_account or None, recipients, comment)
+    
+    def rpc_listunspent(self, minconf: int = 1, maxconf: int = 9999999, addresses: List[str] = None, *_):
+        wanted = set(addresses) if addresses else None
+        unspent = []
+        for utxo in self.wallet.utxos.values():
+            if wanted is not None and utxo['address'] not in wanted:
+                continue
+            confirmations = self.wallet.confirmations(self.wallet.transactions[utxo['txid']])
+            if minconf <= confirmations <= maxconf:
+                unspent.append({
+                    'txid': utxo['txid'],
+                    'vout': utxo['vout'],
+                    'address': utxo['address'],
+                    'account': self.wallet.addresses.get(utxo['address'], ''),
+                    'amount': to_coins(utxo['amount']),
+                    'confirmations': confirmations,
+                    'spendable': True
+                })
+        return unspent
+    
+    def rpc_getrawchangeaddress(self, *_):
+        return self.wallet.new_address('')
+    
+    def rpc_createrawtransaction(self, inputs: List[Dict[str, Any]], outputs: Dict[str, Any], *_):
+        # Not real transaction encoding, just enough for sign and send to round-trip
+        raw = {'inputs': inputs, 'outputs': {address: to_units(amount) for address, amount in outputs.items()}}
+        return json.dumps(raw, sort_keys=True).encode().hex()
+    
+    def rpc_signrawtransactionwithwallet(self, raw_hex: str, *_):
+        return {'hex': raw_hex, 'complete': True}
+    
+    def rpc_signrawtransaction(self, raw_hex: str, *_):
+        return {'hex': raw_hex, 'complete': True}
+    
+    def rpc_sendrawtransaction(self, raw_hex: str, *_):
+        try:
+            raw = json.loads(bytes.fromhex(raw_hex))
+        except ValueError:
+            raise RPCFault(-22, "TX decode failed")
+        return self.wallet.send_raw(raw['inputs'], raw['outputs'])
+    
+    def rpc_listtransactions(self, account: str = '*', count: int = 10, skip: int = 0, *_):
+        entries = [e for e in self.wallet.entries if account in ('*', None) or e.get('account') == account]
+        # Most recent `count` entries after skipping `skip`, oldest first
+        end = len(entries) - skip
+        selected = entries[max(0, end - count):max(0, end)]
+        return [self.wallet.entry_view(e) for e in selected]
+    
+    def rpc_getreceivedbyaddress(self, address: str, minconf: int = 1, *_):
+        if address not in self.wallet.addresses:
+            raise RPCFault(-4, "Address not found in wallet")
+        return to_coins(sum(
+            e['amount'] for e in self.wallet.entries
+            if e.get('address') == address and e['category'] == 'receive'
+            and self.wallet.confirmations(self.wallet.transactions[e['txid']]) >= minconf
+        ))
+    
+    def rpc_gettransaction(self, txid: str, *_):
+        tx = self.wallet.transactions.get(txid)
+        if tx is None:
+            raise RPCFault(-5, "Invalid or non-wallet transaction id")
+        
+        details = [self.wallet.entry_view(e) for e in self.wallet.entries if e.get('txid') == txid]
+        result = {
+            'txid': txid,
+            'amount': to_coins(sum(e['amount'] for e in tx['entries'])),
+            'confirmations': self.wallet.confirmations(tx),
+            'time': tx['time'],
+            'details': details
+        }
+        if tx['fee']:
+            result['fee'] = -to_coins(tx['fee'])
+        if tx['blockhash']:
+            result['blockhash'] = tx['blockhash']
+            result['blockheight'] = tx['height']
+        return result
+    
+    def rpc_listsinceblock(self, blockhash: str = '', target_confirmations: int = 1, *_):
+        since_height = -1
+        if blockhash:
+            try:
+                since_height = self.wallet.blocks.index(blockhash)
+            except ValueError:
+                raise RPCFault(-5, "Block not found")
+        
+        transactions = []
+        for entry in self.wallet.entries:
+            tx = self.wallet.transactions.get(entry.get('txid'))
+            if tx and (tx['height'] is None or tx['height'] > since_height):
+                transactions.append(self.wallet.entry_view(entry))
+        
+        lastblock_height = max(0, self.wallet.height - max(1, target_confirmations) + 1)
+        return {'transactions': transactions, 'lastblock': self.wallet.blocks[lastblock_height]}
+    
+    def rpc_validateaddress(self, address: str):
+        valid = len(address) == 34 and address[0] == self.wallet.coin_symbol[0].upper()
+        result = {'isvalid': valid}
+        if valid:
+            result.update({'address': address, 'ismine': address in self.wallet.addresses})
+        return result
+    
+    def rpc_dumpprivkey(self, address: str):
+        if address not in self.wallet.addresses:
+            raise RPCFault(-4, "Private key for address is not known")
+        return hashlib.sha256(f"key:{address}".encode()).hexdigest()
+    
+    def rpc_importprivkey(self, private_key: str, account: str = '', rescan: bool = True):
+        self.wallet.imported_keys[private_key] = account
+        if rescan:
+            self.stats['rescans'] += 1
+        return None
+    
+    def rpc_importmulti(self, requests: List[Dict[str, Any]], options: Dict[str, Any] = None):
+        results = []
+        for request in requests:
+            address = (request.get('scriptPubKey') or {}).get('address')
+            if not address or 'timestamp' not in request:
+                results.append({'success': False, 'error': {'code': -8, 'message': 'Missing required fields'}})
+                continue
+            for key in request.get('keys', []):
+                self.wallet.imported_keys[key] = request.get('label', '')
+            self.wallet.addresses.setdefault(address, request.get('label', ''))
+            results.append({'success': True})
+        
+        if (options or {}).get('rescan', True) and any(r['success'] for r in results):
+            self.stats['rescans'] += 1
+        return results
+    
+    def rpc_rescanblockchain(self, start_height: int = 0, stop_height: int = None):
+        self.stats['rescans'] += 1
+        return {'start_height': start_height, 'stop_height': self.wallet.height if stop_height is None else stop_height}
+    
+    def rpc_importaddress(self, address: str, account: str = '', rescan: bool = True, *_):
+        self.wallet.addresses[address] = account
+        self.wallet.accounts.setdefault(account, 0)
+        return None
+    
+    def rpc_backupwallet(self, destination: str):
+        with open(destination, 'w') as f:
+            json.dump({'accounts': self.wallet.accounts, 'addresses': self.wallet.addresses}, f)
+        return None
+    
+    # Chain methods
+    
+    def rpc_getblockcount(self):
+        return self.wallet.height
+    
+    def rpc_getbestblockhash(self):
+        return self.wallet.blocks[-1]
+    
+    def rpc_getblockhash(self, height: int):
+        if not 0 <= height <= self.wallet.height:
+            raise RPCFault(-8, "Block height out of range")
+        return self.wallet.blocks[height]
+    
+    def rpc_getblockheader(self, block_hash: str, *_):
+        if block_hash not in self.wallet.blocks:
+            raise RPCFault(-5, "Block not found")
+        height = self.wallet.blocks.index(block_hash)
+        return {'hash': block_hash, 'height': height, 'time': self.wallet.block_times[height],
+                'confirmations': self.wallet.height - height + 1}
+    
+    def rpc_getblockchaininfo(self):
+        return {'chain': 'main', 'blocks': self.wallet.height, 'headers': self.wallet.height,
+                'bestblockhash': self.wallet.blocks[-1]}
+    
+    def rpc_getnetworkinfo(self):
+        return {'version': 210000, 'subversion': '/MockDaemon:1.0/', 'connections': 8}
+    
+    def rpc_getwalletinfo(self):
+        return {'walletname': self.wallet.coin_symbol.lower(),
+                'balance': to_coins(sum(self.wallet.accounts.values())),
+                'txcount': len(self.wallet.transactions)}
+    
+    def rpc_getinfo(self):
+        return {'blocks': self.wallet.height, 'connections': 8,
+                'balance': to_coins(sum(self.wallet.accounts.values()))}
+    
+    def rpc_estimatefee(self, blocks: int = 6):
+        return to_coins(self.wallet.fee)
+    
+    def rpc_estimatesmartfee(self, blocks: int = 6, *_):
+        return {'feerate': to_coins(self.wallet.fee), 'blocks': blocks}
+    
+    # Test controls
+    
+    def rpc_mock_receive(self, address: str, amount: Any):
+        amounts = amount if isinstance(amount, list) else [amount]
+        return self.wallet.receive(address, [to_units(value) for value in amounts])
+    
+    def rpc_mock_mine(self, count: int = 1):
+        return self.wallet.mine(int(count))
+    
+    def rpc_mock_set(self, settings: Dict[str, Any]):
+        names = ('latency_ms', 'jitter_ms', 'failure_rate', 'error_rate', 'down', 'disabled_methods')
+        for name in names:
+            if name in settings:
+                setattr(self, name, settings[name])
+        return {name: getattr(self, name) for name in names}
+    
+    def rpc_mock_stats(self):
+        return {**self.stats, 'methods': self.method_calls}
+
+
+async def mine_blocks(daemons: List[MockDaemon], interval: float):
+    """Mine a block on every mock chain every `interval` seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        for daemon in daemons:
+            daemon.wallet.mine()
+
+
+async def run_notify_command(command: str, coin_symbol: str, item_hash: str):
+    """Run a notify command the way a coin daemon does"""
+    process = await asyncio.create_subprocess_shell(command.replace('%c', coin_symbol).replace('%s', item_hash))
+    if await process.wait():
+        logger.warning(f"{coin_symbol} notify command exited with status {process.returncode}")
+
+
+def notify_commands(args: argparse.Namespace, coin_symbol: str) -> Callable[[str, str], None]:
+    """Wallet notify callback running --walletnotify or --blocknotify in the background"""
+    commands = {'wallet': args.walletnotify, 'block': args.blocknotify}
+    
+    def notify(kind: str, item_hash: str):
+        if commands[kind]:
+            asyncio.get_running_loop().create_task(run_notify_command(commands[kind], coin_symbol, item_hash))
+    return notify
+
+
+def write_cli_wrapper(cli_dir: str, coin_symbol: str, port: int, rpc_user: str, rpc_password: str) -> str:
+    """Write an executable that behaves like the coin's CLI for this mock daemon"""
+    os.makedirs(cli_dir, exist_ok=True)
+    path = os.path.abspath(os.path.join(cli_dir, f"{coin_symbol.lower()}-cli"))
+    
+    args = [f"-rpcport={port}"]
+    if rpc_user:
+        args += [f"-rpcuser={rpc_user}", f"-rpcpassword={rpc_password}"]
+    
+    with open(path, 'w') as f:
+        f.write("#!/bin/sh\n")
+        f.write(f'exec "{sys.executable}" "{os.path.abspath(__file__)}" {" ".join(args)} "$@"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+async def serve(args: argparse.Namespace):
+    """Start one mock daemon per --coin and run until interrupted"""
+    daemons, servers, coins_config = [], [], {}
+    
+    for spec in args.coin:
+        coin_symbol, _, port = spec.partition(':')
+        port = int(port)
+        
+        wallet = MockWallet(coin_symbol.upper(), fee=args.fee)
+        wallet.notify = notify_commands(args, coin_symbol.upper())
+        daemon = MockDaemon(wallet, args.rpcuser, args.rpcpassword, args.latency_ms, args.jitter_ms,
+                            args.failure_rate, args.error_rate)
+        server = await asyncio.start_server(daemon.handle_connection, args.host, port)
+        daemons.append(daemon)
+        servers.append(server)
+        
+        coin_config = {'enabled': True, 'rpc_host': args.host, 'rpc_port': port,
+                       'rpc_user': args.rpcuser, 'rpc_password': args.rpcpassword}
+        if args.cli_dir:
+            coin_config['cli_path'] = write_cli_wrapper(args.cli_dir, coin_symbol, port,
+                                                        args.rpcuser, args.rpcpassword)
+        coins_config[coin_symbol.upper()] = coin_config
+        logger.info(f"Mock {coin_symbol.upper()} daemon listening on {args.host}:{port}")
+    
+    # Settings to merge into the "coins" section of config.json
+    print(json.dumps(coins_config, indent=2), flush=True)
+    
+    if args.block_interval > 0:
+        asyncio.create_task(mine_blocks(daemons, args.block_interval))
+    
+    await asyncio.gather(*[server.serve_forever() for server in servers])
+
+
+def cli(argv: List[str]) -> int:
+    """Behave like a coin's CLI: send one call to a running mock daemon"""
+    options = {'rpcconnect': '127.0.0.1', 'rpcport': '18332', 'rpcuser': '', 'rpcpassword': ''}
+    positional = []
+    for arg in argv:
+        if arg.startswith('-') and '=' in arg:
+            name, _, value = arg.lstrip('-').partition('=')
+            options[name] = value
+        else:
+            positional.append(arg)
+    
+    if not positional:
+        print("error: too few parameters", file=sys.stderr)
+        return 1
+    
+    method, raw_params = positional[0], positional[1:]
+    params = []
+    for raw in raw_params:
+        try:
+            params.append(json.loads(raw))
+        except json.JSONDecodeError:
+            params.append(raw)
+    
+    headers = {'Content-Type': 'application/json'}
+    if options['rpcuser']:
+        token = base64.b64encode(f"{options['rpcuser']}:{options['rpcpassword']}".encode()).decode()
+        headers['Authorization'] = f"Basic {token}"
+    
+    try:
+        connection = http.client.HTTPConnection(options['rpcconnect'], int(options['rpcport']), timeout=30)
+        connection.request('POST', '/', json.dumps({'jsonrpc': '1.0', 'id': 'cli', 'method': method,
+                                                   'params': params}), headers)
+        response = connection.getresponse()
+        body = response.read()
+    except (OSError, http.client.HTTPException):
+        print(f"error: Could not connect to the server {options['rpcconnect']}:{options['rpcport']}",
+              file=sys.stderr)
+        return 1
+    
+    if response.status == 401:
+        print("error: Authorization failed: Incorrect rpcuser or rpcpassword", file=sys.stderr)
+        return 1
+    
+    reply = json.loads(body)
+    if reply.get('error'):
+        print(f"error code: {reply['error']['code']}\nerror message:\n{reply['error']['message']}", file=sys.stderr)
+        return 1
+    
+    result = reply.get('result')
+    if isinstance(result, str):
+        print(result)
+    elif result is not None:
+        print(json.dumps(result, indent=2))
+    return 0
+
+
+def main():
+    """Entry point: `serve` runs daemons, anything else is a CLI call"""
+    if len(sys.argv) < 2 or sys.argv[1] != 'serve':
+        sys.exit(cli(sys.argv[1:]))
+    
+    parser = argparse.ArgumentParser(description="Mock coin daemons for offline testing and benchmarks")
+    parser.add_argument('serve')
+    parser.add_argument('--coin', action='append', required=True,
+                        help="COIN:PORT to serve, repeat for several coins")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--rpcuser', default='mockrpc')
+    parser.add_argument('--rpcpassword', default='mockpassword')
+    parser.add_argument('--fee', type=float, default=0.0001, help="network fee per transaction")
+    parser.add_argument('--block-interval', type=float, default=60, help="seconds between blocks (0 to disable)")
+    parser.add_argument('--latency-ms', type=float, default=0, help="added latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="random extra latency per request")
+    parser.add_argument('--failure-rate', type=float, default=0, help="fraction of requests dropped unanswered")
+    parser.add_argument('--error-rate', type=float, default=0, help="fraction of calls answered with an RPC error")
+    parser.add_argument('--cli-dir', help="directory to write <coin>-cli wrapper scripts into")
+    parser.add_argument('--walletnotify', help="command to run per wallet transaction (%%s txid, %%c coin)")
+    parser.add_argument('--blocknotify', help="command to run per block (%%s block hash, %%c coin)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        stream=sys.stderr)
+    
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
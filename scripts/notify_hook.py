@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Notify Hook - Forwards a coin daemon's walletnotify/blocknotify to the running tipbot
+Powered By Aegisum EcoSystem
+
+Add to each coin daemon's config (the daemon replaces %s with the txid or block hash):
+    walletnotify=/opt/tipbot/scripts/notify_hook.py AEGS wallet %s
+    blocknotify=/opt/tipbot/scripts/notify_hook.py AEGS block %s
+
+Use --socket when the bot's "notify.socket_path" is not data/notify.sock in the bot directory.
+"""
+
+import argparse
+import os
+import socket
+import sys
+
+DEFAULT_SOCKET = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'notify.sock')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Forward a daemon notification to the tipbot")
+    parser.add_argument('coin', help="coin symbol, e.g. AEGS")
+    parser.add_argument('kind', choices=['wallet', 'block'])
+    parser.add_argument('hash', help="txid or block hash")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help="path of the bot's notify socket")
+    args = parser.parse_args()
+    
+    # Never hold up the daemon; polling catches anything missed while the bot is down
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(2)
+            connection.connect(args.socket)
+            connection.sendall(f"{args.coin} {args.kind} {args.hash}\n".encode())
+    except OSError as e:
+        print(f"notify_hook: could not reach {args.socket}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
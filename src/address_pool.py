@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Address Pool - Pre-generated deposit addresses per coin, topped up in the background
+Powered By Aegisum EcoSystem
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from coin_interface import is_method_missing
+from daemon_scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+# Wallet account that holds pre-generated addresses until they are assigned
+POOL_ACCOUNT = 'address_pool'
+
+
+class AddressPool:
+    """Hand out deposit addresses from the database instead of the daemon"""
+    
+    def __init__(self, config: dict, database, coin_interface):
+        self.config = config
+        self.db = database
+        self.coin_interface = coin_interface
+        
+        pool_config = config.get('address_pool', {})
+        self.enabled = pool_config.get('enabled', False)
+        self.low_watermark = pool_config.get('low_watermark', 20)
+        self.high_watermark = max(self.low_watermark, pool_config.get('high_watermark', 100))
+        self.batch_size = pool_config.get('batch_size', 50)
+        self.refill_interval = pool_config.get('refill_interval', 60)
+        
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+    
+    def start(self):
+        """Start the background refiller"""
+        if self.enabled and self.task is None:
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background refiller"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+    
+    def assign(self, user_id: int, coin_symbol: str) -> Optional[str]:
+        """Assign a pooled address to a user, or None if the pool is empty"""
+        if not self.enabled:
+            return None
+        
+        address = self.db.claim_pool_address(user_id, coin_symbol)
+        
+        # The refiller labels the address for the user and tops the pool up
+        if self.wakeup is not None:
+            self.wakeup.set()
+        
+        return address
+    
+    async def _run(self):
+        while True:
+            for coin_symbol in self.coin_interface.get_supported_coins():
+                if not self.coin_interface.is_coin_available(coin_symbol):
+                    continue
+                try:
+                    await self.label_assigned(coin_symbol)
+                    await self.refill(coin_symbol)
+                except Exception as e:
+                    logger.error(f"Error maintaining {coin_symbol} address pool: {e}")
+            
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+    
+    async def refill(self, coin_symbol: str) -> int:
+        """Top a coin's pool up to the high watermark once it drops below the low one"""
+        free = self.db.count_free_pool_addresses(coin_symbol)
+        if free >= self.low_watermark:
+            return 0
+        
+        added = 0
+        needed = self.high_watermark - free
+        while added < needed:
+            count = min(self.batch_size, needed - added)
+            results = await self.coin_interface.batch(
+                coin_symbol, [('getnewaddress', [POOL_ACCOUNT])] * count, Priority.BACKGROUND
+            )
+            
+            addresses = [r['result'] for r in results if r['success'] and r['result']]
+            if not addresses:
+                logger.error(f"Failed to generate {coin_symbol} pool addresses: {results[0]['error']}")
+                break
+            
+            self.db.add_pool_addresses(coin_symbol, addresses)
+            added += len(addresses)
+        
+        logger.info(f"Added {added} addresses to the {coin_symbol} address pool")
+        return added
+    
+    async def label_assigned(self, coin_symbol: str) -> int:
+        """Move assigned addresses into their user's wallet account, where the daemon has accounts
+
+        Balances live in the ledger, so the account only helps admins reading the wallet.
+        """
+        labeled = 0
+        while True:
+            pending = self.db.get_unlabeled_pool_addresses(coin_symbol, self.batch_size)
+            if not pending:
+                return labeled
+            
+            results = await self.coin_interface.batch(
+                coin_symbol,
+                [('setaccount', [address, f'user_{user_id}']) for address, user_id in pending],
+                Priority.BACKGROUND
+            )
+            
+            # Without setaccount there is nothing to label; don't try again every cycle
+            done = [address for (address, _), r in zip(pending, results) if r['success'] or is_method_missing(r)]
+            if not done:
+                logger.error(f"Failed to label {coin_symbol} pool addresses: {results[0]['error']}")
+                return labeled
+            
+            self.db.mark_pool_addresses_labeled(done)
+            labeled += len(done)
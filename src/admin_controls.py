@@ -15,9 +15,10 @@ from utils import get_powered_by_text, format_amount
 logger = logging.getLogger(__name__)
 
 class AdminControls:
-    def __init__(self, config: dict, database):
+    def __init__(self, config: dict, database, coin_interface=None):
         self.config = config
         self.db = database
+        self.coin_interface = coin_interface
         self.admin_users = set(config['bot'].get('admin_users', []))
     
     def is_admin(self, user_id: int) -> bool:
@@ -298,6 +299,25 @@ class AdminControls:
                 
                 stats_text += f"• **{coin_symbol}:** {tip_count} tips, {formatted_total} total\n"
             
+            reconciliation = self.db.get_reconciliation()
+            if reconciliation:
+                stats_text += "\n**Ledger vs Wallet:**\n"
+            for coin_symbol, check in reconciliation.items():
+                decimals = self.config['coins'].get(coin_symbol, {}).get('decimals', 8)
+                status = {'ok': '✅', 'checking': '🔍', 'drift': '⚠️'}.get(check['status'], '❔')
+                stats_text += (
+                    f"{status} **{coin_symbol}:** wallet {format_amount(check['wallet_balance'] or 0, decimals)}, "
+                    f"owed {format_amount(check['liabilities'] or 0, decimals)}, "
+                    f"drift {format_amount(check['drift'] or 0, decimals)}\n"
+                )
+                if check['status'] != 'ok':
+                    stats_text += f"   {check['users_checked']} users checked, {len(check['findings'])} findings\n"
+                    for finding in check['findings'][:5]:
+                        stats_text += (
+                            f"   • user {finding['user_id']} {finding['check']}: "
+                            f"{finding['bot']} vs {finding['expected']}\n"
+                        )
+            
             stats_text += f"\n{get_powered_by_text()}"
             
             await update.message.reply_text(stats_text, parse_mode='Markdown')
@@ -437,9 +457,35 @@ class AdminControls:
             f"**Network Fee:** {coin_config.get('network_fee', 0)} {coin_symbol}\n"
             f"**RPC Host:** {coin_config.get('rpc_host', 'N/A')}\n"
             f"**RPC Port:** {coin_config.get('rpc_port', 'N/A')}\n\n"
-            f"{get_powered_by_text()}"
         )
         
+        if self.coin_interface:
+            scheduler_stats = self.coin_interface.get_scheduler_stats().get(coin_symbol)
+            if scheduler_stats:
+                info_text += (
+                    f"**Daemon Calls:** {scheduler_stats['in_flight']}/{scheduler_stats['max_concurrent']} running, "
+                    f"{scheduler_stats['queue_depth']} queued\n"
+                )
+                for priority, waits in scheduler_stats['waits'].items():
+                    info_text += (
+                        f"• {priority}: {waits['calls']} calls, "
+                        f"avg wait {waits['avg_wait_ms']}ms, max {waits['max_wait_ms']}ms\n"
+                    )
+                info_text += "\n"
+            
+            latency_stats = self.coin_interface.get_latency_stats().get(coin_symbol)
+            if latency_stats:
+                info_text += "**Daemon Latency:**\n"
+                busiest = sorted(latency_stats.items(), key=lambda item: -item[1]['calls'])[:8]
+                for method, stats in busiest:
+                    info_text += (
+                        f"• `{method}`: {stats['calls']} calls, p50 {stats['p50_ms']:g}ms, "
+                        f"p95 {stats['p95_ms']:g}ms, {stats['errors']} errors, {stats['timeouts']} timeouts\n"
+                    )
+                info_text += "\n"
+        
+        info_text += f"{get_powered_by_text()}"
+        
         await update.message.reply_text(info_text, parse_mode='Markdown')
     
     async def set_fees_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -10,6 +10,7 @@ import logging
 import os
 import sys
 from datetime import datetime
+from io import BytesIO
 from typing import Dict, List, Optional
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -19,8 +20,14 @@ from telegram.ext import (
 )
 
 from wallet_manager import WalletManager
+from withdrawal_batcher import WithdrawalBatcher
+from utxo_consolidator import UtxoConsolidator
+from reconciler import Reconciler
+from notify_listener import NotifyListener
 from coin_interface import CoinInterface
+from address_pool import AddressPool
 from database import Database
+from ledger import Ledger
 from admin_controls import AdminControls
 from transaction_monitor import TransactionMonitor
 from utils import format_amount, validate_address, get_powered_by_text
@@ -41,10 +48,16 @@ class CommunityTipBot:
         """Initialize the Community Tip Bot"""
         self.config = self.load_config(config_path)
         self.db = Database(self.config['database']['path'])
-        self.wallet_manager = WalletManager(self.config)
         self.coin_interface = CoinInterface(self.config)
-        self.admin_controls = AdminControls(self.config, self.db)
-        self.transaction_monitor = TransactionMonitor(self.config, self.db, self.coin_interface)
+        self.ledger = Ledger(self.config, self.db)
+        self.address_pool = AddressPool(self.config, self.db, self.coin_interface)
+        self.wallet_manager = WalletManager(self.config, self.coin_interface, self.address_pool, self.ledger)
+        self.admin_controls = AdminControls(self.config, self.db, self.coin_interface)
+        self.transaction_monitor = TransactionMonitor(self.config, self.db, self.coin_interface, self.ledger)
+        self.withdrawal_batcher = WithdrawalBatcher(self.config, self.db, self.coin_interface, self.ledger)
+        self.utxo_consolidator = UtxoConsolidator(self.config, self.coin_interface)
+        self.reconciler = Reconciler(self.config, self.db, self.coin_interface, self.ledger)
+        self.notify_listener = NotifyListener(self.config, self.transaction_monitor)
         
         # Bot application
         self.application = None
@@ -84,15 +97,19 @@ class CommunityTipBot:
             # Create new user and wallets
             self.db.create_user(user_id, username)
             
-            # Generate addresses for all enabled coins
+            # Assign addresses for all enabled coins, from the address pool when possible
             addresses = {}
-            for coin_symbol in self.config['coins']:
-                if self.config['coins'][coin_symbol]['enabled']:
-                    try:
-                        address = await self.wallet_manager.generate_address(user_id, coin_symbol)
-                        addresses[coin_symbol] = address
-                    except Exception as e:
-                        logger.error(f"Failed to generate {coin_symbol} address for user {user_id}: {e}")
+            enabled_coins = [c for c in self.config['coins'] if self.config['coins'][c]['enabled']]
+            results = await asyncio.gather(
+                *[self.wallet_manager.assign_address(user_id, coin_symbol) for coin_symbol in enabled_coins],
+                return_exceptions=True
+            )
+            
+            for coin_symbol, address in zip(enabled_coins, results):
+                if isinstance(address, Exception):
+                    logger.error(f"Failed to generate {coin_symbol} address for user {user_id}: {address}")
+                else:
+                    addresses[coin_symbol] = address
             
             # Store addresses in database
             for coin_symbol, address in addresses.items():
@@ -119,13 +136,13 @@ class CommunityTipBot:
             "• `/deposit` - Get your deposit addresses\n"
             "• `/withdraw <coin> <amount> <address>` - Withdraw coins\n"
             "• `/backup` - Export your wallet backup\n"
+            "• `/restore [backup]` - Restore a backup, or check restore progress\n"
             "• `/history` - View transaction history\n\n"
             
             "**🎁 Tipping & Rewards:**\n"
             "• `/tip @user <coin> <amount>` - Send a tip\n"
             "• `/rain <coin> <amount>` - Rain coins to active users\n"
-            "• `/airdrop <coin> <amount> <minutes>` - Start an airdrop\n"
-            "• `/claimtips` - Claim pending tips\n\n"
+            "• `/airdrop <coin> <amount> <minutes>` - Start an airdrop\n\n"
             
             "**📊 Community:**\n"
             "• `/top` - View top contributors\n"
@@ -148,23 +165,25 @@ class CommunityTipBot:
             )
             return
         
-        balances = {}
-        total_value = 0
-        
-        for coin_symbol in self.config['coins']:
-            if self.config['coins'][coin_symbol]['enabled']:
-                try:
-                    balance = await self.wallet_manager.get_balance(user_id, coin_symbol)
-                    balances[coin_symbol] = balance
-                except Exception as e:
-                    logger.error(f"Failed to get {coin_symbol} balance for user {user_id}: {e}")
-                    balances[coin_symbol] = 0
+        # Balances live in the ledger, so this never waits on a daemon
+        balances = self.wallet_manager.ledger.get_balances(user_id)
         
         balance_text = "💰 **Your Wallet Balances:**\n\n"
         
-        for coin_symbol, balance in balances.items():
-            formatted_balance = format_amount(balance, self.config['coins'][coin_symbol]['decimals'])
-            balance_text += f"• **{coin_symbol}:** {formatted_balance}\n"
+        for coin_symbol in self.config['coins']:
+            if not self.config['coins'][coin_symbol]['enabled']:
+                continue
+            if not self.wallet_manager.ledger.is_open(coin_symbol):
+                # Balances from before the ledger are still being carried over
+                balance_text += f"• **{coin_symbol}:** ⚠️ temporarily unavailable\n"
+                continue
+            decimals = self.config['coins'][coin_symbol]['decimals']
+            balance = balances.get(coin_symbol, {})
+            balance_text += f"• **{coin_symbol}:** {format_amount(balance.get('available', 0), decimals)}\n"
+            if balance.get('pending'):
+                balance_text += f"  ⏳ Pending: {format_amount(balance['pending'], decimals)}\n"
+            if balance.get('locked'):
+                balance_text += f"  🔒 Withdrawing: {format_amount(balance['locked'], decimals)}\n"
         
         balance_text += f"\n{get_powered_by_text()}"
         
@@ -187,7 +206,10 @@ class CommunityTipBot:
             if self.config['coins'][coin_symbol]['enabled']:
                 address = self.db.get_user_address(user_id, coin_symbol)
                 if address:
-                    deposit_text += f"**{coin_symbol}:**\n`{address}`\n\n"
+                    deposit_text += f"**{coin_symbol}:**\n`{address}`\n"
+                    if not self.coin_interface.is_coin_available(coin_symbol):
+                        deposit_text += "⚠️ Wallet temporarily unavailable, deposits will be credited once it is back\n"
+                    deposit_text += "\n"
         
         deposit_text += (
             "⚠️ **Important:**\n"
@@ -279,18 +301,18 @@ class CommunityTipBot:
             return
         
         try:
-            # Process the tip
-            tx_id = await self.wallet_manager.send_tip(user_id, target_user_id, coin_symbol, amount)
+            # Process the tip; it moves between ledger balances at once, with no on-chain transaction
+            reference = await self.wallet_manager.send_tip(user_id, target_user_id, coin_symbol, amount)
             
             # Record in database
-            self.db.record_tip(user_id, target_user_id, coin_symbol, amount, tx_id)
+            self.db.record_tip(user_id, target_user_id, coin_symbol, amount, reference)
             
             # Send confirmation
             formatted_amount = format_amount(amount, self.config['coins'][coin_symbol]['decimals'])
             await update.message.reply_text(
                 f"✅ **Tip Sent!**\n\n"
                 f"💸 {formatted_amount} {coin_symbol} → @{target_username}\n"
-                f"🔗 TX ID: `{tx_id}`\n\n"
+                f"🧾 Tip reference: `{reference}`\n\n"
                 f"{get_powered_by_text()}",
                 parse_mode='Markdown'
             )
@@ -302,8 +324,8 @@ class CommunityTipBot:
                     text=(
                         f"🎁 **You received a tip!**\n\n"
                         f"💰 {formatted_amount} {coin_symbol} from @{update.effective_user.username or 'Anonymous'}\n"
-                        f"🔗 TX ID: `{tx_id}`\n\n"
-                        f"Use /claimtips to claim your tips!\n\n"
+                        f"🧾 Tip reference: `{reference}`\n\n"
+                        f"It's already in your balance, see /balance.\n\n"
                         f"{get_powered_by_text()}"
                     ),
                     parse_mode='Markdown'
@@ -370,19 +392,48 @@ class CommunityTipBot:
         # Check balance
         balance = await self.wallet_manager.get_balance(user_id, coin_symbol)
         withdrawal_fee = self.config['coins'][coin_symbol]['withdrawal_fee']
-        total_needed = amount + withdrawal_fee
+        
+        # The daemon takes the network fee from the sending account as well
+        network_fee = self.coin_interface.fees.get_network_fee(coin_symbol)
+        total_needed = amount + withdrawal_fee + network_fee
         
         if balance < total_needed:
             await update.message.reply_text(
                 f"❌ Insufficient balance.\n\n"
                 f"Amount: {format_amount(amount, self.config['coins'][coin_symbol]['decimals'])} {coin_symbol}\n"
                 f"Fee: {format_amount(withdrawal_fee, self.config['coins'][coin_symbol]['decimals'])} {coin_symbol}\n"
+                f"Network fee (est.): {format_amount(network_fee, self.config['coins'][coin_symbol]['decimals'])} {coin_symbol}\n"
                 f"Total needed: {format_amount(total_needed, self.config['coins'][coin_symbol]['decimals'])} {coin_symbol}\n"
                 f"Your balance: {format_amount(balance, self.config['coins'][coin_symbol]['decimals'])} {coin_symbol}\n\n"
                 f"{get_powered_by_text()}"
             )
             return
         
+        if self.withdrawal_batcher.enabled:
+            try:
+                # Paid with other withdrawals in the next batch; the monitor notifies on confirmation
+                withdrawal_id = self.withdrawal_batcher.queue(user_id, coin_symbol, amount, address)
+                
+                await update.message.reply_text(
+                    f"✅ **Withdrawal Queued!**\n\n"
+                    f"💸 {format_amount(amount, self.config['coins'][coin_symbol]['decimals'])} {coin_symbol}\n"
+                    f"📍 To: `{address}`\n"
+                    f"💰 Fee: {format_amount(withdrawal_fee, self.config['coins'][coin_symbol]['decimals'])} {coin_symbol}\n"
+                    f"🧾 Withdrawal #{withdrawal_id}\n\n"
+                    f"⏳ It will be sent within {self.withdrawal_batcher.flush_interval} seconds. "
+                    f"The batch shares one network fee; what you don't use of the estimate is refunded.\n"
+                    f"You'll receive a notification when confirmed.\n\n"
+                    f"{get_powered_by_text()}",
+                    parse_mode='Markdown'
+                )
+            except Exception as e:
+                logger.error(f"Failed to queue withdrawal: {e}")
+                await update.message.reply_text(
+                    f"❌ Failed to process withdrawal. Please try again later.\n\n"
+                    f"{get_powered_by_text()}"
+                )
+            return
+        
         try:
             # Process withdrawal
             tx_id = await self.wallet_manager.withdraw(user_id, coin_symbol, amount, address)
@@ -401,6 +452,7 @@ class CommunityTipBot:
                 f"💰 Fee: {formatted_fee} {coin_symbol}\n"
                 f"🔗 TX ID: `{tx_id}`\n\n"
                 f"⏳ **Status: Pending**\n"
+                f"Any part of the network fee estimate the transaction didn't use is refunded.\n"
                 f"You'll receive a notification when confirmed.\n\n"
                 f"{get_powered_by_text()}",
                 parse_mode='Markdown'
@@ -486,36 +538,38 @@ class CommunityTipBot:
             return
         
         try:
-            # Process rain
-            rain_id = await self.wallet_manager.process_rain(user_id, coin_symbol, amount, active_users)
+            # Process rain; the rain and its recipients are recorded with the payout
+            rain = await self.wallet_manager.process_rain(user_id, coin_symbol, amount, active_users, chat_id)
             
-            # Record in database
-            self.db.record_rain(user_id, chat_id, coin_symbol, amount, len(active_users), rain_id)
-            
-            # Send confirmation
-            formatted_total = format_amount(amount, self.config['coins'][coin_symbol]['decimals'])
-            formatted_per_user = format_amount(amount_per_user, self.config['coins'][coin_symbol]['decimals'])
+            # Send confirmation, with the same exact split the recipients are told about
+            decimals = self.config['coins'][coin_symbol]['decimals']
+            formatted_total = format_amount(amount, decimals)
+            formatted_per_user = f"{format_amount(rain['base_share'], decimals)} {coin_symbol} each"
+            if rain['extra_unit_count']:
+                formatted_per_user += (f" (+{format_amount(rain['unit'], decimals)} to "
+                                       f"{rain['extra_unit_count']} users)")
             
             await update.message.reply_text(
                 f"🌧️ **Rain Started!**\n\n"
                 f"💰 {formatted_total} {coin_symbol} distributed\n"
-                f"👥 {len(active_users)} recipients\n"
-                f"💸 {formatted_per_user} {coin_symbol} each\n\n"
+                f"👥 {rain['recipient_count']} recipients\n"
+                f"💸 {formatted_per_user}\n\n"
                 f"Recipients will be notified!\n\n"
                 f"{get_powered_by_text()}",
                 parse_mode='Markdown'
             )
             
-            # Notify recipients
+            # Notify recipients of their exact share
             for user in active_users:
+                share = format_amount(rain['shares'][user['user_id']], self.config['coins'][coin_symbol]['decimals'])
                 try:
                     await context.bot.send_message(
                         chat_id=user['user_id'],
                         text=(
                             f"🌧️ **You caught some rain!**\n\n"
-                            f"💰 {formatted_per_user} {coin_symbol}\n"
+                            f"💰 {share} {coin_symbol}\n"
                             f"👤 From: @{update.effective_user.username or 'Anonymous'}\n\n"
-                            f"Use /claimtips to claim your rain!\n\n"
+                            f"It's already in your balance, see /balance.\n\n"
                             f"{get_powered_by_text()}"
                         ),
                         parse_mode='Markdown'
@@ -530,49 +584,6 @@ class CommunityTipBot:
                 f"{get_powered_by_text()}"
             )
     
-    async def claim_tips_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle /claimtips command"""
-        user_id = update.effective_user.id
-        
-        if not self.db.get_user(user_id):
-            await update.message.reply_text(
-                "❌ Please use /start first to create your wallet!\n\n"
-                f"{get_powered_by_text()}"
-            )
-            return
-        
-        # Get unclaimed tips
-        unclaimed_tips = self.db.get_unclaimed_tips(user_id)
-        
-        if not unclaimed_tips:
-            await update.message.reply_text(
-                "ℹ️ You have no unclaimed tips.\n\n"
-                f"{get_powered_by_text()}"
-            )
-            return
-        
-        # Mark tips as claimed
-        claimed_count = self.db.claim_tips(user_id)
-        
-        # Calculate totals by coin
-        coin_totals = {}
-        for tip in unclaimed_tips:
-            coin = tip['coin_symbol']
-            amount = tip['amount']
-            coin_totals[coin] = coin_totals.get(coin, 0) + amount
-        
-        claim_text = f"✅ **Tips Claimed!**\n\n"
-        claim_text += f"📦 **{claimed_count} tips claimed:**\n\n"
-        
-        for coin, total in coin_totals.items():
-            decimals = self.config['coins'][coin]['decimals']
-            formatted_total = format_amount(total, decimals)
-            claim_text += f"• **{coin}:** {formatted_total}\n"
-        
-        claim_text += f"\n💰 Your balance has been updated!\n\n{get_powered_by_text()}"
-        
-        await update.message.reply_text(claim_text, parse_mode='Markdown')
-    
     async def history_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /history command"""
         user_id = update.effective_user.id
@@ -635,21 +646,20 @@ class CommunityTipBot:
             
             backup_text = (
                 f"💾 **Wallet Backup Created**\n\n"
-                f"🔐 **Encrypted backup data:**\n"
-                f"`{backup_data['encrypted_data'][:100]}...`\n\n"
                 f"💰 **Coins backed up:** {', '.join(backup_data['coins_backed_up'])}\n\n"
                 f"⚠️ **IMPORTANT:**\n"
-                f"• Save this backup data securely\n"
-                f"• You'll need it to restore your wallet\n"
+                f"• Save this file securely\n"
+                f"• To restore, reply to it with /restore\n"
                 f"• Keep it private and secure\n\n"
                 f"{get_powered_by_text()}"
             )
             
-            await update.message.reply_text(backup_text, parse_mode='Markdown')
-            
-            # Send full backup data in a separate message
-            await update.message.reply_text(
-                f"🔐 **Full Backup Data:**\n`{backup_data['encrypted_data']}`",
+            # Send the encrypted backup as a file rather than pasting it into the chat
+            backup_file = BytesIO(backup_data['encrypted_data'].encode())
+            await update.message.reply_document(
+                document=backup_file,
+                filename=f"tipbot_backup_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                caption=backup_text,
                 parse_mode='Markdown'
             )
             
@@ -660,6 +670,90 @@ class CommunityTipBot:
                 f"{get_powered_by_text()}"
             )
     
+    async def restore_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /restore command"""
+        user_id = update.effective_user.id
+        
+        if not self.config['features']['backup']:
+            await update.message.reply_text(
+                "❌ Backup feature is currently disabled.\n\n"
+                f"{get_powered_by_text()}"
+            )
+            return
+        
+        if not self.db.get_user(user_id):
+            await update.message.reply_text(
+                "❌ Please use /start first to create your wallet!\n\n"
+                f"{get_powered_by_text()}"
+            )
+            return
+        
+        # A reply to a backup file restores from that file
+        backup = context.args[0] if context.args else None
+        replied = update.message.reply_to_message
+        if backup is None and replied and replied.document:
+            try:
+                backup_file = await replied.document.get_file()
+                backup = (await backup_file.download_as_bytearray()).decode()
+            except Exception as e:
+                logger.error(f"Failed to download backup file for user {user_id}: {e}")
+        
+        # Without backup data, report on the last restore
+        if not backup:
+            job = self.wallet_manager.get_restore_status(user_id)
+            if not job:
+                await update.message.reply_text(
+                    "❌ Usage: /restore <backup data>\n\n"
+                    "Reply with /restore to the backup file from /backup, or paste its contents.\n\n"
+                    f"{get_powered_by_text()}"
+                )
+                return
+            
+            # Jobs are queued, running, done or failed; each coin is queued, importing, rescanning, done or failed
+            state_icons = {'queued': '⏳', 'running': '🔄', 'importing': '🔑', 'rescanning': '🔍',
+                           'done': '✅', 'failed': '❌'}
+            status_text = f"{state_icons.get(job['state'], '♻️')} **Wallet Restore: {job['state'].title()}**\n\n"
+            if job['position']:
+                status_text += f"📋 Position in queue: {job['position']}\n\n"
+            for coin_symbol, state in job['coins'].items():
+                status_text += f"{state_icons.get(state, '•')} {coin_symbol}: {state}\n"
+            if 'rescanning' in job['coins'].values():
+                status_text += "\nRescanning the blockchain can take several minutes.\n"
+            if job['state'] in ('queued', 'running'):
+                status_text += ("\nRestores in progress are lost if the bot restarts; "
+                                "send /restore again if this disappears.\n")
+            status_text += f"\n{get_powered_by_text()}"
+            
+            await update.message.reply_text(status_text, parse_mode='Markdown')
+            return
+        
+        try:
+            result = await self.wallet_manager.restore_wallet(user_id, backup)
+            
+            await update.message.reply_text(
+                f"♻️ **Wallet Restore Queued**\n\n"
+                f"💰 **Coins:** {', '.join(result['queued_coins']) or 'none'}\n"
+                f"📋 **Position in queue:** {result['position']}\n\n"
+                f"Your keys are imported in the background. Use /restore to check progress.\n"
+                f"If the bot restarts before it finishes, the restore is lost and needs to be sent again.\n\n"
+                f"{get_powered_by_text()}",
+                parse_mode='Markdown'
+            )
+            
+            # Pasted backup data contains private keys, so don't leave it in the chat
+            if context.args:
+                try:
+                    await update.message.delete()
+                except Exception:
+                    pass
+        
+        except Exception as e:
+            logger.error(f"Failed to restore wallet for user {user_id}: {e}")
+            await update.message.reply_text(
+                f"❌ Failed to restore wallet. Check your backup data and try again.\n\n"
+                f"{get_powered_by_text()}"
+            )
+    
     async def top_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /top command"""
         try:
@@ -705,13 +799,21 @@ class CommunityTipBot:
             if self.config['coins'][coin_symbol]['enabled']:
                 coin_config = self.config['coins'][coin_symbol]
                 withdrawal_fee = coin_config['withdrawal_fee']
-                network_fee = coin_config['network_fee']
+                
+                # Served from the fee cache; never waits on the daemon
+                estimate = self.coin_interface.get_fee_estimate(coin_symbol)
+                network_fee = format_amount(estimate['network_fee'], coin_config['decimals'])
                 
                 fees_text += (
                     f"**{coin_symbol}:**\n"
                     f"• Withdrawal Fee: {withdrawal_fee} {coin_symbol}\n"
-                    f"• Network Fee: {network_fee} {coin_symbol}\n\n"
+                    f"• Network Fee: ~{network_fee} {coin_symbol}\n"
                 )
+                if estimate['fee_rate'] is not None:
+                    fee_rate = format_amount(estimate['fee_rate'], coin_config['decimals'])
+                    age_note = "" if estimate['source'] == 'live' else " (last known)"
+                    fees_text += f"• Fee Rate: {fee_rate} {coin_symbol}/kB{age_note}\n"
+                fees_text += "\n"
         
         fees_text += f"{get_powered_by_text()}"
         
@@ -817,9 +919,9 @@ class CommunityTipBot:
         self.application.add_handler(CommandHandler("tip", self.tip_command))
         self.application.add_handler(CommandHandler("withdraw", self.withdraw_command))
         self.application.add_handler(CommandHandler("rain", self.rain_command))
-        self.application.add_handler(CommandHandler("claimtips", self.claim_tips_command))
         self.application.add_handler(CommandHandler("history", self.history_command))
         self.application.add_handler(CommandHandler("backup", self.backup_command))
+        self.application.add_handler(CommandHandler("restore", self.restore_command))
         self.application.add_handler(CommandHandler("top", self.top_command))
         self.application.add_handler(CommandHandler("fees", self.fees_command))
         self.application.add_handler(CommandHandler("airdrop", self.airdrop_command))
@@ -841,6 +943,10 @@ class CommunityTipBot:
             # Initialize database
             await self.db.initialize()
             
+            # Carry daemon account balances into the ledger; the monitor retries unreachable coins
+            self.ledger.initialize()
+            await self.ledger.open_coins(self.coin_interface)
+            
             # Create application
             self.application = Application.builder().token(self.config['bot']['token']).build()
             
@@ -850,6 +956,24 @@ class CommunityTipBot:
             # Start transaction monitor
             await self.transaction_monitor.start()
             
+            # Let the daemons' walletnotify/blocknotify wake the monitor, if enabled
+            self.notify_listener.start()
+            
+            # Keep daemon health current for fast-failing commands and the dashboard
+            self.coin_interface.start_health_monitor()
+            
+            # Keep pre-generated deposit addresses topped up
+            self.address_pool.start()
+            
+            # Pay queued withdrawals in batches, if enabled
+            self.withdrawal_batcher.start()
+            
+            # Sweep small hot wallet outputs together when fees are low, if enabled
+            self.utxo_consolidator.start()
+            
+            # Check user balances against the wallets for /stats and the dashboard
+            self.reconciler.start()
+            
             logger.info("Community Tipbot starting...")
             
             # Start the bot
@@ -1,24 +1,449 @@
 #!/usr/bin/env python3
 """
-Coin Interface - Handles CLI interactions with different cryptocurrencies
+Coin Interface - Handles RPC and CLI interactions with different cryptocurrencies
 Powered By Aegisum EcoSystem
 """
 
 import asyncio
+import bisect
 import json
 import logging
 import subprocess
-from typing import Dict, List, Optional, Any
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from rpc_client import JsonRpcClient, RPCError, RPCConnectError, RPCTransportError
+from daemon_scheduler import DaemonScheduler, Priority
+from daemon_health import DaemonHealth
+from fee_cache import FeeCache
 
 logger = logging.getLogger(__name__)
 
+# Methods whose CLI output is a bare string and must not be parsed as JSON
+STRING_RESULT_METHODS = frozenset([
+    'getnewaddress', 'getaccountaddress', 'sendfrom', 'sendtoaddress',
+    'sendmany', 'dumpprivkey', 'getbestblockhash', 'getblockhash',
+    'getrawchangeaddress', 'createrawtransaction', 'sendrawtransaction',
+])
+
+# Read-only methods whose concurrent identical calls share one request
+COALESCED_METHODS = frozenset([
+    'getbalance', 'getblockcount', 'getblockchaininfo', 'getbestblockhash',
+    'estimatefee', 'estimatesmartfee',
+])
+
+# Methods that move funds; they are scheduled ahead of everything else
+SEND_METHODS = frozenset(['sendfrom', 'sendtoaddress', 'sendmany', 'move', 'sendrawtransaction'])
+
+# Methods that may legitimately run for minutes (key imports, rescans, backups)
+MAINTENANCE_METHODS = frozenset([
+    'importprivkey', 'importaddress', 'importmulti', 'importwallet',
+    'rescanblockchain', 'backupwallet', 'dumpwallet',
+])
+
+# Default deadline in seconds for each method class
+DEFAULT_TIMEOUTS = {'read': 10.0, 'send': 60.0, 'maintenance': 600.0}
+
+# CLI stderr when the daemon itself could not be reached
+CLI_CONNECT_ERRORS = ("couldn't connect to server", "could not connect to the server")
+
+# RPC error code while the daemon is still loading
+RPC_IN_WARMUP = -28
+
+# RPC error code for methods the daemon does not have
+RPC_METHOD_NOT_FOUND = -32601
+
+# Upper bounds in milliseconds of the daemon call latency histogram buckets
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+class DaemonError(Exception):
+    """A coin daemon could not be used for a call"""
+
+class DaemonUnavailableError(DaemonError):
+    """The coin's circuit is open, so the call was not attempted"""
+    
+    def __init__(self, coin_symbol: str):
+        super().__init__(f"{coin_symbol} daemon is unavailable")
+        self.coin_symbol = coin_symbol
+
+class DaemonTimeoutError(DaemonError):
+    """A daemon call did not finish before its deadline"""
+    
+    def __init__(self, coin_symbol: str, method: str, timeout: float):
+        super().__init__(f"{coin_symbol} {method} timed out after {timeout:g}s")
+        self.coin_symbol = coin_symbol
+        self.method = method
+        self.timeout = timeout
+
+def method_class(method: str) -> str:
+    """Deadline class of a daemon method: read, send or maintenance"""
+    if method in SEND_METHODS:
+        return 'send'
+    if method in MAINTENANCE_METHODS:
+        return 'maintenance'
+    return 'read'
+
+def is_method_missing(result: Dict[str, Any]) -> bool:
+    """Whether a failed call result means the daemon does not know the method"""
+    if result.get('code') == RPC_METHOD_NOT_FOUND:
+        return True
+    return 'method not found' in (result.get('error') or '').lower()
+
+def get_call_timeout(config: dict, method: str) -> float:
+    """Deadline for a daemon method from the ``daemon.timeouts`` config"""
+    timeouts = config.get('daemon', {}).get('timeouts', {})
+    method_type = method_class(method)
+    return float(timeouts.get(method_type, DEFAULT_TIMEOUTS[method_type]))
+
+async def run_cli_command(coin_symbol: str, method: str, command: List[str],
+                          timeout: float) -> Tuple[int, bytes, bytes]:
+    """Run a coin CLI command, killing it if it outlives its deadline"""
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        _kill_process(process)
+        await process.wait()
+        raise DaemonTimeoutError(coin_symbol, method, timeout) from None
+    except asyncio.CancelledError:
+        # The caller's own deadline expired; do not leave the CLI running
+        _kill_process(process)
+        raise
+    
+    return process.returncode, stdout, stderr
+
+def _kill_process(process: asyncio.subprocess.Process):
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+class SingleFlight:
+    """Share one in-flight call between concurrent identical requests"""
+    
+    def __init__(self):
+        self._inflight: Dict[Any, asyncio.Future] = {}
+        self.shared_calls = 0
+    
+    async def do(self, key: Any, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func() for key, or join the call already running for key"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        else:
+            self.shared_calls += 1
+        
+        # Shield so one caller giving up does not cancel the call for the others
+        return await asyncio.shield(future)
+    
+    def _forget(self, key: Any, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+class LatencyHistogram:
+    """Bucketed latency of one kind of daemon call, with error and timeout counts"""
+    
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def observe(self, elapsed_ms: float, outcome: str = 'ok'):
+        """Record one call that took elapsed_ms and ended ok, in error or timed out"""
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        
+        if outcome == 'error':
+            self.errors += 1
+        elif outcome == 'timeout':
+            self.timeouts += 1
+    
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls"""
+        if not self.calls:
+            return 0.0
+        
+        rank = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return round(min(bound, self.max_ms), 2)
+        return round(self.max_ms, 2)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Call counts, latency percentiles and raw buckets"""
+        buckets = {f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets['le_inf'] = self.counts[-1]
+        
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'avg_ms': round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 2),
+            'buckets': buckets
+        }
+
 class CoinInterface:
     def __init__(self, config: dict):
         self.config = config
         self.supported_coins = {
-            coin: details for coin, details in config['coins'].items() 
+            coin: details for coin, details in config['coins'].items()
             if details.get('enabled', False)
         }
+        
+        # Daemon transport settings
+        daemon_config = config.get('daemon', {})
+        self.transport = daemon_config.get('transport', 'rpc')
+        self.pool_size = daemon_config.get('pool_size', 4)
+        self.idle_timeout = daemon_config.get('idle_timeout', 15)
+        self.timeouts = {**DEFAULT_TIMEOUTS, **daemon_config.get('timeouts', {})}
+        
+        # One pooled JSON-RPC client per coin, created lazily
+        self.rpc_clients: Dict[str, JsonRpcClient] = {}
+        
+        # Coalesces identical read-only calls that are in flight together
+        self.inflight = SingleFlight()
+        
+        # Caps concurrent calls per daemon and orders waiting calls by priority
+        self.scheduler = DaemonScheduler(config)
+        
+        # Circuit breaker and last known health per daemon
+        self.health = DaemonHealth(config)
+        self.health_task: Optional[asyncio.Task] = None
+        
+        # Fee estimates, refreshed by the health monitor on new blocks
+        self.fees = FeeCache(config)
+        
+        # Latency of every daemon call, per coin and method
+        self.latency: Dict[str, Dict[str, LatencyHistogram]] = {coin: {} for coin in self.supported_coins}
+    
+    def _get_rpc_client(self, coin_symbol: str) -> Optional[JsonRpcClient]:
+        """Get the pooled RPC client for a coin, if RPC is configured"""
+        if self.transport != 'rpc':
+            return None
+        
+        client = self.rpc_clients.get(coin_symbol)
+        if client is None:
+            coin_config = self.supported_coins[coin_symbol]
+            if not coin_config.get('rpc_port') or not coin_config.get('rpc_user'):
+                return None
+            
+            # Never let the pool, rather than the scheduler, be the bottleneck
+            pool_size = max(self.pool_size, self.scheduler.schedulers[coin_symbol].max_concurrent)
+            client = JsonRpcClient(coin_symbol, coin_config, pool_size, self.idle_timeout)
+            self.rpc_clients[coin_symbol] = client
+        
+        return client
+    
+    def call_timeout(self, method: str) -> float:
+        """Deadline in seconds for one call of a daemon method"""
+        return float(self.timeouts[method_class(method)])
+    
+    async def call(self, coin_symbol: str, method: str, params: List[Any] = None,
+                   priority: Optional[Priority] = None) -> Dict[str, Any]:
+        """Call a daemon method over JSON-RPC, falling back to the CLI
+        
+        Raises DaemonTimeoutError when the call, including any wait for a
+        scheduler slot, does not finish within the method's deadline, and
+        DaemonUnavailableError without calling when the coin's circuit is open.
+        """
+        params = list(params or [])
+        
+        if coin_symbol not in self.supported_coins:
+            return {'success': False, 'result': None, 'error': f"Unsupported coin: {coin_symbol}"}
+        
+        if priority is None:
+            priority = Priority.SEND if method in SEND_METHODS else Priority.USER
+        
+        if method in COALESCED_METHODS:
+            key = (coin_symbol, method, json.dumps(params))
+            return await self.inflight.do(key, lambda: self._call(coin_symbol, method, params, priority))
+        
+        return await self._call(coin_symbol, method, params, priority)
+    
+    async def _call(self, coin_symbol: str, method: str, params: List[Any], priority: Priority) -> Dict[str, Any]:
+        """Run one daemon call without coalescing, under its deadline"""
+        if not self.health.allow(coin_symbol):
+            raise DaemonUnavailableError(coin_symbol)
+        
+        timeout = self.call_timeout(method)
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self._scheduled(coin_symbol, method, params, priority), timeout)
+        except asyncio.TimeoutError:
+            self._observe(coin_symbol, method, started, 'timeout')
+            self.health.record_failure(coin_symbol, f"{method} timed out")
+            if method in SEND_METHODS:
+                logger.error(f"{coin_symbol} {method} timed out; the daemon may still have applied it")
+            else:
+                logger.warning(f"{coin_symbol} {method} timed out after {timeout:g}s")
+            raise DaemonTimeoutError(coin_symbol, method, timeout) from None
+        
+        self._observe(coin_symbol, method, started, 'ok' if result['success'] else 'error')
+        return result
+    
+    def _observe(self, coin_symbol: str, method: str, started: float, outcome: str):
+        """Add a finished call to the latency histogram"""
+        histogram = self.latency[coin_symbol].get(method)
+        if histogram is None:
+            histogram = self.latency[coin_symbol][method] = LatencyHistogram()
+        histogram.observe((time.monotonic() - started) * 1000, outcome)
+    
+    async def _scheduled(self, coin_symbol: str, method: str, params: List[Any], priority: Priority) -> Dict[str, Any]:
+        """Wait for a scheduler slot, then dispatch the call"""
+        async with self.scheduler.slot(coin_symbol, priority):
+            return await self._dispatch(coin_symbol, method, params)
+    
+    async def _dispatch(self, coin_symbol: str, method: str, params: List[Any]) -> Dict[str, Any]:
+        """Send a call over RPC, or the CLI when RPC is unavailable"""
+        client = self._get_rpc_client(coin_symbol)
+        if client:
+            try:
+                result = await client.call(method, params)
+                self.health.record_success(coin_symbol)
+                return {'success': True, 'result': result, 'error': None}
+            except RPCError as e:
+                self._record_rpc_error(coin_symbol, e)
+                logger.error(f"RPC {method} failed for {coin_symbol}: {e.message}")
+                return {'success': False, 'result': None, 'error': e.message, 'code': e.code}
+            except RPCConnectError as e:
+                logger.warning(f"RPC unavailable for {coin_symbol}, using CLI: {e}")
+            except RPCTransportError as e:
+                # The request may have reached the daemon; do not repeat it via the CLI
+                self.health.record_failure(coin_symbol, str(e))
+                logger.error(f"RPC {method} failed for {coin_symbol}: {e}")
+                return {'success': False, 'result': None, 'error': str(e)}
+        
+        return await self._call_cli(coin_symbol, method, params)
+    
+    async def batch(self, coin_symbol: str, calls: List[Tuple[str, List[Any]]],
+                    priority: Priority = Priority.USER) -> List[Dict[str, Any]]:
+        """Send many calls to one daemon in a single JSON-RPC batch
+        
+        Returns one result dict per call, in the same order as ``calls``.
+        The batch gets the longest deadline of the methods it contains.
+        """
+        calls = [(method, list(params or [])) for method, params in calls]
+        
+        if coin_symbol not in self.supported_coins:
+            error = f"Unsupported coin: {coin_symbol}"
+            return [{'success': False, 'result': None, 'error': error} for _ in calls]
+        
+        if not calls:
+            return []
+        
+        if not self.health.allow(coin_symbol):
+            raise DaemonUnavailableError(coin_symbol)
+        
+        timeout = max(self.call_timeout(method) for method, _ in calls)
+        started = time.monotonic()
+        try:
+            results = await asyncio.wait_for(self._scheduled_batch(coin_symbol, calls, priority), timeout)
+        except asyncio.TimeoutError:
+            self._observe(coin_symbol, 'batch', started, 'timeout')
+            self.health.record_failure(coin_symbol, "batch timed out")
+            logger.warning(f"{coin_symbol} batch of {len(calls)} calls timed out after {timeout:g}s")
+            raise DaemonTimeoutError(coin_symbol, 'batch', timeout) from None
+        
+        self._observe(coin_symbol, 'batch', started, 'ok' if all(r['success'] for r in results) else 'error')
+        return results
+    
+    async def _scheduled_batch(self, coin_symbol: str, calls: List[Tuple[str, List[Any]]],
+                               priority: Priority) -> List[Dict[str, Any]]:
+        """Wait for a scheduler slot, then dispatch the batch"""
+        async with self.scheduler.slot(coin_symbol, priority):
+            return await self._dispatch_batch(coin_symbol, calls)
+    
+    async def _dispatch_batch(self, coin_symbol: str, calls: List[Tuple[str, List[Any]]]) -> List[Dict[str, Any]]:
+        """Send a batch over RPC, or call by call through the CLI"""
+        client = self._get_rpc_client(coin_symbol)
+        if client:
+            try:
+                results = await client.batch(calls)
+                self.health.record_success(coin_symbol)
+                return [
+                    {'success': False, 'result': None, 'error': r.message, 'code': r.code}
+                    if isinstance(r, RPCError) else
+                    {'success': True, 'result': r, 'error': None}
+                    for r in results
+                ]
+            except RPCError as e:
+                self._record_rpc_error(coin_symbol, e)
+                logger.error(f"RPC batch failed for {coin_symbol}: {e.message}")
+                return [{'success': False, 'result': None, 'error': e.message, 'code': e.code} for _ in calls]
+            except RPCConnectError as e:
+                logger.warning(f"RPC unavailable for {coin_symbol}, using CLI: {e}")
+            except RPCTransportError as e:
+                self.health.record_failure(coin_symbol, str(e))
+                logger.error(f"RPC batch failed for {coin_symbol}: {e}")
+                return [{'success': False, 'result': None, 'error': str(e)} for _ in calls]
+        
+        return [await self._call_cli(coin_symbol, method, params) for method, params in calls]
+    
+    def _record_rpc_error(self, coin_symbol: str, error: RPCError):
+        """An RPC error means the daemon answered, unless it is still warming up"""
+        if error.code == RPC_IN_WARMUP:
+            self.health.record_failure(coin_symbol, error.message)
+        else:
+            self.health.record_success(coin_symbol)
+    
+    async def _call_cli(self, coin_symbol: str, method: str, params: List[Any]) -> Dict[str, Any]:
+        """Run a daemon method through the coin's CLI"""
+        command = [method] + [self._to_cli_arg(param) for param in params]
+        result = await self.execute_cli_command(coin_symbol, command)
+        
+        if result['success']:
+            self.health.record_success(coin_symbol)
+        else:
+            # A failed spawn or a connection error means the daemon is unreachable
+            stderr = result.get('stderr', '').lower()
+            if 'error' in result or any(marker in stderr for marker in CLI_CONNECT_ERRORS):
+                self.health.record_failure(coin_symbol, result.get('stderr') or result['error'])
+            else:
+                self.health.record_success(coin_symbol)
+            
+            return {
+                'success': False,
+                'result': None,
+                'error': result.get('stderr') or result.get('error', 'Unknown error')
+            }
+        
+        return {'success': True, 'result': self._parse_cli_output(method, result['stdout']), 'error': None}
+    
+    def _to_cli_arg(self, param: Any) -> str:
+        """Convert an RPC parameter to its CLI argument form"""
+        if isinstance(param, str):
+            return param
+        if isinstance(param, bool):
+            return 'true' if param else 'false'
+        return json.dumps(param)
+    
+    def _parse_cli_output(self, method: str, output: str) -> Any:
+        """Parse CLI stdout into the value the RPC call would have returned"""
+        if method in STRING_RESULT_METHODS:
+            return output
+        
+        try:
+            return json.loads(output)
+        except json.JSONDecodeError:
+            return output
     
     async def execute_cli_command(self, coin_symbol: str, command: List[str]) -> Dict[str, Any]:
         """Execute a CLI command for a specific coin"""
@@ -35,17 +460,14 @@ class CoinInterface:
             logger.debug(f"Executing command: {' '.join(full_command)}")
             
             # Execute command
-            process = await asyncio.create_subprocess_exec(
-                *full_command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            method = command[0] if command else ''
+            returncode, stdout, stderr = await run_cli_command(
+                coin_symbol, method, full_command, self.call_timeout(method)
             )
             
-            stdout, stderr = await process.communicate()
-            
             result = {
-                'success': process.returncode == 0,
-                'returncode': process.returncode,
+                'success': returncode == 0,
+                'returncode': returncode,
                 'stdout': stdout.decode().strip(),
                 'stderr': stderr.decode().strip(),
                 'command': ' '.join(full_command)
@@ -55,7 +477,9 @@ class CoinInterface:
                 logger.error(f"CLI command failed: {result['stderr']}")
             
             return result
-            
+        
+        except DaemonTimeoutError:
+            raise
         except Exception as e:
             logger.error(f"Failed to execute CLI command for {coin_symbol}: {e}")
             return {
@@ -64,297 +488,370 @@ class CoinInterface:
                 'command': ' '.join(command) if command else 'unknown'
             }
     
-    async def get_wallet_info(self, coin_symbol: str) -> Dict[str, Any]:
-        """Get wallet information"""
-        result = await self.execute_cli_command(coin_symbol, ['getwalletinfo'])
-        
+    async def close(self):
+        """Stop the health monitor and close all pooled daemon connections"""
+        if self.health_task is not None:
+            self.health_task.cancel()
+            self.health_task = None
+        
+        for client in self.rpc_clients.values():
+            await client.close()
+        self.rpc_clients.clear()
+    
+    def _as_dict(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a call result the way the info getters return it"""
         if result['success']:
-            try:
-                return json.loads(result['stdout'])
-            except json.JSONDecodeError:
-                # Some wallets might return plain text
-                return {'raw_output': result['stdout']}
+            if isinstance(result['result'], dict):
+                return result['result']
+            # Some wallets might return plain text
+            return {'raw_output': result['result']}
         
-        return {'error': result.get('stderr', 'Unknown error')}
+        return {'error': result['error'] or 'Unknown error'}
+    
+    async def get_wallet_info(self, coin_symbol: str) -> Dict[str, Any]:
+        """Get wallet information"""
+        return self._as_dict(await self.call(coin_symbol, 'getwalletinfo'))
     
     async def get_blockchain_info(self, coin_symbol: str) -> Dict[str, Any]:
         """Get blockchain information"""
-        result = await self.execute_cli_command(coin_symbol, ['getblockchaininfo'])
-        
-        if result['success']:
-            try:
-                return json.loads(result['stdout'])
-            except json.JSONDecodeError:
-                return {'raw_output': result['stdout']}
-        
-        return {'error': result.get('stderr', 'Unknown error')}
+        return self._as_dict(await self.call(coin_symbol, 'getblockchaininfo'))
     
     async def get_new_address(self, coin_symbol: str, account: str = "") -> Optional[str]:
         """Generate a new address"""
-        command = ['getnewaddress']
-        if account:
-            command.append(account)
+        params = [account] if account else []
         
-        result = await self.execute_cli_command(coin_symbol, command)
+        result = await self.call(coin_symbol, 'getnewaddress', params)
         
         if result['success']:
-            return result['stdout']
+            return result['result']
         
-        logger.error(f"Failed to generate new address for {coin_symbol}: {result.get('stderr')}")
+        logger.error(f"Failed to generate new address for {coin_symbol}: {result['error']}")
         return None
     
     async def get_balance(self, coin_symbol: str, account: str = "", min_confirmations: int = 1) -> float:
         """Get balance for an account"""
-        command = ['getbalance']
+        params = []
         if account:
-            command.append(account)
+            params.append(account)
         if min_confirmations != 1:
-            command.append(str(min_confirmations))
+            params.append(min_confirmations)
         
-        result = await self.execute_cli_command(coin_symbol, command)
+        result = await self.call(coin_symbol, 'getbalance', params)
         
         if result['success']:
             try:
-                return float(result['stdout'])
-            except ValueError:
-                logger.error(f"Invalid balance format for {coin_symbol}: {result['stdout']}")
+                return float(result['result'])
+            except (TypeError, ValueError):
+                logger.error(f"Invalid balance format for {coin_symbol}: {result['result']}")
                 return 0.0
         
         # If account doesn't exist, return 0
-        if "Account does not exist" in result.get('stderr', ''):
+        if "Account does not exist" in (result['error'] or ''):
             return 0.0
         
-        logger.error(f"Failed to get balance for {coin_symbol}: {result.get('stderr')}")
+        logger.error(f"Failed to get balance for {coin_symbol}: {result['error']}")
         return 0.0
     
     async def send_to_address(self, coin_symbol: str, address: str, amount: float, comment: str = "") -> Optional[str]:
         """Send coins to an address"""
-        command = ['sendtoaddress', address, str(amount)]
+        params = [address, amount]
         if comment:
-            command.append(comment)
+            params.append(comment)
         
-        result = await self.execute_cli_command(coin_symbol, command)
+        result = await self.call(coin_symbol, 'sendtoaddress', params)
         
         if result['success']:
-            return result['stdout']  # Transaction ID
+            return result['result']  # Transaction ID
         
-        logger.error(f"Failed to send {coin_symbol} to {address}: {result.get('stderr')}")
+        logger.error(f"Failed to send {coin_symbol} to {address}: {result['error']}")
         return None
     
     async def send_from_account(self, coin_symbol: str, from_account: str, to_address: str, amount: float, comment: str = "") -> Optional[str]:
         """Send coins from a specific account"""
-        command = ['sendfrom', from_account, to_address, str(amount)]
+        params = [from_account, to_address, amount]
         if comment:
-            command.append(comment)
+            params.extend([1, comment])
         
-        result = await self.execute_cli_command(coin_symbol, command)
+        result = await self.call(coin_symbol, 'sendfrom', params)
         
         if result['success']:
-            return result['stdout']  # Transaction ID
+            return result['result']  # Transaction ID
         
-        logger.error(f"Failed to send {coin_symbol} from {from_account}: {result.get('stderr')}")
+        logger.error(f"Failed to send {coin_symbol} from {from_account}: {result['error']}")
         return None
     
     async def move_coins(self, coin_symbol: str, from_account: str, to_account: str, amount: float, comment: str = "") -> bool:
         """Move coins between accounts (internal transfer)"""
-        command = ['move', from_account, to_account, str(amount)]
+        params = [from_account, to_account, amount]
         if comment:
-            command.append(comment)
+            params.extend([1, comment])
         
-        result = await self.execute_cli_command(coin_symbol, command)
+        result = await self.call(coin_symbol, 'move', params)
         
         if result['success']:
-            return result['stdout'].lower() == 'true'
+            return result['result'] is True or str(result['result']).lower() == 'true'
         
-        logger.error(f"Failed to move {coin_symbol} from {from_account} to {to_account}: {result.get('stderr')}")
+        logger.error(f"Failed to move {coin_symbol} from {from_account} to {to_account}: {result['error']}")
         return False
     
     async def get_transaction(self, coin_symbol: str, tx_id: str) -> Dict[str, Any]:
         """Get transaction details"""
-        result = await self.execute_cli_command(coin_symbol, ['gettransaction', tx_id])
-        
-        if result['success']:
-            try:
-                return json.loads(result['stdout'])
-            except json.JSONDecodeError:
-                return {'raw_output': result['stdout']}
-        
-        return {'error': result.get('stderr', 'Unknown error')}
+        return self._as_dict(await self.call(coin_symbol, 'gettransaction', [tx_id]))
+    
+    async def get_transaction_fee(self, coin_symbol: str, tx_id: str) -> Optional[float]:
+        """Network fee a sent wallet transaction paid, or None if it cannot be read"""
+        # The transaction is already sent, so a daemon error here must not fail the caller
+        try:
+            result = await self.call(coin_symbol, 'gettransaction', [tx_id], Priority.SEND)
+        except DaemonError as e:
+            result = {'success': False, 'result': None, 'error': str(e)}
+        
+        if not result['success'] or 'fee' not in (result['result'] or {}):
+            logger.warning(f"Could not read the fee of {coin_symbol} transaction {tx_id}: {result['error']}")
+            return None
+        return -result['result']['fee']
     
     async def list_transactions(self, coin_symbol: str, account: str = "", count: int = 10, skip: int = 0) -> List[Dict[str, Any]]:
         """List transactions for an account"""
-        command = ['listtransactions']
-        if account:
-            command.append(account)
-        command.extend([str(count), str(skip)])
+        params = [account or '*', count, skip]
         
-        result = await self.execute_cli_command(coin_symbol, command)
+        result = await self.call(coin_symbol, 'listtransactions', params)
         
         if result['success']:
-            try:
-                return json.loads(result['stdout'])
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON response for listtransactions: {result['stdout']}")
-                return []
+            if isinstance(result['result'], list):
+                return result['result']
+            logger.error(f"Invalid JSON response for listtransactions: {result['result']}")
+            return []
         
         # If account doesn't exist, return empty list
-        if "Account does not exist" in result.get('stderr', ''):
+        if "Account does not exist" in (result['error'] or ''):
             return []
         
-        logger.error(f"Failed to list transactions for {coin_symbol}: {result.get('stderr')}")
+        logger.error(f"Failed to list transactions for {coin_symbol}: {result['error']}")
         return []
     
     async def list_unspent(self, coin_symbol: str, min_confirmations: int = 1, max_confirmations: int = 9999999, addresses: List[str] = None) -> List[Dict[str, Any]]:
         """List unspent transaction outputs"""
-        command = ['listunspent', str(min_confirmations), str(max_confirmations)]
+        params = [min_confirmations, max_confirmations]
         if addresses:
-            command.append(json.dumps(addresses))
+            params.append(addresses)
         
-        result = await self.execute_cli_command(coin_symbol, command)
+        result = await self.call(coin_symbol, 'listunspent', params)
         
         if result['success']:
-            try:
-                return json.loads(result['stdout'])
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON response for listunspent: {result['stdout']}")
-                return []
+            if isinstance(result['result'], list):
+                return result['result']
+            logger.error(f"Invalid JSON response for listunspent: {result['result']}")
+            return []
         
-        logger.error(f"Failed to list unspent for {coin_symbol}: {result.get('stderr')}")
+        logger.error(f"Failed to list unspent for {coin_symbol}: {result['error']}")
         return []
     
     async def validate_address(self, coin_symbol: str, address: str) -> Dict[str, Any]:
         """Validate an address"""
-        result = await self.execute_cli_command(coin_symbol, ['validateaddress', address])
-        
-        if result['success']:
-            try:
-                return json.loads(result['stdout'])
-            except json.JSONDecodeError:
-                return {'raw_output': result['stdout']}
-        
-        return {'error': result.get('stderr', 'Unknown error')}
+        return self._as_dict(await self.call(coin_symbol, 'validateaddress', [address]))
     
     async def import_private_key(self, coin_symbol: str, private_key: str, account: str = "", rescan: bool = True) -> bool:
         """Import a private key"""
-        command = ['importprivkey', private_key]
-        if account:
-            command.append(account)
-        command.append('true' if rescan else 'false')
+        params = [private_key, account, rescan]
         
-        result = await self.execute_cli_command(coin_symbol, command)
+        result = await self.call(coin_symbol, 'importprivkey', params)
         
         if result['success']:
             return True
         
-        logger.error(f"Failed to import private key for {coin_symbol}: {result.get('stderr')}")
+        logger.error(f"Failed to import private key for {coin_symbol}: {result['error']}")
         return False
     
     async def dump_private_key(self, coin_symbol: str, address: str) -> Optional[str]:
         """Export private key for an address"""
-        result = await self.execute_cli_command(coin_symbol, ['dumpprivkey', address])
+        result = await self.call(coin_symbol, 'dumpprivkey', [address])
         
         if result['success']:
-            return result['stdout']
+            return result['result']
         
-        logger.error(f"Failed to dump private key for {coin_symbol} address {address}: {result.get('stderr')}")
+        logger.error(f"Failed to dump private key for {coin_symbol} address {address}: {result['error']}")
         return None
     
     async def get_network_info(self, coin_symbol: str) -> Dict[str, Any]:
         """Get network information"""
-        result = await self.execute_cli_command(coin_symbol, ['getnetworkinfo'])
-        
-        if result['success']:
-            try:
-                return json.loads(result['stdout'])
-            except json.JSONDecodeError:
-                return {'raw_output': result['stdout']}
+        return self._as_dict(await self.call(coin_symbol, 'getnetworkinfo'))
+    
+    async def estimate_fee(self, coin_symbol: str, blocks: int = 6, priority: Priority = Priority.USER) -> float:
+        """Estimate transaction fee, from the fee cache when it is fresh"""
+        if blocks == self.fees.target_blocks:
+            fee_rate = self.fees.get_fee_rate(coin_symbol, fresh_only=True)
+            if fee_rate is not None:
+                return fee_rate
         
-        return {'error': result.get('stderr', 'Unknown error')}
+        try:
+            fee_rate = await self._fetch_fee_rate(coin_symbol, blocks, priority)
+        except DaemonError as e:
+            logger.warning(f"Fee estimate for {coin_symbol} unavailable: {e}")
+            fee_rate = None
+        
+        if fee_rate is not None:
+            if blocks == self.fees.target_blocks:
+                self.fees.update(coin_symbol, fee_rate, self.health.blocks.get(coin_symbol))
+            return fee_rate
+        
+        # Fall back to the last good estimate, then the configured network fee
+        fee_rate = self.fees.get_fee_rate(coin_symbol)
+        if fee_rate is not None:
+            return fee_rate
+        return self.supported_coins[coin_symbol].get('network_fee', 0.0001)
     
-    async def estimate_fee(self, coin_symbol: str, blocks: int = 6) -> float:
-        """Estimate transaction fee"""
+    async def _fetch_fee_rate(self, coin_symbol: str, blocks: int,
+                              priority: Priority = Priority.USER) -> Optional[float]:
+        """Ask the daemon for a fee rate, or None if it has no estimate"""
         # Try estimatefee first (newer wallets)
-        result = await self.execute_cli_command(coin_symbol, ['estimatefee', str(blocks)])
+        result = await self.call(coin_symbol, 'estimatefee', [blocks], priority)
         
         if result['success']:
             try:
-                fee = float(result['stdout'])
+                fee = float(result['result'])
                 if fee > 0:
                     return fee
-            except ValueError:
+            except (TypeError, ValueError):
                 pass
         
         # Fallback to estimatesmartfee (if available)
-        result = await self.execute_cli_command(coin_symbol, ['estimatesmartfee', str(blocks)])
+        result = await self.call(coin_symbol, 'estimatesmartfee', [blocks], priority)
         
-        if result['success']:
+        if result['success'] and isinstance(result['result'], dict):
             try:
-                fee_data = json.loads(result['stdout'])
-                if 'feerate' in fee_data:
-                    return float(fee_data['feerate'])
-            except (json.JSONDecodeError, ValueError):
+                if 'feerate' in result['result']:
+                    return float(result['result']['feerate'])
+            except (TypeError, ValueError):
                 pass
         
-        # Return default network fee from config
-        return self.supported_coins[coin_symbol].get('network_fee', 0.0001)
+        return None
+    
+    async def refresh_fee(self, coin_symbol: str):
+        """Update a coin's cached fee estimate, keeping the last good one on failure"""
+        try:
+            fee_rate = await self._fetch_fee_rate(coin_symbol, self.fees.target_blocks, Priority.BACKGROUND)
+            if fee_rate is not None:
+                self.fees.update(coin_symbol, fee_rate, self.health.blocks.get(coin_symbol))
+        except Exception as e:
+            logger.warning(f"Failed to refresh {coin_symbol} fee estimate: {e}")
+    
+    def get_fee_estimate(self, coin_symbol: str) -> Dict[str, Any]:
+        """Cached fee estimate for a coin, without calling the daemon"""
+        return self.fees.get(coin_symbol)
     
     async def send_many(self, coin_symbol: str, from_account: str, recipients: Dict[str, float], comment: str = "") -> Optional[str]:
         """Send to multiple addresses in one transaction"""
-        command = ['sendmany', from_account, json.dumps(recipients)]
+        params = [from_account, recipients]
         if comment:
-            command.append(comment)
+            params.extend([1, comment])
         
-        result = await self.execute_cli_command(coin_symbol, command)
+        result = await self.call(coin_symbol, 'sendmany', params)
         
         if result['success']:
-            return result['stdout']  # Transaction ID
+            return result['result']  # Transaction ID
         
-        logger.error(f"Failed to send many for {coin_symbol}: {result.get('stderr')}")
+        logger.error(f"Failed to send many for {coin_symbol}: {result['error']}")
         return None
     
     async def get_account_address(self, coin_symbol: str, account: str) -> Optional[str]:
         """Get the current address for an account"""
-        result = await self.execute_cli_command(coin_symbol, ['getaccountaddress', account])
+        result = await self.call(coin_symbol, 'getaccountaddress', [account])
         
         if result['success']:
-            return result['stdout']
+            return result['result']
         
-        logger.error(f"Failed to get account address for {coin_symbol}: {result.get('stderr')}")
+        logger.error(f"Failed to get account address for {coin_symbol}: {result['error']}")
         return None
     
     async def list_accounts(self, coin_symbol: str, min_confirmations: int = 1) -> Dict[str, float]:
         """List all accounts and their balances"""
-        result = await self.execute_cli_command(coin_symbol, ['listaccounts', str(min_confirmations)])
+        result = await self.call(coin_symbol, 'listaccounts', [min_confirmations])
         
         if result['success']:
-            try:
-                return json.loads(result['stdout'])
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON response for listaccounts: {result['stdout']}")
-                return {}
+            if isinstance(result['result'], dict):
+                return result['result']
+            logger.error(f"Invalid JSON response for listaccounts: {result['result']}")
+            return {}
         
-        logger.error(f"Failed to list accounts for {coin_symbol}: {result.get('stderr')}")
+        logger.error(f"Failed to list accounts for {coin_symbol}: {result['error']}")
         return {}
     
     async def backup_wallet(self, coin_symbol: str, destination: str) -> bool:
         """Backup wallet to file"""
-        result = await self.execute_cli_command(coin_symbol, ['backupwallet', destination])
+        result = await self.call(coin_symbol, 'backupwallet', [destination])
         
         if result['success']:
             return True
         
-        logger.error(f"Failed to backup wallet for {coin_symbol}: {result.get('stderr')}")
+        logger.error(f"Failed to backup wallet for {coin_symbol}: {result['error']}")
         return False
     
     async def check_daemon_status(self, coin_symbol: str) -> bool:
         """Check if the daemon is running and responsive"""
+        if self.health_task is not None:
+            # The health monitor keeps this current; no need to probe again
+            return self.health.is_available(coin_symbol)
+        
+        return await self._probe_daemon(coin_symbol)
+    
+    async def _probe_daemon(self, coin_symbol: str) -> bool:
+        """Ask a daemon for its block height to see whether it is responsive"""
         try:
-            result = await self.execute_cli_command(coin_symbol, ['getblockcount'])
+            result = await self.call(coin_symbol, 'getblockcount', priority=Priority.BACKGROUND)
+            if result['success']:
+                self.health.record_blocks(coin_symbol, result['result'])
             return result['success']
+        except DaemonUnavailableError:
+            return False
         except Exception as e:
             logger.error(f"Failed to check daemon status for {coin_symbol}: {e}")
             return False
     
+    async def refresh_health(self):
+        """Probe every daemon, save the health snapshot and refresh stale fee estimates"""
+        await asyncio.gather(*[self._probe_daemon(coin) for coin in self.supported_coins])
+        self.health.last_checked = time.time()
+        self.health.save_snapshot()
+        
+        # Fee estimates only change with new blocks, or age out after the TTL
+        await asyncio.gather(*[
+            self.refresh_fee(coin) for coin in self.supported_coins
+            if self.health.is_available(coin) and self.fees.needs_refresh(coin, self.health.blocks.get(coin))
+        ])
+    
+    def start_health_monitor(self):
+        """Refresh the daemon health snapshot in the background"""
+        if self.health_task is None:
+            self.health_task = asyncio.create_task(self._monitor_health())
+    
+    async def _monitor_health(self):
+        while True:
+            try:
+                await self.refresh_health()
+            except Exception as e:
+                logger.error(f"Error refreshing daemon health: {e}")
+            await asyncio.sleep(self.health.refresh_interval)
+    
+    def get_health_snapshot(self) -> Dict[str, Any]:
+        """Last known health of every daemon"""
+        return self.health.get_snapshot()
+    
+    def is_coin_available(self, coin_symbol: str) -> bool:
+        """Whether calls to a coin's daemon are currently going through"""
+        return self.health.is_available(coin_symbol)
+    
+    def get_scheduler_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth, in-flight calls and wait times per daemon"""
+        return self.scheduler.get_stats()
+    
+    def get_latency_stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Latency histogram of every daemon call, per coin and method"""
+        return {
+            coin: {method: histogram.get_stats() for method, histogram in methods.items()}
+            for coin, methods in self.latency.items()
+        }
+    
     def get_coin_config(self, coin_symbol: str) -> Dict[str, Any]:
         """Get configuration for a specific coin"""
         return self.supported_coins.get(coin_symbol, {})
@@ -365,4 +862,4 @@ class CoinInterface:
     
     def is_coin_enabled(self, coin_symbol: str) -> bool:
         """Check if a coin is enabled"""
-        return coin_symbol in self.supported_coins
\ No newline at end of file
+        return coin_symbol in self.supported_coins
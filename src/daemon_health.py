@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Daemon Health - Per-coin circuit breakers and a cached daemon health snapshot
+Powered By Aegisum EcoSystem
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = "data/daemon_health.json"
+
+
+class CircuitBreaker:
+    """Stop calling a daemon after repeated failures, then probe it again later"""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+    
+    def allow(self) -> bool:
+        """Whether a call may be sent to the daemon now"""
+        if self.state == self.CLOSED:
+            return True
+        
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            # Let a single trial call through to see if the daemon is back
+            self.state = self.HALF_OPEN
+            self.trial_started = now
+            return True
+        
+        # Half open: one trial at a time, unless the last one never reported back
+        if now - self.trial_started >= self.reset_timeout:
+            self.trial_started = now
+            return True
+        return False
+    
+    def record_success(self):
+        """Close the circuit after the daemon answers"""
+        if self.state != self.CLOSED:
+            logger.info("Daemon responded again, closing circuit")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+    
+    def record_failure(self):
+        """Count a failure, opening the circuit once the threshold is reached"""
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class DaemonHealth:
+    """Circuit breakers and last known health of every enabled coin daemon"""
+    
+    def __init__(self, config: dict):
+        health_config = config.get('daemon', {}).get('health', {})
+        self.refresh_interval = health_config.get('refresh_interval', 30)
+        self.snapshot_path = health_config.get('snapshot_path', DEFAULT_SNAPSHOT_PATH)
+        
+        threshold = health_config.get('failure_threshold', 3)
+        reset_timeout = health_config.get('reset_timeout', 30)
+        
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.last_error: Dict[str, Optional[str]] = {}
+        self.last_success: Dict[str, Optional[float]] = {}
+        self.blocks: Dict[str, Optional[int]] = {}
+        self.last_checked: Optional[float] = None
+        
+        for coin_symbol, coin_config in config['coins'].items():
+            if coin_config.get('enabled', False):
+                self.breakers[coin_symbol] = CircuitBreaker(threshold, reset_timeout)
+                self.last_error[coin_symbol] = None
+                self.last_success[coin_symbol] = None
+                self.blocks[coin_symbol] = None
+    
+    def allow(self, coin_symbol: str) -> bool:
+        """Whether a call to this coin's daemon may go ahead"""
+        return self.breakers[coin_symbol].allow()
+    
+    def is_available(self, coin_symbol: str) -> bool:
+        """Whether the coin's circuit is closed, without starting a trial call"""
+        breaker = self.breakers.get(coin_symbol)
+        return breaker is not None and breaker.state == CircuitBreaker.CLOSED
+    
+    def record_success(self, coin_symbol: str):
+        """Note that the daemon answered a call"""
+        self.breakers[coin_symbol].record_success()
+        self.last_success[coin_symbol] = time.time()
+        self.last_error[coin_symbol] = None
+    
+    def record_failure(self, coin_symbol: str, error: str):
+        """Note that the daemon could not be reached or did not answer in time"""
+        breaker = self.breakers[coin_symbol]
+        was_open = breaker.state == CircuitBreaker.OPEN
+        breaker.record_failure()
+        self.last_error[coin_symbol] = error
+        
+        if breaker.state == CircuitBreaker.OPEN and not was_open:
+            logger.warning(f"{coin_symbol} daemon marked unavailable after {breaker.consecutive_failures} failures: {error}")
+    
+    def record_blocks(self, coin_symbol: str, blocks: int):
+        """Remember the block height seen by the last health probe"""
+        self.blocks[coin_symbol] = blocks
+    
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Health of every coin daemon as of the last refresh"""
+        coins = {}
+        for coin_symbol, breaker in self.breakers.items():
+            last_success = self.last_success[coin_symbol]
+            coins[coin_symbol] = {
+                'available': breaker.state == CircuitBreaker.CLOSED,
+                'state': breaker.state,
+                'consecutive_failures': breaker.consecutive_failures,
+                'blocks': self.blocks[coin_symbol],
+                'last_success': datetime.fromtimestamp(last_success).isoformat() if last_success else None,
+                'last_error': self.last_error[coin_symbol]
+            }
+        
+        return {
+            'updated_at': datetime.fromtimestamp(self.last_checked).isoformat() if self.last_checked else None,
+            'refresh_interval': self.refresh_interval,
+            'coins': coins
+        }
+    
+    def save_snapshot(self):
+        """Write the snapshot to disk for the admin dashboard"""
+        try:
+            directory = os.path.dirname(self.snapshot_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            
+            # Write then rename so readers never see a partial file
+            temp_path = f"{self.snapshot_path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(self.get_snapshot(), f, indent=2)
+            os.replace(temp_path, self.snapshot_path)
+        
+        except Exception as e:
+            logger.error(f"Failed to save daemon health snapshot: {e}")
+
+
+def load_snapshot(path: str = DEFAULT_SNAPSHOT_PATH) -> Optional[Dict[str, Any]]:
+    """Read a health snapshot written by a running bot, if there is one"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Failed to read daemon health snapshot: {e}")
+        return None
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Daemon Scheduler - Per-coin concurrency limits and priority queueing for daemon calls
+Powered By Aegisum EcoSystem
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Scheduling class of a daemon call; lower values run first"""
+    SEND = 0        # withdrawals, sends and internal moves
+    USER = 1        # reads made on behalf of a user command
+    BACKGROUND = 2  # monitoring sweeps and other housekeeping
+
+
+class CoinScheduler:
+    """Bounded, priority-ordered admission of calls to one daemon"""
+    
+    def __init__(self, coin_symbol: str, max_concurrent: int = 4):
+        self.coin_symbol = coin_symbol
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.in_flight = 0
+        
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        
+        # Wait time statistics per priority class
+        self._wait_stats = {
+            priority: {'calls': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for priority in Priority
+        }
+    
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.USER):
+        """Hold one of the daemon's call slots for the duration of the block"""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    async def acquire(self, priority: Priority = Priority.USER):
+        """Wait until a call slot is free, ahead of lower-priority waiters"""
+        started = time.monotonic()
+        
+        if self.in_flight < self.max_concurrent and not self.queue_depth():
+            self.in_flight += 1
+            self._record_wait(priority, 0.0)
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed to us just as we were cancelled
+                self.release()
+            raise
+        
+        self._record_wait(priority, time.monotonic() - started)
+    
+    def release(self):
+        """Free a call slot, handing it straight to the next waiter if any"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        
+        self.in_flight -= 1
+    
+    def queue_depth(self) -> int:
+        """Number of calls waiting for a slot"""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+    
+    def _record_wait(self, priority: Priority, waited: float):
+        stats = self._wait_stats[Priority(priority)]
+        stats['calls'] += 1
+        stats['total_wait'] += waited
+        stats['max_wait'] = max(stats['max_wait'], waited)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight calls and wait times for this daemon"""
+        waits = {}
+        for priority, stats in self._wait_stats.items():
+            calls = stats['calls']
+            waits[priority.name.lower()] = {
+                'calls': calls,
+                'avg_wait_ms': round(stats['total_wait'] / calls * 1000, 2) if calls else 0.0,
+                'max_wait_ms': round(stats['max_wait'] * 1000, 2)
+            }
+        
+        return {
+            'max_concurrent': self.max_concurrent,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth(),
+            'waits': waits
+        }
+
+
+class DaemonScheduler:
+    """One CoinScheduler per enabled coin"""
+    
+    def __init__(self, config: dict):
+        default_limit = config.get('daemon', {}).get('max_concurrent_calls', 4)
+        
+        self.schedulers: Dict[str, CoinScheduler] = {}
+        for coin_symbol, coin_config in config['coins'].items():
+            if coin_config.get('enabled', False):
+                limit = coin_config.get('max_concurrent_calls', default_limit)
+                self.schedulers[coin_symbol] = CoinScheduler(coin_symbol, limit)
+    
+    def slot(self, coin_symbol: str, priority: Priority = Priority.USER):
+        """Async context manager holding a call slot for a coin's daemon"""
+        return self.schedulers[coin_symbol].slot(priority)
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Scheduler statistics for every coin"""
+        return {coin: scheduler.get_stats() for coin, scheduler in self.schedulers.items()}
@@ -4,11 +4,12 @@ Database Manager - Handles all database operations
 Powered By Aegisum EcoSystem
 """
 
+import json
 import sqlite3
 import logging
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,9 @@ class Database:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.connection = None
+        
+        # Deposit address -> user id, per coin, so deposits are matched without a table scan
+        self.address_owners: Dict[str, Dict[str, int]] = {}
     
     async def initialize(self):
         """Initialize database and create tables"""
@@ -23,7 +27,12 @@ class Database:
             self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
             self.connection.row_factory = sqlite3.Row
             
+            # WAL keeps small ledger commits fast and lets readers run alongside the writer
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            
             await self._create_tables()
+            self._load_address_owners()
             logger.info("Database initialized successfully")
             
         except Exception as e:
@@ -89,6 +98,28 @@ class Database:
             )
         ''')
         
+        # Each recipient's share of a rain
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rain_participants (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                rain_id TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                coin_symbol TEXT NOT NULL,
+                amount REAL NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_rain_participants_rain
+            ON rain_participants(rain_id)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_rain_participants_user
+            ON rain_participants(user_id, created_at)
+        ''')
+        
         # Airdrops table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS airdrops (
@@ -185,8 +216,82 @@ class Database:
             )
         ''')
         
+        # Pre-generated deposit addresses; user_id is set once assigned
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS address_pool (
+                address TEXT PRIMARY KEY,
+                coin_symbol TEXT NOT NULL,
+                user_id INTEGER,
+                labeled BOOLEAN DEFAULT FALSE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                assigned_at TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_address_pool_coin_user
+            ON address_pool (coin_symbol, user_id)
+        ''')
+        
+        # Batched withdrawals keep their fees and ledger transfer until the batch is sent
+        self._add_column(cursor, 'withdrawals', 'network_fee', 'REAL DEFAULT 0')
+        self._add_column(cursor, 'withdrawals', 'transfer_id', 'INTEGER')
+        # Which sendmany attempt a withdrawal is in, so a timed-out batch can be found in the wallet
+        self._add_column(cursor, 'withdrawals', 'batch_id', 'TEXT')
+        self._add_column(cursor, 'withdrawals', 'sent_at', 'TIMESTAMP')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_withdrawals_coin_status
+            ON withdrawals (coin_symbol, status)
+        ''')
+        
+        # A deposit is one transaction output, recorded once however often it is listed
+        self._add_column(cursor, 'deposits', 'vout', 'INTEGER')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_deposits_output
+            ON deposits (coin_symbol, tx_id, vout)
+        ''')
+        
+        # Height of the block a deposit or withdrawal was mined in; confirmations follow from the tip
+        self._add_column(cursor, 'deposits', 'block_height', 'INTEGER')
+        self._add_column(cursor, 'withdrawals', 'block_height', 'INTEGER')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_deposits_coin_status
+            ON deposits (coin_symbol, status, block_height)
+        ''')
+        
+        # Last block each coin's deposits were processed up to, for listsinceblock
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS deposit_cursors (
+                coin_symbol TEXT PRIMARY KEY,
+                block_hash TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Latest ledger-vs-daemon reconciliation of each coin, with the drill-down checkpoint
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reconciliation (
+                coin_symbol TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                wallet_balance REAL,
+                liabilities REAL,
+                drift REAL,
+                checkpoint_user_id INTEGER DEFAULT 0,
+                users_checked INTEGER DEFAULT 0,
+                findings TEXT DEFAULT '[]',
+                checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         self.connection.commit()
     
+    def _add_column(self, cursor: sqlite3.Cursor, table: str, column: str, definition: str):
+        """Add a column to a table created by an older version"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    
     def create_user(self, user_id: int, username: str) -> bool:
         """Create a new user"""
         try:
@@ -249,6 +354,19 @@ class Database:
         except Exception as e:
             logger.error(f"Failed to update user activity for {user_id}: {e}")
     
+    def _load_address_owners(self):
+        """Build the in-memory address index from user_addresses"""
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT coin_symbol, address, user_id FROM user_addresses')
+        
+        self.address_owners = {}
+        for coin_symbol, address, user_id in cursor.fetchall():
+            self.address_owners.setdefault(coin_symbol, {})[address] = user_id
+    
+    def get_address_owners(self, coin_symbol: str) -> Dict[str, int]:
+        """Every known deposit address of a coin, mapped to its user"""
+        return self.address_owners.get(coin_symbol, {})
+    
     def store_user_address(self, user_id: int, coin_symbol: str, address: str):
         """Store user's address for a coin"""
         try:
@@ -260,6 +378,9 @@ class Database:
             
             self.connection.commit()
             
+            # A replaced address keeps its owner, so late deposits to it are still matched
+            self.address_owners.setdefault(coin_symbol, {})[address] = user_id
+        
         except Exception as e:
             logger.error(f"Failed to store address for user {user_id}: {e}")
     
@@ -279,6 +400,104 @@ class Database:
             logger.error(f"Failed to get address for user {user_id}: {e}")
             return None
     
+    def get_user_addresses(self, coin_symbol: str, user_ids: List[int]) -> Dict[str, int]:
+        """Deposit addresses of several users, mapped to their owners"""
+        cursor = self.connection.cursor()
+        addresses = {}
+        for start in range(0, len(user_ids), 900):
+            chunk = user_ids[start:start + 900]
+            cursor.execute(f'''
+                SELECT address, user_id FROM user_addresses
+                WHERE coin_symbol = ? AND user_id IN ({','.join('?' * len(chunk))})
+            ''', [coin_symbol] + chunk)
+            addresses.update(cursor.fetchall())
+        return addresses
+    
+    def add_pool_addresses(self, coin_symbol: str, addresses: List[str]):
+        """Add freshly generated addresses to a coin's address pool"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.executemany('''
+                INSERT OR IGNORE INTO address_pool (address, coin_symbol)
+                VALUES (?, ?)
+            ''', [(address, coin_symbol) for address in addresses])
+            
+            self.connection.commit()
+        
+        except Exception as e:
+            logger.error(f"Failed to add {coin_symbol} pool addresses: {e}")
+    
+    def count_free_pool_addresses(self, coin_symbol: str) -> int:
+        """Number of unassigned addresses in a coin's pool"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) FROM address_pool
+                WHERE coin_symbol = ? AND user_id IS NULL
+            ''', (coin_symbol,))
+            
+            return cursor.fetchone()[0]
+        
+        except Exception as e:
+            logger.error(f"Failed to count {coin_symbol} pool addresses: {e}")
+            return 0
+    
+    def claim_pool_address(self, user_id: int, coin_symbol: str) -> Optional[str]:
+        """Assign the oldest free pool address to a user"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute('''
+                SELECT address FROM address_pool
+                WHERE coin_symbol = ? AND user_id IS NULL
+                ORDER BY created_at, rowid
+                LIMIT 1
+            ''', (coin_symbol,))
+            
+            row = cursor.fetchone()
+            if not row:
+                return None
+            
+            cursor.execute('''
+                UPDATE address_pool SET user_id = ?, assigned_at = CURRENT_TIMESTAMP
+                WHERE address = ? AND user_id IS NULL
+            ''', (user_id, row[0]))
+            
+            self.connection.commit()
+            return row[0] if cursor.rowcount else None
+        
+        except Exception as e:
+            logger.error(f"Failed to claim {coin_symbol} pool address for user {user_id}: {e}")
+            return None
+    
+    def get_unlabeled_pool_addresses(self, coin_symbol: str, limit: int = 100) -> List[Tuple[str, int]]:
+        """Assigned pool addresses whose wallet account has not been set yet"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute('''
+                SELECT address, user_id FROM address_pool
+                WHERE coin_symbol = ? AND user_id IS NOT NULL AND NOT labeled
+                LIMIT ?
+            ''', (coin_symbol, limit))
+            
+            return [(row[0], row[1]) for row in cursor.fetchall()]
+        
+        except Exception as e:
+            logger.error(f"Failed to get unlabeled {coin_symbol} pool addresses: {e}")
+            return []
+    
+    def mark_pool_addresses_labeled(self, addresses: List[str]):
+        """Record that assigned pool addresses now belong to their user's account"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.executemany('''
+                UPDATE address_pool SET labeled = TRUE WHERE address = ?
+            ''', [(address,) for address in addresses])
+            
+            self.connection.commit()
+        
+        except Exception as e:
+            logger.error(f"Failed to mark pool addresses labeled: {e}")
+    
     def record_tip(self, from_user_id: int, to_user_id: int, coin_symbol: str, amount: float, tx_id: str):
         """Record a tip transaction"""
         try:
@@ -313,6 +532,21 @@ class Database:
         except Exception as e:
             logger.error(f"Failed to record rain: {e}")
     
+    def insert_rain(self, cursor: sqlite3.Cursor, sender_id: int, chat_id: Optional[int], coin_symbol: str,
+                    total_amount: float, rain_id: str, participants: List[Tuple[int, float]]):
+        """Record a rain and every recipient's share inside the caller's transaction"""
+        cursor.execute('''
+            INSERT INTO rain (sender_id, chat_id, coin_symbol, total_amount, recipient_count, rain_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (sender_id, chat_id, coin_symbol, total_amount, len(participants), rain_id))
+        
+        cursor.executemany('''
+            INSERT INTO rain_participants (rain_id, user_id, coin_symbol, amount)
+            VALUES (?, ?, ?, ?)
+        ''', [(rain_id, user_id, coin_symbol, amount) for user_id, amount in participants])
+        
+        self._add_statistic(cursor, 'rain_sent', coin_symbol, total_amount)
+    
     def record_withdrawal(self, user_id: int, coin_symbol: str, amount: float, address: str, tx_id: str, fee: float):
         """Record a withdrawal"""
         try:
@@ -330,23 +564,241 @@ class Database:
         except Exception as e:
             logger.error(f"Failed to record withdrawal: {e}")
     
-    def record_deposit(self, user_id: int, coin_symbol: str, amount: float, address: str, tx_id: str, confirmations: int = 0):
-        """Record a deposit"""
+    def insert_queued_withdrawal(self, cursor: sqlite3.Cursor, user_id: int, coin_symbol: str, amount: float,
+                                 address: str, fee: float, network_fee: float, transfer_id: int) -> int:
+        """Queue a withdrawal for the next batch inside the caller's transaction"""
+        cursor.execute('''
+            INSERT INTO withdrawals (user_id, coin_symbol, amount, address, fee, network_fee, transfer_id, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 'queued')
+        ''', (user_id, coin_symbol, amount, address, fee, network_fee, transfer_id))
+        withdrawal_id = cursor.lastrowid
+        
+        self._add_statistic(cursor, 'withdrawals', coin_symbol, amount)
+        return withdrawal_id
+    
+    def count_withdrawals(self, coin_symbol: str, status: str) -> int:
+        """Number of a coin's withdrawals in a status"""
         try:
             cursor = self.connection.cursor()
             cursor.execute('''
-                INSERT OR REPLACE INTO deposits (user_id, coin_symbol, amount, address, tx_id, confirmations)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, coin_symbol, amount, address, tx_id, confirmations))
+                SELECT COUNT(*) FROM withdrawals WHERE coin_symbol = ? AND status = ?
+            ''', (coin_symbol, status))
+            return cursor.fetchone()[0]
+        
+        except Exception as e:
+            logger.error(f"Failed to count {status} {coin_symbol} withdrawals: {e}")
+            return 0
+    
+    def get_queued_withdrawals(self, coin_symbol: str, limit: int) -> List[Dict]:
+        """Oldest queued withdrawals of a coin"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute('''
+                SELECT id, user_id, amount, address, fee, network_fee, transfer_id
+                FROM withdrawals
+                WHERE coin_symbol = ? AND status = 'queued'
+                ORDER BY id
+                LIMIT ?
+            ''', (coin_symbol, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        
+        except Exception as e:
+            logger.error(f"Failed to get queued {coin_symbol} withdrawals: {e}")
+            return []
+    
+    def set_withdrawals_status(self, withdrawal_ids: List[int], status: str, tx_id: Optional[str] = None):
+        """Move withdrawals to a new status, stamping the transaction that paid them"""
+        cursor = self.connection.cursor()
+        cursor.executemany('''
+            UPDATE withdrawals SET status = ?, tx_id = COALESCE(?, tx_id) WHERE id = ?
+        ''', [(status, tx_id, withdrawal_id) for withdrawal_id in withdrawal_ids])
+        
+        self.connection.commit()
+    
+    def start_withdrawal_batch(self, withdrawal_ids: List[int], batch_id: str):
+        """Mark withdrawals as being sent in one sendmany attempt"""
+        with self.connection:
+            self.connection.executemany('''
+                UPDATE withdrawals SET status = 'sending', batch_id = ?, sent_at = CURRENT_TIMESTAMP WHERE id = ?
+            ''', [(batch_id, withdrawal_id) for withdrawal_id in withdrawal_ids])
+    
+    def get_sending_batches(self, coin_symbol: str) -> Dict[str, List[Dict]]:
+        """A coin's withdrawals whose sendmany never answered, by batch id, with each attempt's age in seconds"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute('''
+                SELECT id, user_id, amount, address, fee, network_fee, transfer_id, batch_id,
+                       CAST((julianday('now') - julianday(sent_at)) * 86400 AS INTEGER) AS age
+                FROM withdrawals
+                WHERE coin_symbol = ? AND status = 'sending' AND batch_id IS NOT NULL
+                ORDER BY id
+            ''', (coin_symbol,))
+            
+            batches: Dict[str, List[Dict]] = {}
+            for row in cursor.fetchall():
+                batches.setdefault(row['batch_id'], []).append(dict(row))
+            return batches
+        
+        except Exception as e:
+            logger.error(f"Failed to get sending {coin_symbol} withdrawals: {e}")
+            return {}
+    
+    def mark_withdrawals_sent(self, cursor: sqlite3.Cursor, tx_id: str, network_fees: List[Tuple[float, int]]):
+        """Stamp sent withdrawals with their transaction and the network fee each paid, as (fee, withdrawal id),
+        inside the caller's transaction"""
+        cursor.executemany('''
+            UPDATE withdrawals SET status = 'pending', tx_id = ?, network_fee = ? WHERE id = ?
+        ''', [(tx_id, fee, withdrawal_id) for fee, withdrawal_id in network_fees])
+    
+    def get_deposit_cursor(self, coin_symbol: str) -> Optional[str]:
+        """Block hash a coin's deposits have been processed up to"""
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT block_hash FROM deposit_cursors WHERE coin_symbol = ?', (coin_symbol,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def set_deposit_cursor(self, coin_symbol: str, block_hash: str):
+        """Move a coin's deposit cursor once a listsinceblock result is processed"""
+        cursor = self.connection.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO deposit_cursors (coin_symbol, block_hash, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+        ''', (coin_symbol, block_hash))
+        
+        self.connection.commit()
+    
+    def clear_deposit_cursor(self, coin_symbol: str):
+        """Forget a coin's deposit cursor so it is set up again"""
+        self.connection.execute('DELETE FROM deposit_cursors WHERE coin_symbol = ?', (coin_symbol,))
+        self.connection.commit()
+    
+    def save_reconciliation(self, coin_symbol: str, status: str, wallet_balance: float, liabilities: float,
+                            drift: float, checkpoint_user_id: int, users_checked: int, findings: List[Dict]):
+        """Store a coin's latest reconciliation and drill-down progress"""
+        cursor = self.connection.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO reconciliation
+            (coin_symbol, status, wallet_balance, liabilities, drift, checkpoint_user_id, users_checked,
+             findings, checked_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (coin_symbol, status, wallet_balance, liabilities, drift, checkpoint_user_id, users_checked,
+              json.dumps(findings)))
+        
+        self.connection.commit()
+    
+    def get_reconciliation(self) -> Dict[str, Dict]:
+        """Latest reconciliation of every coin"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute('SELECT * FROM reconciliation ORDER BY coin_symbol')
             
-            self.connection.commit()
+            reconciliation = {}
+            for row in cursor.fetchall():
+                row = dict(row)
+                row['findings'] = json.loads(row['findings'] or '[]')
+                reconciliation[row.pop('coin_symbol')] = row
+            return reconciliation
+        
+        except Exception as e:
+            logger.error(f"Failed to get reconciliation: {e}")
+            return {}
+    
+    def record_deposit(self, user_id: int, coin_symbol: str, amount: float, address: str, tx_id: str,
+                       confirmations: int = 0, vout: int = 0, block_height: Optional[int] = None) -> bool:
+        """Record a deposit output once; False if it was already recorded"""
+        with self.connection:
+            cursor = self.connection.cursor()
             
-            # Update statistics if confirmed
-            if confirmations > 0:
-                self._update_statistics('deposits', coin_symbol, amount)
+            # Rows from before outputs were tracked are adopted rather than duplicated
+            cursor.execute('''
+                UPDATE deposits SET vout = ?, block_height = COALESCE(block_height, ?)
+                WHERE id = (
+                    SELECT MIN(id) FROM deposits
+                    WHERE coin_symbol = ? AND tx_id = ? AND address = ? AND vout IS NULL
+                )
+            ''', (vout, block_height, coin_symbol, tx_id, address))
+            if cursor.rowcount:
+                return False
             
-        except Exception as e:
-            logger.error(f"Failed to record deposit: {e}")
+            cursor.execute('''
+                INSERT OR IGNORE INTO deposits
+                (user_id, coin_symbol, amount, address, tx_id, vout, confirmations, block_height)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, coin_symbol, amount, address, tx_id, vout, confirmations, block_height))
+            return cursor.rowcount == 1
+    
+    def set_deposit_heights(self, coin_symbol: str, heights: List[Tuple[Optional[int], str, int]]):
+        """Set the mined height of pending deposits, as (height or None, txid, vout)"""
+        with self.connection:
+            self.connection.executemany('''
+                UPDATE deposits SET block_height = ?
+                WHERE coin_symbol = ? AND tx_id = ? AND vout = ? AND status = 'pending'
+            ''', [(height, coin_symbol, tx_id, vout) for height, tx_id, vout in heights])
+    
+    def confirm_deposits(self, coin_symbol: str, tip_height: int, min_confirmations: int,
+                         credit: Callable[[Dict], None]) -> List[Dict]:
+        """Promote every pending deposit with enough confirmations at this tip; returns them
+        
+        Each is passed to ``credit`` first, so a failure leaves it pending for the next pass.
+        """
+        confirmed_height = tip_height - min_confirmations + 1
+        cursor = self.connection.cursor()
+        cursor.execute('''
+            SELECT id, user_id, amount, address, tx_id, vout, block_height FROM deposits
+            WHERE coin_symbol = ? AND status = 'pending' AND block_height <= ?
+        ''', (coin_symbol, confirmed_height))
+        deposits = [dict(row) for row in cursor.fetchall()]
+        
+        for deposit in deposits:
+            credit(deposit)
+        
+        with self.connection:
+            cursor.execute('''
+                UPDATE deposits
+                SET status = CASE WHEN block_height <= ? THEN 'confirmed' ELSE status END,
+                    confirmed_at = CASE WHEN block_height <= ? THEN CURRENT_TIMESTAMP ELSE confirmed_at END,
+                    confirmations = ? - block_height + 1
+                WHERE coin_symbol = ? AND status = 'pending' AND block_height IS NOT NULL
+            ''', (confirmed_height, confirmed_height, tip_height, coin_symbol))
+            for deposit in deposits:
+                self._add_statistic(cursor, 'deposits', coin_symbol, deposit['amount'])
+        
+        return deposits
+    
+    def get_unmined_withdrawals(self, coin_symbol: str) -> List[Dict]:
+        """Sent withdrawals whose block is not known yet"""
+        cursor = self.connection.cursor()
+        cursor.execute('''
+            SELECT DISTINCT tx_id FROM withdrawals
+            WHERE coin_symbol = ? AND status = 'pending' AND block_height IS NULL AND tx_id IS NOT NULL
+        ''', (coin_symbol,))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def set_withdrawal_heights(self, coin_symbol: str, heights: List[Tuple[Optional[int], str]]):
+        """Set the mined height of pending withdrawals, as (height or None, txid)"""
+        with self.connection:
+            self.connection.executemany('''
+                UPDATE withdrawals SET block_height = ?
+                WHERE coin_symbol = ? AND tx_id = ? AND status = 'pending'
+            ''', [(height, coin_symbol, tx_id) for height, tx_id in heights])
+    
+    def confirm_withdrawals(self, coin_symbol: str, tip_height: int, min_confirmations: int) -> List[Dict]:
+        """Promote every pending withdrawal with enough confirmations at this tip; returns them"""
+        confirmed_height = tip_height - min_confirmations + 1
+        with self.connection:
+            cursor = self.connection.cursor()
+            cursor.execute('''
+                SELECT id, user_id, amount, address, tx_id, block_height FROM withdrawals
+                WHERE coin_symbol = ? AND status = 'pending' AND block_height <= ?
+            ''', (coin_symbol, confirmed_height))
+            withdrawals = [dict(row) for row in cursor.fetchall()]
+            
+            cursor.execute('''
+                UPDATE withdrawals SET status = 'confirmed', confirmed_at = CURRENT_TIMESTAMP
+                WHERE coin_symbol = ? AND status = 'pending' AND block_height <= ?
+            ''', (coin_symbol, confirmed_height))
+        
+        return withdrawals
     
     def get_recent_active_users(self, chat_id: int, hours: int = 24) -> List[Dict]:
         """Get users active in the last N hours"""
@@ -392,41 +844,6 @@ class Database:
             logger.error(f"Failed to get user tips: {e}")
             return []
     
-    def get_unclaimed_tips(self, user_id: int) -> List[Dict]:
-        """Get unclaimed tips for a user"""
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                SELECT t.*, u.username as from_username
-                FROM tips t
-                JOIN users u ON t.from_user_id = u.user_id
-                WHERE t.to_user_id = ? AND t.claimed = FALSE
-                ORDER BY t.created_at DESC
-            ''', (user_id,))
-            
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
-            
-        except Exception as e:
-            logger.error(f"Failed to get unclaimed tips: {e}")
-            return []
-    
-    def claim_tips(self, user_id: int) -> int:
-        """Mark all tips as claimed for a user"""
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                UPDATE tips SET claimed = TRUE 
-                WHERE to_user_id = ? AND claimed = FALSE
-            ''', (user_id,))
-            
-            self.connection.commit()
-            return cursor.rowcount
-            
-        except Exception as e:
-            logger.error(f"Failed to claim tips for user {user_id}: {e}")
-            return 0
-    
     def get_top_users(self, stat_type: str, coin_symbol: str = None, limit: int = 10) -> List[Dict]:
         """Get top users by various statistics"""
         try:
@@ -518,18 +935,21 @@ class Database:
         """Update daily statistics"""
         try:
             cursor = self.connection.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO statistics (stat_type, coin_symbol, value, date)
-                VALUES (?, ?, 
-                    COALESCE((SELECT value FROM statistics WHERE stat_type = ? AND coin_symbol = ? AND date = date('now')), 0) + ?,
-                    date('now'))
-            ''', (stat_type, coin_symbol, stat_type, coin_symbol, value))
+            self._add_statistic(cursor, stat_type, coin_symbol, value)
             
             self.connection.commit()
             
         except Exception as e:
             logger.error(f"Failed to update statistics: {e}")
     
+    def _add_statistic(self, cursor: sqlite3.Cursor, stat_type: str, coin_symbol: str, value: float):
+        cursor.execute('''
+            INSERT OR REPLACE INTO statistics (stat_type, coin_symbol, value, date)
+            VALUES (?, ?, 
+                COALESCE((SELECT value FROM statistics WHERE stat_type = ? AND coin_symbol = ? AND date = date('now')), 0) + ?,
+                date('now'))
+        ''', (stat_type, coin_symbol, stat_type, coin_symbol, value))
+    
     def set_admin_setting(self, key: str, value: str):
         """Set an admin setting"""
         try:
@@ -25,6 +25,7 @@ from telegram.constants import ParseMode
 
 from enhanced_wallet_manager import EnhancedWalletManager
 from database import Database
+from ledger import Ledger
 from admin_controls import AdminControls
 from transaction_monitor import TransactionMonitor
 from utils import format_amount, validate_address, get_powered_by_text
@@ -50,8 +51,12 @@ class EnhancedCommunityTipBot:
         """Initialize the Enhanced Community Tip Bot"""
         self.config = self.load_config(config_path)
         self.db = Database(self.config['database']['path'])
-        self.wallet_manager = EnhancedWalletManager(self.config)
-        self.admin_controls = AdminControls(self.config, self.db)
+        self.ledger = Ledger(self.config, self.db)
+        self.wallet_manager = EnhancedWalletManager(self.config, ledger=self.ledger)
+        self.admin_controls = AdminControls(self.config, self.db, self.wallet_manager.coin_interface)
+        self.transaction_monitor = TransactionMonitor(
+            self.config, self.db, self.wallet_manager.coin_interface, self.ledger
+        )
         
         # Bot application
         self.application = None
@@ -347,6 +352,7 @@ class EnhancedCommunityTipBot:
         addresses_text += (
             f"✅ **Setup Complete!**\n"
             f"• Your wallet is now ready to use\n"
+            f"• Earlier deposits to this seed appear once the daemon finishes rescanning\n"
             f"• Use /help to see all commands\n"
             f"• Use /backup to practice wallet recovery\n\n"
             f"{get_powered_by_text()}"
@@ -370,6 +376,7 @@ class EnhancedCommunityTipBot:
             f"• Add this to your authenticator app\n\n"
             f"✅ **Import Complete!**\n"
             f"• Your wallet is now ready to use\n"
+            f"• Earlier deposits to this seed appear once the daemon finishes rescanning\n"
             f"• Use /help to see all commands\n"
             f"• Use /balance to check your funds\n\n"
             f"{get_powered_by_text()}"
@@ -429,26 +436,34 @@ class EnhancedCommunityTipBot:
             )
             return
         
-        # Get balances for all coins
-        balances = {}
-        total_value = 0.0
-        
-        for coin_symbol in self.config['coins']:
-            if self.config['coins'][coin_symbol]['enabled']:
-                balance = await self.wallet_manager.get_balance(user_id, coin_symbol)
-                balances[coin_symbol] = balance
+        # One read of the user's ledger balances; no daemon is involved
+        balances = self.ledger.get_balances(user_id)
         
         # Create portfolio view
         portfolio_text = "💰 **Your Portfolio**\n\n"
         
-        for coin_symbol, balance in balances.items():
+        for coin_symbol in self.config['coins']:
             coin_config = self.config['coins'][coin_symbol]
-            formatted_balance = format_amount(balance, coin_config['decimals'])
+            if not coin_config['enabled']:
+                continue
+            
+            if not self.ledger.is_open(coin_symbol):
+                portfolio_text += f"⚠️ **{coin_symbol}:** temporarily unavailable\n"
+                continue
+            
+            balance = balances.get(coin_symbol, {})
+            available = balance.get('available', 0)
+            formatted_balance = format_amount(available, coin_config['decimals'])
             
-            if balance > 0:
+            if available > 0:
                 portfolio_text += f"💎 **{coin_symbol}:** {formatted_balance}\n"
             else:
                 portfolio_text += f"⚪ **{coin_symbol}:** {formatted_balance}\n"
+            
+            if balance.get('pending'):
+                portfolio_text += f"   ⏳ Pending: {format_amount(balance['pending'], coin_config['decimals'])}\n"
+            if balance.get('locked'):
+                portfolio_text += f"   🔒 Withdrawing: {format_amount(balance['locked'], coin_config['decimals'])}\n"
         
         # Add quick action buttons
         keyboard = [
@@ -565,7 +580,14 @@ class EnhancedCommunityTipBot:
         # Record faucet claim
         self.faucet_claims[user_id] = current_time
         
-        # Add rewards to user balance (simulate)
+        # Add rewards to user balance
+        for coin_symbol, amount in list(rewards.items()):
+            try:
+                self.ledger.faucet(user_id, coin_symbol, amount)
+            except Exception as e:
+                logger.error(f"Failed to credit {coin_symbol} faucet reward to user {user_id}: {e}")
+                del rewards[coin_symbol]
+        
         reward_text = "🎁 **Daily Faucet Rewards!**\n\n"
         for coin_symbol, amount in rewards.items():
             formatted_amount = format_amount(amount, self.config['coins'][coin_symbol]['decimals'])
@@ -828,6 +850,11 @@ class EnhancedCommunityTipBot:
     async def start(self):
         """Start the bot"""
         try:
+            # Initialize database and ledger
+            await self.db.initialize()
+            self.ledger.initialize()
+            await self.ledger.open_coins(self.wallet_manager.coin_interface)
+            
             # Create application
             self.application = Application.builder().token(self.config['bot']['token']).build()
             
@@ -850,6 +877,16 @@ class EnhancedCommunityTipBot:
             
             await self.application.bot.set_my_commands(commands)
             
+            # Import any derived keys still waiting from the last run
+            self.wallet_manager.key_importer.start()
+            
+            # Credit deposits to the ledger as they confirm
+            await self.transaction_monitor.start()
+            
+            # Probe unavailable daemons so their circuit breakers close again, and keep
+            # the health snapshot current for the dashboard
+            self.wallet_manager.coin_interface.start_health_monitor()
+            
             logger.info("Enhanced Community Tipbot starting...")
             
             # Start polling
@@ -861,6 +898,10 @@ class EnhancedCommunityTipBot:
         except Exception as e:
             logger.error(f"Failed to start bot: {e}")
             raise
+        finally:
+            await self.transaction_monitor.stop()
+            # Also stops the health monitor
+            await self.wallet_manager.coin_interface.close()
 
 def main():
     """Main function"""
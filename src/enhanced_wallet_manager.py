@@ -24,10 +24,15 @@ import pyotp
 import qrcode
 from io import BytesIO
 
+from coin_interface import CoinInterface
+from hd_wallet import ExtendedKey, derive_key, get_hd_config, mnemonic_to_seed
+from key_import import KeyImporter
+from ledger import Ledger
+
 logger = logging.getLogger(__name__)
 
 class EnhancedWalletManager:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, coin_interface: Optional[CoinInterface] = None, ledger: Optional[Ledger] = None):
         self.config = config
         self.wallets_dir = "data/wallets"
         self.secure_dir = "data/secure"
@@ -44,11 +49,21 @@ class EnhancedWalletManager:
         # Initialize secure database
         self._init_secure_database()
         
-        # Cache for balances and addresses
-        self.balance_cache = {}
+        # Cache for addresses
         self.address_cache = {}
         self.cache_expiry = 60  # seconds
         
+        # Shared daemon client; concurrent cache misses share one daemon call
+        self.coin_interface = coin_interface or CoinInterface(config)
+        
+        # Keys derived from user seeds are imported into the daemons in the background
+        self.key_importer = KeyImporter(
+            config, os.path.join(self.secure_dir, "wallets.db"), self.coin_interface, self.cipher
+        )
+        
+        # User balances are kept in the bot's ledger rather than read from the daemons
+        self.ledger = ledger
+    
     def _get_or_create_master_key(self) -> bytes:
         """Get or create master encryption key"""
         key_file = os.path.join(self.secure_dir, "master.key")
@@ -168,10 +183,11 @@ class EnhancedWalletManager:
             
             # Generate addresses for all enabled coins
             addresses = {}
+            master_key = ExtendedKey.from_seed(mnemonic_to_seed(seed_phrase))
             for coin_symbol in self.config['coins']:
                 if self.config['coins'][coin_symbol]['enabled']:
                     try:
-                        address = await self._generate_coin_address(user_id, coin_symbol, seed_phrase)
+                        address = await self._generate_coin_address(user_id, coin_symbol, master_key)
                         addresses[coin_symbol] = address
                     except Exception as e:
                         logger.error(f"Failed to generate {coin_symbol} address: {e}")
@@ -206,8 +222,9 @@ class EnhancedWalletManager:
             logger.error(f"Failed to create wallet for user {user_id}: {e}")
             raise
     
-    async def import_wallet(self, user_id: int, seed_phrase: str, password: str) -> Dict[str, any]:
-        """Import existing wallet from seed phrase"""
+    async def import_wallet(self, user_id: int, seed_phrase: str, password: str,
+                            birth_height: int = 0) -> Dict[str, any]:
+        """Import existing wallet from seed phrase; the daemon rescans from birth_height for its history"""
         try:
             # Validate seed phrase
             if not self.mnemonic.check(seed_phrase):
@@ -244,10 +261,13 @@ class EnhancedWalletManager:
             
             # Generate/restore addresses for all enabled coins
             addresses = {}
+            master_key = ExtendedKey.from_seed(mnemonic_to_seed(seed_phrase))
             for coin_symbol in self.config['coins']:
                 if self.config['coins'][coin_symbol]['enabled']:
                     try:
-                        address = await self._generate_coin_address(user_id, coin_symbol, seed_phrase)
+                        address = await self._generate_coin_address(
+                            user_id, coin_symbol, master_key, rescan_from=birth_height
+                        )
                         addresses[coin_symbol] = address
                     except Exception as e:
                         logger.error(f"Failed to restore {coin_symbol} address: {e}")
@@ -369,33 +389,14 @@ class EnhancedWalletManager:
                 self.address_cache[cache_key] = (time.time(), address)
                 return address
             
-            # Generate new address using CLI
-            coin_config = self.config['coins'][coin_symbol]
-            cli_path = coin_config['cli_path']
-            
-            # Use RPC credentials if available
-            rpc_args = []
-            if 'rpc_user' in coin_config and 'rpc_password' in coin_config:
-                rpc_args = [
-                    f'-rpcuser={coin_config["rpc_user"]}',
-                    f'-rpcpassword={coin_config["rpc_password"]}',
-                    f'-rpcport={coin_config["rpc_port"]}'
-                ]
-            
-            cmd = [cli_path] + rpc_args + ['getnewaddress', f'user_{user_id}']
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
+            # Generate new address on the daemon
+            result = await self.coin_interface.call(coin_symbol, 'getnewaddress', [f'user_{user_id}'])
             
-            if process.returncode != 0:
-                raise Exception(f"CLI error: {stderr.decode()}")
+            if not result['success']:
+                conn.close()
+                raise Exception(f"Daemon error: {result['error']}")
             
-            address = stdout.decode().strip()
+            address = result['result']
             
             # Store in database
             cursor.execute('''
@@ -418,54 +419,8 @@ class EnhancedWalletManager:
             raise
     
     async def get_balance(self, user_id: int, coin_symbol: str) -> float:
-        """Get user's balance for a specific coin with caching"""
-        try:
-            # Check cache first
-            cache_key = f"balance_{user_id}_{coin_symbol}"
-            if cache_key in self.balance_cache:
-                cache_time, balance = self.balance_cache[cache_key]
-                if time.time() - cache_time < self.cache_expiry:
-                    return balance
-            
-            coin_config = self.config['coins'][coin_symbol]
-            cli_path = coin_config['cli_path']
-            
-            # Use RPC credentials
-            rpc_args = []
-            if 'rpc_user' in coin_config and 'rpc_password' in coin_config:
-                rpc_args = [
-                    f'-rpcuser={coin_config["rpc_user"]}',
-                    f'-rpcpassword={coin_config["rpc_password"]}',
-                    f'-rpcport={coin_config["rpc_port"]}'
-                ]
-            
-            cmd = [cli_path] + rpc_args + ['getbalance', f'user_{user_id}']
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                # If account doesn't exist, return 0
-                if "Account does not exist" in stderr.decode():
-                    balance = 0.0
-                else:
-                    raise Exception(f"CLI error: {stderr.decode()}")
-            else:
-                balance = float(stdout.decode().strip())
-            
-            # Update cache
-            self.balance_cache[cache_key] = (time.time(), balance)
-            
-            return balance
-            
-        except Exception as e:
-            logger.error(f"Failed to get {coin_symbol} balance for user {user_id}: {e}")
-            return 0.0
+        """Get user's available balance for a specific coin from the ledger"""
+        return self.ledger.get_balance(user_id, coin_symbol)
     
     async def check_withdrawal_limits(self, user_id: int, coin_symbol: str, amount: float) -> Dict[str, any]:
         """Check if withdrawal is within limits"""
@@ -596,11 +551,35 @@ class EnhancedWalletManager:
         
         return decrypted_seed.decode()
     
-    async def _generate_coin_address(self, user_id: int, coin_symbol: str, seed_phrase: str) -> str:
-        """Generate address for specific coin using seed phrase"""
-        # For now, use the CLI method
-        # In a full implementation, you would derive addresses from the seed phrase
-        return await self.generate_address(user_id, coin_symbol)
+    async def _generate_coin_address(self, user_id: int, coin_symbol: str, master_key: ExtendedKey,
+                                     rescan_from: Optional[int] = None) -> str:
+        """Derive the user's address for a coin from their seed, or ask the daemon if the coin has no HD config"""
+        hd_config = get_hd_config(self.config, coin_symbol)
+        if hd_config is None:
+            return await self.generate_address(user_id, coin_symbol)
+        
+        address, private_key, derivation_path = derive_key(master_key, hd_config)
+        
+        db_path = os.path.join(self.secure_dir, "wallets.db")
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO coin_addresses 
+            (user_id, coin_symbol, address, derivation_path)
+            VALUES (?, ?, ?, ?)
+        ''', (user_id, coin_symbol, address, derivation_path))
+        
+        conn.commit()
+        conn.close()
+        
+        self.address_cache[f"{user_id}_{coin_symbol}"] = (time.time(), address)
+        
+        # The daemon gets the key, so deposits to the address are spendable hot wallet funds
+        self.key_importer.queue(coin_symbol, address, private_key, f'user_{user_id}', rescan_from)
+        
+        logger.info(f"Derived {coin_symbol} address for user {user_id}: {address}")
+        return address
     
     def validate_password(self, password: str) -> bool:
         """Validate password strength"""
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Fee Cache - Last good network fee estimate per coin, refreshed in the background
+Powered By Aegisum EcoSystem
+"""
+
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FeeCache:
+    """Network fee estimates per coin, with TTL and last-good fallback"""
+    
+    def __init__(self, config: dict):
+        fee_config = config.get('daemon', {}).get('fees', {})
+        self.ttl = fee_config.get('ttl', 300)
+        self.target_blocks = fee_config.get('target_blocks', 6)
+        self.typical_tx_kb = fee_config.get('typical_tx_kb', 0.25)
+        
+        # Configured network fee, used until a live estimate arrives
+        self.config_fees: Dict[str, float] = {
+            coin_symbol: coin_config.get('network_fee', 0.0001)
+            for coin_symbol, coin_config in config['coins'].items()
+            if coin_config.get('enabled', False)
+        }
+        
+        self.estimates: Dict[str, Dict[str, Any]] = {}
+    
+    def needs_refresh(self, coin_symbol: str, height: Optional[int] = None) -> bool:
+        """Whether the estimate is missing, expired or from an older block"""
+        estimate = self.estimates.get(coin_symbol)
+        if estimate is None:
+            return True
+        if time.time() - estimate['updated_at'] >= self.ttl:
+            return True
+        return height is not None and height != estimate['height']
+    
+    def update(self, coin_symbol: str, fee_rate: float, height: Optional[int] = None):
+        """Store a fresh fee rate (per kB) read from the daemon"""
+        self.estimates[coin_symbol] = {'fee_rate': fee_rate, 'height': height, 'updated_at': time.time()}
+    
+    def get_fee_rate(self, coin_symbol: str, fresh_only: bool = False) -> Optional[float]:
+        """Cached fee rate per kB, or None if there is none (or it expired and fresh_only)"""
+        estimate = self.estimates.get(coin_symbol)
+        if estimate is None:
+            return None
+        if fresh_only and time.time() - estimate['updated_at'] >= self.ttl:
+            return None
+        return estimate['fee_rate']
+    
+    def get_network_fee(self, coin_symbol: str) -> float:
+        """Expected network fee of a typical withdrawal, never below the configured fee"""
+        config_fee = self.config_fees.get(coin_symbol, 0.0001)
+        fee_rate = self.get_fee_rate(coin_symbol)
+        if fee_rate is None:
+            return config_fee
+        
+        # Round up to the smallest unit so the estimate never falls short
+        estimated = math.ceil(fee_rate * self.typical_tx_kb * 1e8) / 1e8
+        return max(config_fee, estimated)
+    
+    def get(self, coin_symbol: str) -> Dict[str, Any]:
+        """Current estimate with its source: live, stale (last good) or config"""
+        estimate = self.estimates.get(coin_symbol)
+        if estimate is None:
+            return {
+                'fee_rate': None,
+                'network_fee': self.get_network_fee(coin_symbol),
+                'source': 'config',
+                'updated_at': None
+            }
+        
+        age = time.time() - estimate['updated_at']
+        return {
+            'fee_rate': estimate['fee_rate'],
+            'network_fee': self.get_network_fee(coin_symbol),
+            'source': 'live' if age < self.ttl else 'stale',
+            'updated_at': datetime.fromtimestamp(estimate['updated_at']).isoformat()
+        }
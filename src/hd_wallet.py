@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+HD Wallet - Local BIP32/BIP44 address derivation from a seed phrase
+Powered By Aegisum EcoSystem
+"""
+
+import hashlib
+import hmac
+import logging
+import struct
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# secp256k1 curve parameters
+P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+G = (
+    0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8
+)
+
+HARDENED = 0x80000000
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+# Multiples of G for every 4-bit window of a scalar, built on first use
+_WINDOW_BITS = 4
+_g_table = None
+
+
+def _inverse(value: int) -> int:
+    return pow(value, P - 2, P)
+
+
+def _jacobian_double(point):
+    x, y, z = point
+    if not y:
+        return (0, 0, 0)
+    ysq = y * y % P
+    s = 4 * x * ysq % P
+    m = 3 * x * x % P
+    nx = (m * m - 2 * s) % P
+    ny = (m * (s - nx) - 8 * ysq * ysq) % P
+    nz = 2 * y * z % P
+    return (nx, ny, nz)
+
+
+def _jacobian_add(point, other):
+    """Add an affine point to a Jacobian point"""
+    x1, y1, z1 = point
+    x2, y2 = other
+    if not z1:
+        return (x2, y2, 1)
+    
+    z1z1 = z1 * z1 % P
+    u2 = x2 * z1z1 % P
+    s2 = y2 * z1 * z1z1 % P
+    if u2 == x1:
+        if s2 == y1:
+            return _jacobian_double(point)
+        return (0, 0, 0)
+    
+    h = (u2 - x1) % P
+    r = (s2 - y1) % P
+    hh = h * h % P
+    hhh = h * hh % P
+    v = x1 * hh % P
+    nx = (r * r - hhh - 2 * v) % P
+    ny = (r * (v - nx) - y1 * hhh) % P
+    nz = z1 * h % P
+    return (nx, ny, nz)
+
+
+def _to_affine(point) -> Tuple[int, int]:
+    x, y, z = point
+    if not z:
+        raise ValueError("Point at infinity")
+    zinv = _inverse(z)
+    zinv2 = zinv * zinv % P
+    return (x * zinv2 % P, y * zinv2 * zinv % P)
+
+
+def _build_g_table():
+    global _g_table
+    table = []
+    base = (G[0], G[1], 1)
+    for _ in range(256 // _WINDOW_BITS):
+        row = [None]
+        point = (0, 0, 0)
+        for _ in range((1 << _WINDOW_BITS) - 1):
+            point = _jacobian_add(point, _to_affine(base))
+            row.append(_to_affine(point))
+        table.append(row)
+        for _ in range(_WINDOW_BITS):
+            base = _jacobian_double(base)
+    _g_table = table
+
+
+def point_multiply_g(scalar: int) -> Tuple[int, int]:
+    """Multiply the generator by a scalar using the precomputed window table"""
+    if _g_table is None:
+        _build_g_table()
+    
+    point = (0, 0, 0)
+    mask = (1 << _WINDOW_BITS) - 1
+    for window, row in enumerate(_g_table):
+        digit = (scalar >> (window * _WINDOW_BITS)) & mask
+        if digit:
+            point = _jacobian_add(point, row[digit])
+    return _to_affine(point)
+
+
+def point_add(a: Tuple[int, int], b: Tuple[int, int]) -> Tuple[int, int]:
+    """Add two affine points"""
+    return _to_affine(_jacobian_add((a[0], a[1], 1), b))
+
+
+def compress_point(point: Tuple[int, int]) -> bytes:
+    return bytes([2 + (point[1] & 1)]) + point[0].to_bytes(32, 'big')
+
+
+def hash160(data: bytes) -> bytes:
+    """RIPEMD160(SHA256(data))"""
+    return hashlib.new('ripemd160', hashlib.sha256(data).digest()).digest()
+
+
+def base58check_encode(payload: bytes) -> str:
+    checksum = hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4]
+    data = payload + checksum
+    
+    value = int.from_bytes(data, 'big')
+    encoded = ''
+    while value:
+        value, remainder = divmod(value, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    
+    # Each leading zero byte is written as a leading '1'
+    padding = len(data) - len(data.lstrip(b'\0'))
+    return '1' * padding + encoded
+
+
+def mnemonic_to_seed(seed_phrase: str, passphrase: str = '') -> bytes:
+    """BIP39 seed from a mnemonic phrase"""
+    phrase = unicodedata.normalize('NFKD', ' '.join(seed_phrase.split()))
+    salt = unicodedata.normalize('NFKD', 'mnemonic' + passphrase)
+    return hashlib.pbkdf2_hmac('sha512', phrase.encode('utf-8'), salt.encode('utf-8'), 2048)
+
+
+class ExtendedKey:
+    """A BIP32 extended private or public key"""
+    
+    def __init__(self, chain_code: bytes, private_key: Optional[int] = None,
+                 public_point: Optional[Tuple[int, int]] = None, depth: int = 0):
+        self.chain_code = chain_code
+        self.private_key = private_key
+        self.depth = depth
+        self._public_point = public_point
+    
+    @classmethod
+    def from_seed(cls, seed: bytes) -> 'ExtendedKey':
+        """Master key of a BIP32 tree"""
+        digest = hmac.new(b'Bitcoin seed', seed, hashlib.sha512).digest()
+        key = int.from_bytes(digest[:32], 'big')
+        if not 0 < key < N:
+            raise ValueError("Invalid master key, use another seed")
+        return cls(digest[32:], private_key=key)
+    
+    @property
+    def public_point(self) -> Tuple[int, int]:
+        if self._public_point is None:
+            self._public_point = point_multiply_g(self.private_key)
+        return self._public_point
+    
+    @property
+    def public_key(self) -> bytes:
+        return compress_point(self.public_point)
+    
+    def neuter(self) -> 'ExtendedKey':
+        """The public half of this key, able to derive non-hardened children only"""
+        return ExtendedKey(self.chain_code, public_point=self.public_point, depth=self.depth)
+    
+    def child(self, index: int) -> 'ExtendedKey':
+        """Derive a child key (hardened if index >= 2^31)"""
+        if index >= HARDENED:
+            if self.private_key is None:
+                raise ValueError("Cannot derive a hardened child from a public key")
+            data = b'\0' + self.private_key.to_bytes(32, 'big')
+        else:
+            data = self.public_key
+        
+        digest = hmac.new(self.chain_code, data + struct.pack('>I', index), hashlib.sha512).digest()
+        tweak = int.from_bytes(digest[:32], 'big')
+        if tweak >= N:
+            raise ValueError(f"Invalid child key at index {index}")
+        
+        if self.private_key is not None:
+            key = (self.private_key + tweak) % N
+            if not key:
+                raise ValueError(f"Invalid child key at index {index}")
+            return ExtendedKey(digest[32:], private_key=key, depth=self.depth + 1)
+        
+        point = point_add(point_multiply_g(tweak), self.public_point)
+        return ExtendedKey(digest[32:], public_point=point, depth=self.depth + 1)
+    
+    def derive_path(self, path: str) -> 'ExtendedKey':
+        """Derive a descendant from a path such as m/44'/0'/0'/0/0"""
+        key = self
+        for part in path.split('/'):
+            if part in ('m', 'M', ''):
+                continue
+            if part[-1] in "'hH":
+                key = key.child(int(part[:-1]) + HARDENED)
+            else:
+                key = key.child(int(part))
+        return key
+    
+    def address(self, pubkey_version: int) -> str:
+        """P2PKH address of this key's compressed public key"""
+        return base58check_encode(bytes([pubkey_version]) + hash160(self.public_key))
+    
+    def wif(self, wif_version: int) -> str:
+        """Private key in wallet import format, flagged as compressed"""
+        if self.private_key is None:
+            raise ValueError("A public key has no WIF")
+        return base58check_encode(bytes([wif_version]) + self.private_key.to_bytes(32, 'big') + b'\x01')
+
+
+def get_hd_config(config: dict, coin_symbol: str) -> Optional[Dict[str, int]]:
+    """BIP44 coin type and key versions of a coin, or None if local derivation is off"""
+    hd_config = config['coins'].get(coin_symbol, {}).get('hd')
+    if not hd_config or not hd_config.get('enabled', False):
+        return None
+    
+    pubkey_version = int(hd_config['pubkey_version'])
+    return {
+        'coin_type': int(hd_config['coin_type']),
+        'pubkey_version': pubkey_version,
+        # Most coins follow Bitcoin in putting the secret key version 128 above the address version
+        'wif_version': int(hd_config.get('wif_version', (pubkey_version + 128) % 256)),
+        'account': int(hd_config.get('account', 0))
+    }
+
+
+def bip44_path(hd_config: Dict[str, int], index: int = 0) -> str:
+    return f"m/44'/{hd_config['coin_type']}'/{hd_config['account']}'/0/{index}"
+
+
+def derive_address(master: ExtendedKey, hd_config: Dict[str, int], index: int = 0) -> Tuple[str, str]:
+    """Receive address at a BIP44 index, returned with its derivation path"""
+    path = bip44_path(hd_config, index)
+    return master.derive_path(path).address(hd_config['pubkey_version']), path
+
+
+def derive_key(master: ExtendedKey, hd_config: Dict[str, int], index: int = 0) -> Tuple[str, str, str]:
+    """Receive address at a BIP44 index with its WIF private key and derivation path"""
+    path = bip44_path(hd_config, index)
+    key = master.derive_path(path)
+    return key.address(hd_config['pubkey_version']), key.wif(hd_config['wif_version']), path
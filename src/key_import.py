@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Key Importer - Registers the private keys of locally derived addresses with the coin daemons in batches
+Powered By Aegisum EcoSystem
+"""
+
+import asyncio
+import logging
+import sqlite3
+from typing import List, Optional
+
+from coin_interface import is_method_missing
+from daemon_scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+
+class KeyImporter:
+    """Queue derived keys and import them so the daemon can spend their deposits"""
+    
+    def __init__(self, config: dict, db_path: str, coin_interface, cipher):
+        self.config = config
+        self.db_path = db_path
+        self.coin_interface = coin_interface
+        # Keys wait in the database encrypted, and are erased once the daemon has them
+        self.cipher = cipher
+        
+        import_config = config.get('key_import', {})
+        self.batch_size = import_config.get('batch_size', 100)
+        self.flush_interval = import_config.get('flush_interval', 30)
+        
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        
+        self._init_table()
+    
+    def _init_table(self):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        # rescan_from is the block height a restored seed's history starts at; NULL for new keys
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS hd_key_imports (
+                address TEXT PRIMARY KEY,
+                coin_symbol TEXT NOT NULL,
+                label TEXT NOT NULL,
+                encrypted_key TEXT,
+                rescan_from INTEGER,
+                imported BOOLEAN DEFAULT FALSE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_hd_key_imports_pending
+            ON hd_key_imports(coin_symbol, imported)
+        ''')
+        
+        conn.commit()
+        conn.close()
+    
+    def start(self):
+        """Start the background importer"""
+        if self.task is None:
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background importer"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+    
+    def queue(self, coin_symbol: str, address: str, private_key: str, label: str,
+              rescan_from: Optional[int] = None):
+        """Queue a WIF key for import; pass rescan_from for a restored seed that may have history"""
+        encrypted_key = self.cipher.encrypt(private_key.encode()).decode()
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT OR REPLACE INTO hd_key_imports (address, coin_symbol, label, encrypted_key, rescan_from)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (address, coin_symbol, label, encrypted_key, rescan_from))
+        conn.commit()
+        conn.close()
+        
+        self.start()
+        self.wakeup.set()
+    
+    def count_pending(self, coin_symbol: str) -> int:
+        """Keys still waiting to be imported"""
+        conn = sqlite3.connect(self.db_path)
+        count = conn.execute('''
+            SELECT COUNT(*) FROM hd_key_imports WHERE coin_symbol = ? AND NOT imported
+        ''', (coin_symbol,)).fetchone()[0]
+        conn.close()
+        return count
+    
+    async def _run(self):
+        while True:
+            for coin_symbol in self.coin_interface.get_supported_coins():
+                if not self.coin_interface.is_coin_available(coin_symbol):
+                    continue
+                try:
+                    await self.flush(coin_symbol)
+                except Exception as e:
+                    logger.error(f"Error importing {coin_symbol} derived keys: {e}")
+            
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+    
+    async def flush(self, coin_symbol: str) -> int:
+        """Import every pending key of a coin, one call per batch_size keys, rescanning restored seeds once"""
+        imported = 0
+        while True:
+            pending = self._get_pending(coin_symbol)
+            if not pending:
+                return imported
+            
+            done = await self._import_keys(coin_symbol, pending)
+            if not done:
+                return imported
+            
+            # Restored seeds may have received coins before; new keys have no history
+            heights = [rescan_from for address, _, _, rescan_from in pending
+                       if address in done and rescan_from is not None]
+            if heights and not await self._rescan(coin_symbol, min(heights), pending):
+                # The keys are in the wallet, but restored ones stay queued until a rescan succeeds
+                done = [address for address, _, _, rescan_from in pending
+                        if address in done and rescan_from is None]
+            
+            self._mark_imported(done)
+            imported += len(done)
+            logger.info(f"Imported {len(done)} {coin_symbol} derived keys")
+            if len(done) < len(pending):
+                return imported
+    
+    async def _import_keys(self, coin_symbol: str, pending: List[tuple]) -> List[str]:
+        """Import keys without rescanning; returns the addresses imported"""
+        keys = [self.cipher.decrypt(encrypted_key.encode()).decode() for _, _, encrypted_key, _ in pending]
+        result = await self.coin_interface.call(coin_symbol, 'importmulti', [
+            [
+                {'scriptPubKey': {'address': address}, 'keys': [key], 'label': label, 'timestamp': 'now'}
+                for (address, label, _, _), key in zip(pending, keys)
+            ],
+            {'rescan': False}
+        ], Priority.BACKGROUND)
+        
+        if result['success']:
+            outcomes = [outcome.get('success', False) for outcome in result['result']]
+        elif is_method_missing(result):
+            results = await self.coin_interface.batch(
+                coin_symbol,
+                [('importprivkey', [key, label, False]) for (_, label, _, _), key in zip(pending, keys)],
+                Priority.BACKGROUND
+            )
+            outcomes = [r['success'] for r in results]
+            result = next((r for r in results if not r['success']), result)
+        else:
+            outcomes = [False] * len(pending)
+        
+        done = [address for (address, _, _, _), ok in zip(pending, outcomes) if ok]
+        if len(done) < len(pending):
+            logger.error(f"Failed to import {len(pending) - len(done)} {coin_symbol} derived keys: "
+                         f"{result.get('error')}")
+        return done
+    
+    async def _rescan(self, coin_symbol: str, start_height: int, pending: List[tuple]) -> bool:
+        """Rescan once from the oldest restored seed's birth height"""
+        result = await self.coin_interface.call(
+            coin_symbol, 'rescanblockchain', [start_height], Priority.BACKGROUND
+        )
+        if not result['success'] and is_method_missing(result):
+            # Older daemons only rescan as part of an import, and always from genesis
+            _, label, encrypted_key, _ = next(row for row in pending if row[3] is not None)
+            result = await self.coin_interface.call(
+                coin_symbol, 'importprivkey',
+                [self.cipher.decrypt(encrypted_key.encode()).decode(), label, True],
+                Priority.BACKGROUND
+            )
+        
+        if not result['success']:
+            logger.error(f"Failed to rescan {coin_symbol} from height {start_height}: {result['error']}")
+            return False
+        return True
+    
+    def _get_pending(self, coin_symbol: str) -> List[tuple]:
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('''
+            SELECT address, label, encrypted_key, rescan_from FROM hd_key_imports
+            WHERE coin_symbol = ? AND NOT imported
+            ORDER BY created_at
+            LIMIT ?
+        ''', (coin_symbol, self.batch_size)).fetchall()
+        conn.close()
+        return rows
+    
+    def _mark_imported(self, addresses: List[str]):
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany('''
+            UPDATE hd_key_imports SET imported = TRUE, encrypted_key = NULL WHERE address = ?
+        ''', [(address,) for address in addresses])
+        conn.commit()
+        conn.close()
@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+Ledger - Double-entry internal ledger for off-chain balances, in integer base units
+Powered By Aegisum EcoSystem
+"""
+
+import logging
+import sqlite3
+from decimal import Decimal, ROUND_DOWN
+from typing import Callable, Dict, List, Optional, Tuple
+
+from coin_interface import is_method_missing
+from daemon_scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+# User accounts, one per balance column of the user_balances table
+USER_PREFIX = 'user:'        # available, spendable
+PENDING_PREFIX = 'pending:'  # deposits waiting for confirmations
+LOCKED_PREFIX = 'locked:'    # withdrawals taken from the user but not sent yet
+
+USER_COLUMNS = {USER_PREFIX: 'available', PENDING_PREFIX: 'pending', LOCKED_PREFIX: 'locked'}
+
+# System accounts; unlike user accounts they may go negative
+DEPOSITS_ACCOUNT = 'deposits'          # coins that came in from the chain
+INCOMING_ACCOUNT = 'incoming'          # unconfirmed deposits
+WITHDRAWALS_ACCOUNT = 'withdrawals'    # coins sent out to the chain
+NETWORK_FEES_ACCOUNT = 'network_fees'  # network fees paid by withdrawals
+FEES_ACCOUNT = 'fees'                  # the bot's withdrawal fees
+FAUCET_ACCOUNT = 'faucet'              # faucet payouts
+OPENING_ACCOUNT = 'opening'            # balances carried over from daemon accounts
+
+
+class LedgerError(Exception):
+    """A ledger transfer could not be applied"""
+
+
+class InsufficientFundsError(LedgerError):
+    """A transfer would take a user account below zero"""
+
+
+def to_units(amount: float, decimals: int) -> int:
+    """Coin amount to integer base units, rounding down"""
+    return int((Decimal(str(amount)) * (10 ** decimals)).to_integral_value(rounding=ROUND_DOWN))
+
+
+def from_units(units: int, decimals: int) -> float:
+    """Integer base units to a coin amount"""
+    return float(Decimal(units) / (10 ** decimals))
+
+
+def user_account(user_id: int) -> str:
+    return f"{USER_PREFIX}{user_id}"
+
+
+def pending_account(user_id: int) -> str:
+    return f"{PENDING_PREFIX}{user_id}"
+
+
+def locked_account(user_id: int) -> str:
+    return f"{LOCKED_PREFIX}{user_id}"
+
+
+def split_user_account(account: str) -> Optional[Tuple[int, str]]:
+    """User id and user_balances column of a user account, or None for system accounts"""
+    prefix, _, user_id = account.partition(':')
+    column = USER_COLUMNS.get(prefix + ':')
+    return (int(user_id), column) if column else None
+
+
+class Ledger:
+    """Per-user, per-coin balances kept in the bot database; every change is a balanced transfer"""
+    
+    def __init__(self, config: dict, database):
+        self.config = config
+        self.db = database
+        
+        # First block height whose deposits are not already in a coin's opening balances
+        self.first_credit_heights: Dict[str, int] = {}
+    
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return self.db.connection
+    
+    def initialize(self):
+        """Create the ledger tables; call after the database is initialized"""
+        cursor = self.connection.cursor()
+        
+        # One row per atomic transfer
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ledger_transfers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                coin_symbol TEXT NOT NULL,
+                reference TEXT UNIQUE,
+                memo TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Signed postings; the entries of a transfer always sum to zero
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ledger_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transfer_id INTEGER NOT NULL,
+                account TEXT NOT NULL,
+                coin_symbol TEXT NOT NULL,
+                amount INTEGER NOT NULL,
+                FOREIGN KEY (transfer_id) REFERENCES ledger_transfers (id)
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_ledger_entries_account
+            ON ledger_entries(account, coin_symbol)
+        ''')
+        
+        # Running balance of every system account, updated in the same transaction as its entries
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ledger_balances (
+                account TEXT NOT NULL,
+                coin_symbol TEXT NOT NULL,
+                balance INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (account, coin_symbol)
+            )
+        ''')
+        
+        # Running balances of every user, so /balance is a single indexed read
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_balances (
+                user_id INTEGER NOT NULL,
+                coin_symbol TEXT NOT NULL,
+                available INTEGER NOT NULL DEFAULT 0,
+                pending INTEGER NOT NULL DEFAULT 0,
+                locked INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, coin_symbol)
+            )
+        ''')
+        
+        # User balances used to be kept with the system accounts
+        cursor.execute('''
+            INSERT OR IGNORE INTO user_balances (user_id, coin_symbol, available)
+            SELECT CAST(substr(account, ?) AS INTEGER), coin_symbol, balance
+            FROM ledger_balances WHERE account LIKE ?
+        ''', (len(USER_PREFIX) + 1, USER_PREFIX + '%'))
+        cursor.execute('DELETE FROM ledger_balances WHERE account LIKE ?', (USER_PREFIX + '%',))
+        
+        # Coins whose daemon account balances have been carried over
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ledger_coins (
+                coin_symbol TEXT PRIMARY KEY,
+                first_credit_height INTEGER NOT NULL,
+                opened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        self.connection.commit()
+        
+        cursor.execute('SELECT coin_symbol, first_credit_height FROM ledger_coins')
+        self.first_credit_heights = {row[0]: row[1] for row in cursor.fetchall()}
+    
+    def decimals(self, coin_symbol: str) -> int:
+        return self.config['coins'][coin_symbol].get('decimals', 8)
+    
+    # Transfers
+    
+    def _apply(self, coin_symbol: str, kind: str, postings: List[Tuple[str, int]],
+               reference: Optional[str] = None, memo: Optional[str] = None) -> int:
+        """Write a transfer inside the caller's transaction"""
+        merged: Dict[str, int] = {}
+        for account, units in postings:
+            merged[account] = merged.get(account, 0) + units
+        
+        if sum(merged.values()) != 0:
+            raise LedgerError(f"Unbalanced {kind} transfer for {coin_symbol}")
+        
+        cursor = self.connection.cursor()
+        cursor.execute('''
+            INSERT INTO ledger_transfers (kind, coin_symbol, reference, memo)
+            VALUES (?, ?, ?, ?)
+        ''', (kind, coin_symbol, reference, memo))
+        transfer_id = cursor.lastrowid
+        
+        entries = [(transfer_id, account, coin_symbol, units) for account, units in merged.items() if units]
+        cursor.executemany('''
+            INSERT INTO ledger_entries (transfer_id, account, coin_symbol, amount)
+            VALUES (?, ?, ?, ?)
+        ''', entries)
+        
+        system_entries = []
+        user_entries = []
+        for _, account, _, units in entries:
+            user = split_user_account(account)
+            if user:
+                user_entries.append((user[0], user[1], units))
+            else:
+                system_entries.append((units, account, coin_symbol))
+        
+        cursor.executemany('''
+            INSERT OR IGNORE INTO ledger_balances (account, coin_symbol) VALUES (?, ?)
+        ''', [(account, coin) for _, account, coin in system_entries])
+        cursor.executemany('''
+            UPDATE ledger_balances SET balance = balance + ? WHERE account = ? AND coin_symbol = ?
+        ''', system_entries)
+        
+        cursor.executemany('''
+            INSERT OR IGNORE INTO user_balances (user_id, coin_symbol) VALUES (?, ?)
+        ''', [(user_id, coin_symbol) for user_id, _, _ in user_entries])
+        
+        for column in USER_COLUMNS.values():
+            credits = [(units, user_id, coin_symbol) for user_id, col, units in user_entries if col == column and units > 0]
+            debits = [(units, user_id, coin_symbol, units) for user_id, col, units in user_entries if col == column and units < 0]
+            
+            cursor.executemany(f'''
+                UPDATE user_balances SET {column} = {column} + ?, updated_at = CURRENT_TIMESTAMP
+                WHERE user_id = ? AND coin_symbol = ?
+            ''', credits)
+            
+            # User balances never go below zero
+            for units, user_id, _, _ in debits:
+                cursor.execute(f'''
+                    UPDATE user_balances SET {column} = {column} + ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE user_id = ? AND coin_symbol = ? AND {column} + ? >= 0
+                ''', (units, user_id, coin_symbol, units))
+                
+                if cursor.rowcount == 0:
+                    raise InsufficientFundsError(f"Insufficient {coin_symbol} {column} balance for user {user_id}")
+        
+        return transfer_id
+    
+    def transfer(self, coin_symbol: str, kind: str, postings: List[Tuple[str, int]],
+                 reference: Optional[str] = None, memo: Optional[str] = None,
+                 on_applied: Optional[Callable[[sqlite3.Cursor, int], None]] = None) -> Optional[int]:
+        """Apply a balanced transfer atomically; None if its reference was already applied
+        
+        on_applied(cursor, transfer_id) runs in the same transaction, for records that must
+        be written or rolled back together with the transfer.
+        """
+        try:
+            with self.connection:
+                transfer_id = self._apply(coin_symbol, kind, postings, reference, memo)
+                if on_applied:
+                    on_applied(self.connection.cursor(), transfer_id)
+                return transfer_id
+        except sqlite3.IntegrityError:
+            if reference is not None:
+                return None
+            raise
+    
+    def tip(self, from_user_id: int, to_user_id: int, coin_symbol: str, amount: float) -> int:
+        """Move coins between two users"""
+        units = to_units(amount, self.decimals(coin_symbol))
+        if units <= 0:
+            raise LedgerError("Tip amount must be positive")
+        
+        return self.transfer(coin_symbol, 'tip', [
+            (user_account(from_user_id), -units),
+            (user_account(to_user_id), units)
+        ])
+    
+    def faucet(self, user_id: int, coin_symbol: str, amount: float) -> int:
+        """Credit a faucet payout"""
+        units = to_units(amount, self.decimals(coin_symbol))
+        return self.transfer(coin_symbol, 'faucet', [
+            (FAUCET_ACCOUNT, -units),
+            (user_account(user_id), units)
+        ])
+    
+    def record_pending_deposit(self, user_id: int, coin_symbol: str, amount: float,
+                               tx_id: str, vout: int, address: str) -> Optional[int]:
+        """Show an unconfirmed deposit output as pending; None if it was already recorded"""
+        units = to_units(amount, self.decimals(coin_symbol))
+        return self.transfer(coin_symbol, 'pending_deposit', [
+            (INCOMING_ACCOUNT, -units),
+            (pending_account(user_id), units)
+        ], reference=f"pending:{coin_symbol}:{tx_id}:{vout}:{address}")
+    
+    def credit_deposit(self, user_id: int, coin_symbol: str, amount: float, tx_id: str, vout: int,
+                       address: str) -> Optional[int]:
+        """Credit a confirmed deposit output once, clearing it from pending; None if it was already credited"""
+        units = to_units(amount, self.decimals(coin_symbol))
+        postings = [
+            (DEPOSITS_ACCOUNT, -units),
+            (user_account(user_id), units)
+        ]
+        
+        if self._has_reference(f"pending:{coin_symbol}:{tx_id}:{vout}:{address}"):
+            postings += [
+                (pending_account(user_id), -units),
+                (INCOMING_ACCOUNT, units)
+            ]
+        
+        return self.transfer(coin_symbol, 'deposit', postings,
+                             reference=f"deposit:{coin_symbol}:{tx_id}:{vout}:{address}")
+    
+    def debit_withdrawal(self, user_id: int, coin_symbol: str, amount: float, fee: float, network_fee: float,
+                         address: str, on_applied: Optional[Callable[[sqlite3.Cursor, int], None]] = None) -> int:
+        """Lock a withdrawal and its fees away from a user's available balance before it is sent"""
+        decimals = self.decimals(coin_symbol)
+        total = to_units(amount, decimals) + to_units(fee, decimals) + to_units(network_fee, decimals)
+        
+        return self.transfer(coin_symbol, 'withdrawal', [
+            (user_account(user_id), -total),
+            (locked_account(user_id), total)
+        ], memo=address, on_applied=on_applied)
+    
+    def complete_withdrawal(self, transfer_id: int, amount: float, fee: float, network_fee: float,
+                            tx_id: str, network_fee_paid: Optional[float] = None) -> Optional[int]:
+        """Release a locked withdrawal once the daemon has sent it
+        
+        If less network fee was paid than was locked, the difference goes back to the user.
+        """
+        coin_symbol, postings = self._withdrawal_sent_postings(transfer_id, amount, fee, network_fee, network_fee_paid)
+        return self.transfer(coin_symbol, 'withdrawal_sent', postings, reference=f"withdrawal:{transfer_id}",
+                             memo=tx_id)
+    
+    def complete_withdrawals(self, withdrawals: List[Dict], tx_id: str,
+                             on_applied: Optional[Callable[[sqlite3.Cursor], None]] = None) -> List[int]:
+        """Release withdrawals sent together in one transaction, all or none
+        
+        Each withdrawal has transfer_id, amount, fee, network_fee and network_fee_paid;
+        on_applied(cursor) runs in the same transaction.
+        """
+        with self.connection:
+            transfer_ids = []
+            for withdrawal in withdrawals:
+                coin_symbol, postings = self._withdrawal_sent_postings(
+                    withdrawal['transfer_id'], withdrawal['amount'], withdrawal['fee'], withdrawal['network_fee'],
+                    withdrawal['network_fee_paid']
+                )
+                transfer_ids.append(self._apply(coin_symbol, 'withdrawal_sent', postings,
+                                                reference=f"withdrawal:{withdrawal['transfer_id']}", memo=tx_id))
+            if on_applied:
+                on_applied(self.connection.cursor())
+            return transfer_ids
+    
+    def _withdrawal_sent_postings(self, transfer_id: int, amount: float, fee: float, network_fee: float,
+                                  network_fee_paid: Optional[float]) -> Tuple[str, List[Tuple[str, int]]]:
+        cursor = self.connection.cursor()
+        cursor.execute('''
+            SELECT account, coin_symbol, amount FROM ledger_entries
+            WHERE transfer_id = ? AND account LIKE ?
+        ''', (transfer_id, LOCKED_PREFIX + '%'))
+        row = cursor.fetchone()
+        if not row:
+            raise LedgerError(f"Unknown withdrawal {transfer_id}")
+        
+        account, coin_symbol, total = row
+        decimals = self.decimals(coin_symbol)
+        units = to_units(amount, decimals)
+        fee_units = to_units(fee, decimals)
+        network_fee_units = to_units(network_fee, decimals)
+        if units + fee_units + network_fee_units != total:
+            raise LedgerError(f"Withdrawal {transfer_id} does not match its locked amount")
+        
+        paid_units = network_fee_units
+        if network_fee_paid is not None:
+            paid_units = min(network_fee_units, to_units(network_fee_paid, decimals))
+        
+        postings = [
+            (account, -total),
+            (WITHDRAWALS_ACCOUNT, units),
+            (FEES_ACCOUNT, fee_units),
+            (NETWORK_FEES_ACCOUNT, paid_units)
+        ]
+        if paid_units < network_fee_units:
+            postings.append((user_account(split_user_account(account)[0]), network_fee_units - paid_units))
+        return coin_symbol, postings
+    
+    def reverse(self, transfer_id: int, kind: str = 'reversal') -> int:
+        """Undo a transfer, e.g. a withdrawal the daemon refused"""
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT coin_symbol FROM ledger_transfers WHERE id = ?', (transfer_id,))
+        row = cursor.fetchone()
+        if not row:
+            raise LedgerError(f"Unknown transfer {transfer_id}")
+        
+        cursor.execute('SELECT account, amount FROM ledger_entries WHERE transfer_id = ?', (transfer_id,))
+        postings = [(account, -amount) for account, amount in cursor.fetchall()]
+        
+        return self.transfer(row[0], kind, postings, reference=f"reverse:{transfer_id}")
+    
+    def _has_reference(self, reference: str) -> bool:
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT 1 FROM ledger_transfers WHERE reference = ?', (reference,))
+        return cursor.fetchone() is not None
+    
+    # Balances
+    
+    def get_balance_units(self, account: str, coin_symbol: str) -> int:
+        cursor = self.connection.cursor()
+        user = split_user_account(account)
+        if user:
+            cursor.execute(f'''
+                SELECT {user[1]} FROM user_balances WHERE user_id = ? AND coin_symbol = ?
+            ''', (user[0], coin_symbol))
+        else:
+            cursor.execute('''
+                SELECT balance FROM ledger_balances WHERE account = ? AND coin_symbol = ?
+            ''', (account, coin_symbol))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    
+    def get_balance(self, user_id: int, coin_symbol: str) -> float:
+        """A user's available balance of one coin"""
+        return from_units(self.get_balance_units(user_account(user_id), coin_symbol), self.decimals(coin_symbol))
+    
+    def get_balances(self, user_id: int) -> Dict[str, Dict[str, float]]:
+        """Available, pending and locked balances of every coin a user has held"""
+        cursor = self.connection.cursor()
+        cursor.execute('''
+            SELECT coin_symbol, available, pending, locked FROM user_balances WHERE user_id = ?
+        ''', (user_id,))
+        
+        balances = {}
+        for coin_symbol, available, pending, locked in cursor.fetchall():
+            if coin_symbol not in self.config['coins']:
+                continue
+            decimals = self.decimals(coin_symbol)
+            balances[coin_symbol] = {
+                'available': from_units(available, decimals),
+                'pending': from_units(pending, decimals),
+                'locked': from_units(locked, decimals)
+            }
+        return balances
+    
+    # Reconciliation
+    
+    def get_liabilities_units(self, coin_symbol: str) -> int:
+        """What the bot owes its users in a coin: available plus locked, in base units"""
+        cursor = self.connection.cursor()
+        cursor.execute('''
+            SELECT COALESCE(SUM(available + locked), 0) FROM user_balances WHERE coin_symbol = ?
+        ''', (coin_symbol,))
+        return cursor.fetchone()[0]
+    
+    def get_user_ids(self, coin_symbol: str, after_user_id: int, limit: int) -> List[int]:
+        """Next users holding a coin, in user id order, for walking them in partitions"""
+        cursor = self.connection.cursor()
+        cursor.execute('''
+            SELECT user_id FROM user_balances
+            WHERE user_id > ? AND coin_symbol = ?
+            ORDER BY user_id
+            LIMIT ?
+        ''', (after_user_id, coin_symbol, limit))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def _user_entries(self, coin_symbol: str, user_ids: List[int], columns: str, join: str = '',
+                      where: str = '') -> List[tuple]:
+        """Entry rows of the given users' accounts, in chunks that fit SQLite's parameter limit"""
+        cursor = self.connection.cursor()
+        rows = []
+        for start in range(0, len(user_ids), 300):
+            accounts = [
+                prefix + str(user_id)
+                for user_id in user_ids[start:start + 300] for prefix in USER_COLUMNS
+            ]
+            cursor.execute(f'''
+                SELECT {columns} FROM ledger_entries e {join}
+                WHERE e.coin_symbol = ? AND e.account IN ({','.join('?' * len(accounts))}) {where}
+                GROUP BY 1
+            ''', [coin_symbol] + accounts)
+            rows += cursor.fetchall()
+        return rows
+    
+    def find_balance_mismatches(self, coin_symbol: str, user_ids: List[int]) -> List[Dict[str, int]]:
+        """Users whose running balance rows disagree with the sum of their ledger entries"""
+        journal = dict(self._user_entries(coin_symbol, user_ids, 'e.account, SUM(e.amount)'))
+        
+        cursor = self.connection.cursor()
+        mismatches = []
+        for start in range(0, len(user_ids), 900):
+            chunk = user_ids[start:start + 900]
+            cursor.execute(f'''
+                SELECT user_id, available, pending, locked FROM user_balances
+                WHERE coin_symbol = ? AND user_id IN ({','.join('?' * len(chunk))})
+            ''', [coin_symbol] + chunk)
+            for user_id, *row in cursor.fetchall():
+                for (prefix, column), balance in zip(USER_COLUMNS.items(), row):
+                    entries = journal.get(prefix + str(user_id), 0)
+                    if balance != entries:
+                        mismatches.append({
+                            'user_id': user_id, 'account': column, 'balance': balance, 'entries': entries
+                        })
+        return mismatches
+    
+    def get_deposit_credits(self, coin_symbol: str, user_ids: List[int]) -> Dict[str, int]:
+        """Confirmed deposits credited to the given users, in base units per deposit address"""
+        rows = self._user_entries(
+            coin_symbol, user_ids, 't.reference, SUM(e.amount)',
+            join='JOIN ledger_transfers t ON t.id = e.transfer_id',
+            where=f"AND t.kind = 'deposit' AND e.account LIKE '{USER_PREFIX}%'"
+        )
+        
+        credits: Dict[str, int] = {}
+        for reference, units in rows:
+            # deposit:<coin>:<txid>:<vout>:<address>
+            address = reference.split(':', 4)[4]
+            credits[address] = credits.get(address, 0) + units
+        return credits
+    
+    # Carrying over daemon account balances
+    
+    def is_open(self, coin_symbol: str) -> bool:
+        """Whether the coin's daemon balances have been carried into the ledger"""
+        return coin_symbol in self.first_credit_heights
+    
+    def should_credit_deposit(self, coin_symbol: str, block_height: int) -> bool:
+        """Whether a deposit mined at this height is not already part of the opening balances"""
+        first_height = self.first_credit_heights.get(coin_symbol)
+        return first_height is not None and block_height >= first_height
+    
+    async def open_coin(self, coin_symbol: str, coin_interface) -> bool:
+        """Carry a coin's per-user daemon account balances into the ledger, once"""
+        if self.is_open(coin_symbol):
+            return True
+        
+        min_confirmations = self.config['coins'][coin_symbol].get('min_confirmations', 1)
+        
+        # Read the heights around listaccounts so the cut-off block is known exactly;
+        # watch-only funds are left out, as the wallet cannot spend them
+        before = await coin_interface.call(coin_symbol, 'getblockcount', [], Priority.BACKGROUND)
+        accounts = await coin_interface.call(
+            coin_symbol, 'listaccounts', [min_confirmations, False], Priority.BACKGROUND
+        )
+        after = await coin_interface.call(coin_symbol, 'getblockcount', [], Priority.BACKGROUND)
+        
+        if not before['success'] or not after['success'] or before['result'] != after['result']:
+            return False
+        
+        if accounts['success']:
+            balances = accounts['result'] or {}
+        elif is_method_missing(accounts):
+            # Daemons without accounts have nothing to carry over
+            balances = {}
+        else:
+            logger.error(f"Failed to list {coin_symbol} accounts: {accounts['error']}")
+            return False
+        
+        decimals = self.decimals(coin_symbol)
+        postings = []
+        for account, balance in balances.items():
+            if not account.startswith('user_') or not account[5:].isdigit():
+                continue
+            units = to_units(balance, decimals)
+            if units > 0:
+                postings.append((user_account(int(account[5:])), units))
+        postings.append((OPENING_ACCOUNT, -sum(units for _, units in postings)))
+        
+        # Deposits with enough confirmations at this height are in the listed balances
+        first_credit_height = before['result'] - min_confirmations + 2
+        
+        with self.connection:
+            self._apply(coin_symbol, 'opening', postings, reference=f"opening:{coin_symbol}")
+            self.connection.execute('''
+                INSERT INTO ledger_coins (coin_symbol, first_credit_height) VALUES (?, ?)
+            ''', (coin_symbol, first_credit_height))
+        
+        self.first_credit_heights[coin_symbol] = first_credit_height
+        logger.info(f"Opened {coin_symbol} ledger with {len(postings) - 1} user balances at height {before['result']}")
+        return True
+    
+    async def open_coins(self, coin_interface):
+        """Open every enabled coin whose daemon is reachable"""
+        for coin_symbol in coin_interface.get_supported_coins():
+            if self.is_open(coin_symbol) or not coin_interface.is_coin_available(coin_symbol):
+                continue
+            try:
+                await self.open_coin(coin_symbol, coin_interface)
+            except Exception as e:
+                logger.error(f"Failed to open {coin_symbol} ledger: {e}")
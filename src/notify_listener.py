@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Notify Listener - Receives walletnotify and blocknotify pushes from the coin daemons
+Powered By Aegisum EcoSystem
+"""
+
+import asyncio
+import logging
+import os
+import re
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# One line per connection: "<coin> <wallet|block> <hash>"
+NOTIFY_KINDS = ('wallet', 'block')
+HASH_PATTERN = re.compile(r'^[0-9a-fA-F]{64}$')
+MAX_LINE_BYTES = 256
+
+
+class NotifyListener:
+    """Local UNIX socket that wakes the transaction monitor when a daemon reports a transaction or block"""
+    
+    def __init__(self, config: dict, transaction_monitor):
+        self.config = config
+        self.transaction_monitor = transaction_monitor
+        
+        notify_config = config.get('notify', {})
+        self.enabled = notify_config.get('enabled', False)
+        self.socket_path = notify_config.get('socket_path', 'data/notify.sock')
+        
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start listening for daemon notifications"""
+        if self.enabled and self.task is None:
+            self.task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop listening and remove the socket"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+            self._remove_socket()
+    
+    def _remove_socket(self):
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+    
+    async def _run(self):
+        try:
+            # A socket left behind by a previous run would make the bind fail
+            self._remove_socket()
+            os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+            
+            self.server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+            # Daemons running as another user of the bot's group may write to it
+            os.chmod(self.socket_path, 0o660)
+            logger.info(f"Listening for daemon notifications on {self.socket_path}")
+            
+            await self.server.serve_forever()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Daemon notification listener failed, relying on polling: {e}")
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            line = await asyncio.wait_for(reader.readline(), 5)
+            if len(line) > MAX_LINE_BYTES:
+                logger.warning("Ignoring oversized daemon notification")
+                return
+            self.handle_line(line.decode(errors='replace'))
+        except asyncio.TimeoutError:
+            pass
+        except Exception as e:
+            logger.error(f"Error reading daemon notification: {e}")
+        finally:
+            writer.close()
+    
+    def handle_line(self, line: str) -> bool:
+        """Pass one notification line to the monitor; returns whether it was valid"""
+        parts = line.split()
+        if len(parts) != 3:
+            logger.warning(f"Ignoring malformed daemon notification: {line.strip()!r}")
+            return False
+        
+        coin_symbol, kind, item_hash = parts[0].upper(), parts[1].lower(), parts[2]
+        if coin_symbol not in self.transaction_monitor.coin_interface.get_supported_coins():
+            logger.warning(f"Ignoring daemon notification for unknown coin {coin_symbol}")
+            return False
+        if kind not in NOTIFY_KINDS or not HASH_PATTERN.match(item_hash):
+            logger.warning(f"Ignoring malformed daemon notification: {line.strip()!r}")
+            return False
+        
+        self.transaction_monitor.notify(coin_symbol, kind, item_hash)
+        return True
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Rain Settlement - Splits a rain to the base unit and settles it in one ledger transaction
+Powered By Aegisum EcoSystem
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from ledger import LedgerError, from_units, to_units, user_account
+
+logger = logging.getLogger(__name__)
+
+
+def split_rain(total_units: int, recipient_ids: List[int]) -> List[Tuple[int, int]]:
+    """Equal shares of total_units; the remainder goes one unit each to the lowest user ids"""
+    recipients = sorted(set(recipient_ids))
+    share, dust = divmod(total_units, len(recipients))
+    return [(user_id, share + 1 if index < dust else share) for index, user_id in enumerate(recipients)]
+
+
+class RainSettlement:
+    """Pays every rain recipient, debits the sender and records the rain in a single transaction"""
+    
+    def __init__(self, config: dict, ledger):
+        self.config = config
+        self.ledger = ledger
+    
+    def settle(self, sender_id: int, coin_symbol: str, total_amount: float, recipient_ids: List[int],
+               chat_id: Optional[int] = None) -> Dict[str, Any]:
+        """Distribute the whole amount; returns the rain id and each recipient's share"""
+        recipients = {user_id for user_id in recipient_ids if user_id != sender_id}
+        if not recipients:
+            raise LedgerError("Rain needs at least one recipient")
+        
+        decimals = self.ledger.decimals(coin_symbol)
+        total_units = to_units(total_amount, decimals)
+        if total_units < len(recipients):
+            raise LedgerError("Rain amount too small to split")
+        
+        shares = split_rain(total_units, list(recipients))
+        base_units, dust = divmod(total_units, len(recipients))
+        postings = [(user_account(sender_id), -total_units)]
+        postings += [(user_account(user_id), units) for user_id, units in shares]
+        participants = [(user_id, from_units(units, decimals)) for user_id, units in shares]
+        total = from_units(total_units, decimals)
+        
+        def record(cursor, transfer_id: int):
+            self.ledger.db.insert_rain(cursor, sender_id, chat_id, coin_symbol, total,
+                                       f"rain_{transfer_id}", participants)
+        
+        transfer_id = self.ledger.transfer(coin_symbol, 'rain', postings, on_applied=record)
+        
+        return {
+            'rain_id': f"rain_{transfer_id}",
+            'total_amount': total,
+            'recipient_count': len(participants),
+            'shares': dict(participants),
+            # Everyone gets base_share; extra_unit_count of them one base unit more
+            'base_share': from_units(base_units, decimals),
+            'unit': from_units(1, decimals),
+            'extra_unit_count': dust
+        }
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Reconciler - Checks ledger liabilities against daemon wallet balances and drills into drift
+Powered By Aegisum EcoSystem
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from coin_interface import DaemonError
+from daemon_scheduler import Priority
+from ledger import from_units, to_units
+
+logger = logging.getLogger(__name__)
+
+# Findings kept per coin for the dashboard and /stats
+MAX_FINDINGS = 100
+
+
+class Reconciler:
+    """Compare what users are owed with what each wallet holds, narrowing a shortfall down to users"""
+    
+    def __init__(self, config: dict, database, coin_interface, ledger):
+        self.config = config
+        self.db = database
+        self.coin_interface = coin_interface
+        self.ledger = ledger
+        
+        reconciliation_config = config.get('reconciliation', {})
+        self.enabled = reconciliation_config.get('enabled', True)
+        self.interval = reconciliation_config.get('interval', 600)
+        self.tolerance = reconciliation_config.get('tolerance', 0.00000001)
+        self.partition_size = reconciliation_config.get('partition_size', 200)
+        self.partitions_per_run = reconciliation_config.get('partitions_per_run', 5)
+        
+        self.task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the background reconciliation job"""
+        if self.enabled and self.task is None:
+            self.task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background reconciliation job"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+    
+    async def _run(self):
+        while True:
+            for coin_symbol in self.coin_interface.get_supported_coins():
+                if not self.ledger.is_open(coin_symbol) or not self.coin_interface.is_coin_available(coin_symbol):
+                    continue
+                try:
+                    await self.reconcile(coin_symbol)
+                except Exception as e:
+                    logger.error(f"Error reconciling {coin_symbol}: {e}")
+            
+            await asyncio.sleep(self.interval)
+    
+    async def reconcile(self, coin_symbol: str) -> Dict[str, Any]:
+        """Check a coin's totals and, while they disagree, continue the drill-down where it stopped"""
+        decimals = self.ledger.decimals(coin_symbol)
+        
+        # A withdrawal completing while the wallet is read would briefly count twice,
+        # so take the lower of the liabilities on either side of the call
+        before = self.ledger.get_liabilities_units(coin_symbol)
+        wallet = await self.coin_interface.call(coin_symbol, 'getbalance', ['*', 0, False], Priority.BACKGROUND)
+        if not wallet['success']:
+            raise DaemonError(f"Failed to get {coin_symbol} wallet balance: {wallet['error']}")
+        liabilities = min(before, self.ledger.get_liabilities_units(coin_symbol))
+        
+        wallet_units = to_units(wallet['result'], decimals)
+        drift = wallet_units - liabilities
+        totals = (from_units(wallet_units, decimals), from_units(liabilities, decimals), from_units(drift, decimals))
+        
+        previous = self.db.get_reconciliation().get(coin_symbol, {})
+        if drift >= -to_units(self.tolerance, decimals):
+            # The wallet covers every user; any surplus is the bot's own fees and funds
+            status, checkpoint, users_checked, findings = 'ok', 0, 0, []
+        else:
+            if previous.get('status') in ('checking', 'drift'):
+                checkpoint = previous['checkpoint_user_id']
+                users_checked = previous['users_checked']
+                findings = previous['findings']
+            else:
+                checkpoint, users_checked, findings = 0, 0, []
+                logger.warning(f"{coin_symbol} wallet is {from_units(-drift, decimals)} short of user balances, "
+                               f"checking users")
+            
+            if previous.get('status') == 'drift':
+                status = 'drift'
+            else:
+                status, checkpoint, users_checked = await self._drill_down(
+                    coin_symbol, totals, checkpoint, users_checked, findings
+                )
+        
+        self.db.save_reconciliation(
+            coin_symbol, status, *totals, checkpoint, users_checked, findings[:MAX_FINDINGS]
+        )
+        return {
+            'status': status,
+            'wallet_balance': totals[0],
+            'liabilities': totals[1],
+            'drift': totals[2],
+            'users_checked': users_checked,
+            'findings': findings[:MAX_FINDINGS]
+        }
+    
+    async def _drill_down(self, coin_symbol: str, totals: Tuple[float, float, float], checkpoint: int,
+                          users_checked: int, findings: List[Dict[str, Any]]) -> Tuple[str, int, int]:
+        """Check the next few user partitions; returns the status, checkpoint and users checked so far"""
+        for _ in range(self.partitions_per_run):
+            user_ids = self.ledger.get_user_ids(coin_symbol, checkpoint, self.partition_size)
+            if not user_ids:
+                logger.warning(f"{coin_symbol} drill-down finished after {users_checked} users "
+                               f"with {len(findings)} findings")
+                return 'drift', checkpoint, users_checked
+            
+            findings += await self._check_partition(coin_symbol, user_ids)
+            checkpoint = user_ids[-1]
+            users_checked += len(user_ids)
+            
+            # Keep the progress if the bot stops mid-way
+            self.db.save_reconciliation(
+                coin_symbol, 'checking', *totals, checkpoint, users_checked, findings[:MAX_FINDINGS]
+            )
+        
+        return 'checking', checkpoint, users_checked
+    
+    async def _check_partition(self, coin_symbol: str, user_ids: List[int]) -> List[Dict[str, Any]]:
+        """Find users whose balances disagree with the journal or whose credits exceed what the daemon received"""
+        decimals = self.ledger.decimals(coin_symbol)
+        findings = [
+            {
+                'user_id': mismatch['user_id'],
+                'check': f"{mismatch['account']} balance",
+                'bot': from_units(mismatch['balance'], decimals),
+                'expected': from_units(mismatch['entries'], decimals)
+            }
+            for mismatch in self.ledger.find_balance_mismatches(coin_symbol, user_ids)
+        ]
+        
+        # Each deposit address must have received at least what was credited from it; older deposits
+        # carried over from daemon accounts are not credits, so receiving more than that is normal
+        credits = self.ledger.get_deposit_credits(coin_symbol, user_ids)
+        owners = self.db.get_user_addresses(coin_symbol, user_ids)
+        addresses = [address for address in credits if address in owners]
+        min_confirmations = self.config['coins'][coin_symbol].get('min_confirmations', 1)
+        
+        results = await self.coin_interface.batch(
+            coin_symbol, [('getreceivedbyaddress', [address, min_confirmations]) for address in addresses],
+            Priority.BACKGROUND
+        )
+        for address, result in zip(addresses, results):
+            if not result['success']:
+                logger.error(f"Failed to get {coin_symbol} received by {address}: {result['error']}")
+                continue
+            received = to_units(result['result'], decimals)
+            if credits[address] > received:
+                findings.append({
+                    'user_id': owners[address],
+                    'check': f"deposits to {address}",
+                    'bot': from_units(credits[address], decimals),
+                    'expected': from_units(received, decimals)
+                })
+        
+        for finding in findings:
+            logger.warning(f"{coin_symbol} reconciliation: user {finding['user_id']} {finding['check']} "
+                           f"is {finding['bot']}, expected {finding['expected']}")
+        return findings
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Restore Queue - Wallet restores as background jobs, with one rescan per coin per batch
+Powered By Aegisum EcoSystem
+"""
+
+import asyncio
+import logging
+import secrets
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from coin_interface import DaemonError, is_method_missing
+from daemon_scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+# Block timestamps may run up to two hours ahead, so rescans start that much earlier
+TIMESTAMP_WINDOW = 2 * 60 * 60
+
+
+class RestoreQueue:
+    """Queue of wallet restores; queued jobs are imported together and rescanned once"""
+    
+    def __init__(self, config: dict, coin_interface):
+        self.config = config
+        self.coin_interface = coin_interface
+        self.max_batch = config.get('restore', {}).get('max_batch', 50)
+        
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.user_jobs: Dict[int, str] = {}
+        self.pending: List[str] = []
+        
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+    
+    def start(self):
+        """Start the background restore worker"""
+        if self.task is None:
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background restore worker"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+    
+    def submit(self, user_id: int, keys: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Queue a restore of {coin: {private_key, address, timestamp}}; returns the job"""
+        existing = self.get_user_job(user_id)
+        if existing and existing['state'] in ('queued', 'running'):
+            return existing
+        
+        # Only the latest job per user is kept
+        old_job_id = self.user_jobs.get(user_id)
+        if old_job_id:
+            self.jobs.pop(old_job_id, None)
+        
+        job_id = secrets.token_hex(8)
+        self.jobs[job_id] = {
+            'job_id': job_id,
+            'user_id': user_id,
+            'state': 'queued',
+            'keys': keys,
+            'coins': {coin_symbol: 'queued' for coin_symbol in keys},
+            'errors': {},
+            'queued_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None
+        }
+        self.user_jobs[user_id] = job_id
+        self.pending.append(job_id)
+        
+        self.start()
+        self.wakeup.set()
+        
+        logger.info(f"Queued wallet restore {job_id} for user {user_id} ({', '.join(keys)})")
+        return self.get_job(job_id)
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Progress of a restore job, without its keys"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        
+        status = {name: value for name, value in job.items() if name != 'keys'}
+        status['coins'] = dict(job['coins'])
+        status['errors'] = dict(job['errors'])
+        status['position'] = self.pending.index(job_id) + 1 if job_id in self.pending else 0
+        return status
+    
+    def get_user_job(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Progress of a user's latest restore job"""
+        job_id = self.user_jobs.get(user_id)
+        return self.get_job(job_id) if job_id else None
+    
+    async def _run(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            
+            while self.pending:
+                batch = self.pending[:self.max_batch]
+                del self.pending[:len(batch)]
+                try:
+                    await self._restore([self.jobs[job_id] for job_id in batch if job_id in self.jobs])
+                except Exception as e:
+                    logger.error(f"Error running wallet restores: {e}")
+    
+    async def _restore(self, jobs: List[Dict[str, Any]]):
+        """Restore a batch of jobs, all coins in parallel"""
+        by_coin: Dict[str, List[Dict[str, Any]]] = {}
+        for job in jobs:
+            job['state'] = 'running'
+            job['started_at'] = datetime.now().isoformat()
+            for coin_symbol in job['keys']:
+                by_coin.setdefault(coin_symbol, []).append(job)
+        
+        await asyncio.gather(*(
+            self._restore_coin(coin_symbol, coin_jobs) for coin_symbol, coin_jobs in by_coin.items()
+        ))
+        
+        for job in jobs:
+            restored = [coin for coin, state in job['coins'].items() if state == 'done']
+            job['state'] = 'done' if restored or not job['coins'] else 'failed'
+            job['finished_at'] = datetime.now().isoformat()
+            # Keys are not needed once the daemon has them
+            job['keys'] = {}
+            logger.info(f"Wallet restore {job['job_id']} for user {job['user_id']} finished: "
+                        f"{len(restored)}/{len(job['coins'])} coins restored")
+    
+    def _set_state(self, coin_symbol: str, jobs: List[Dict[str, Any]], state: str):
+        for job in jobs:
+            if job['coins'][coin_symbol] not in ('done', 'failed'):
+                job['coins'][coin_symbol] = state
+    
+    def _fail(self, coin_symbol: str, job: Dict[str, Any], error: str):
+        job['coins'][coin_symbol] = 'failed'
+        job['errors'][coin_symbol] = error
+        logger.warning(f"Failed to restore {coin_symbol} for user {job['user_id']}: {error}")
+    
+    async def _restore_coin(self, coin_symbol: str, jobs: List[Dict[str, Any]]):
+        """Import every queued key for a coin, then rescan once"""
+        if not self.coin_interface.is_coin_available(coin_symbol):
+            for job in jobs:
+                self._fail(coin_symbol, job, "Daemon temporarily unavailable")
+            return
+        
+        try:
+            if not await self._import_multi(coin_symbol, jobs):
+                await self._import_then_rescan(coin_symbol, jobs)
+        except DaemonError as e:
+            for job in jobs:
+                if job['coins'][coin_symbol] not in ('done', 'failed'):
+                    self._fail(coin_symbol, job, str(e))
+    
+    async def _import_multi(self, coin_symbol: str, jobs: List[Dict[str, Any]]) -> bool:
+        """Import all keys in one importmulti call; False if the daemon lacks importmulti"""
+        requests = [
+            {
+                'scriptPubKey': {'address': job['keys'][coin_symbol]['address']},
+                'keys': [job['keys'][coin_symbol]['private_key']],
+                'label': f"user_{job['user_id']}",
+                # The daemon rescans once, from the oldest key's timestamp
+                'timestamp': int(job['keys'][coin_symbol].get('timestamp') or 0)
+            }
+            for job in jobs
+        ]
+        
+        self._set_state(coin_symbol, jobs, 'rescanning')
+        result = await self.coin_interface.call(
+            coin_symbol, 'importmulti', [requests, {'rescan': True}], Priority.BACKGROUND
+        )
+        
+        if not result['success']:
+            if is_method_missing(result):
+                return False
+            for job in jobs:
+                self._fail(coin_symbol, job, result['error'])
+            return True
+        
+        imported = []
+        for job, outcome in zip(jobs, result['result']):
+            if outcome.get('success'):
+                imported.append(job)
+            else:
+                self._fail(coin_symbol, job, (outcome.get('error') or {}).get('message', 'Import failed'))
+        
+        # Daemons with accounts may not take the label as the account, so set it too
+        await self._label(coin_symbol, imported)
+        return True
+    
+    async def _import_then_rescan(self, coin_symbol: str, jobs: List[Dict[str, Any]]):
+        """Import keys without rescanning, then rescan once from the oldest key"""
+        self._set_state(coin_symbol, jobs, 'importing')
+        results = await self.coin_interface.batch(
+            coin_symbol,
+            [('importprivkey', [job['keys'][coin_symbol]['private_key'], f"user_{job['user_id']}", False])
+             for job in jobs],
+            Priority.BACKGROUND
+        )
+        
+        imported = []
+        for job, result in zip(jobs, results):
+            if result['success']:
+                imported.append(job)
+            else:
+                self._fail(coin_symbol, job, result['error'])
+        if not imported:
+            return
+        
+        self._set_state(coin_symbol, imported, 'rescanning')
+        timestamps = [int(job['keys'][coin_symbol].get('timestamp') or 0) for job in imported]
+        start_height = await self._height_at(coin_symbol, min(timestamps) - TIMESTAMP_WINDOW)
+        
+        result = await self.coin_interface.call(
+            coin_symbol, 'rescanblockchain', [start_height], Priority.BACKGROUND
+        )
+        if not result['success'] and is_method_missing(result):
+            # Older daemons only rescan as part of an import, and always from genesis
+            last = imported[-1]
+            result = await self.coin_interface.call(
+                coin_symbol, 'importprivkey',
+                [last['keys'][coin_symbol]['private_key'], f"user_{last['user_id']}", True],
+                Priority.BACKGROUND
+            )
+        
+        if not result['success']:
+            for job in imported:
+                self._fail(coin_symbol, job, result['error'])
+            return
+        
+        self._set_state(coin_symbol, imported, 'done')
+    
+    async def _label(self, coin_symbol: str, jobs: List[Dict[str, Any]]):
+        if not jobs:
+            return
+        
+        results = await self.coin_interface.batch(
+            coin_symbol,
+            [('setaccount', [job['keys'][coin_symbol]['address'], f"user_{job['user_id']}"]) for job in jobs],
+            Priority.BACKGROUND
+        )
+        for job, result in zip(jobs, results):
+            # Daemons without accounts have no setaccount; the importmulti label is all they need
+            if result['success'] or is_method_missing(result):
+                job['coins'][coin_symbol] = 'done'
+            else:
+                self._fail(coin_symbol, job, result['error'])
+    
+    async def _height_at(self, coin_symbol: str, timestamp: int) -> int:
+        """Lowest block height at or after a timestamp, or 0 if it cannot be found"""
+        if timestamp <= 0:
+            return 0
+        
+        result = await self.coin_interface.call(coin_symbol, 'getblockcount', [], Priority.BACKGROUND)
+        if not result['success']:
+            return 0
+        
+        low, high = 0, int(result['result'])
+        while low < high:
+            middle = (low + high) // 2
+            block_hash = await self.coin_interface.call(coin_symbol, 'getblockhash', [middle], Priority.BACKGROUND)
+            if not block_hash['success']:
+                return 0
+            header = await self.coin_interface.call(
+                coin_symbol, 'getblockheader', [block_hash['result']], Priority.BACKGROUND
+            )
+            if not header['success']:
+                return 0
+            
+            if header['result']['time'] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
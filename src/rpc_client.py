@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+RPC Client - Pooled JSON-RPC over HTTP transport for coin daemons
+Powered By Aegisum EcoSystem
+"""
+
+import asyncio
+import base64
+import itertools
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Methods that change wallet state. A request for one of these is never
+# re-sent after it has been written to a connection, even if the reply is lost.
+WRITE_METHODS = frozenset([
+    'sendfrom', 'sendtoaddress', 'sendmany', 'move', 'getnewaddress',
+    'getaccountaddress', 'importprivkey', 'importaddress', 'importmulti',
+    'rescanblockchain', 'backupwallet', 'walletpassphrase', 'settxfee',
+])
+
+
+class RPCError(Exception):
+    """Error object returned by the daemon for a JSON-RPC call"""
+    
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class RPCTransportError(Exception):
+    """The HTTP exchange with the daemon failed"""
+
+
+class RPCConnectError(RPCTransportError):
+    """The daemon could not be reached; the request was never sent"""
+
+
+class RPCConnectionPool:
+    """Keep-alive HTTP/1.1 connections to a single daemon"""
+    
+    def __init__(self, host: str, port: int, user: str, password: str,
+                 max_connections: int = 4, idle_timeout: float = 15.0,
+                 connect_timeout: float = 5.0):
+        self.host = host
+        self.port = int(port)
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        
+        credentials = base64.b64encode(f"{user}:{password}".encode()).decode()
+        self._auth_header = f"Basic {credentials}"
+        
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self._idle: List[Tuple[float, asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._closed = False
+        
+        # Counters for diagnostics
+        self.connections_opened = 0
+        self.requests_sent = 0
+    
+    async def post(self, body: bytes, retry_stale: bool = True) -> Tuple[int, bytes]:
+        """Send a POST request and return (status, body)"""
+        if self._closed:
+            raise RPCConnectError("Connection pool is closed")
+        
+        async with self._semaphore:
+            reader, writer, reused = await self._acquire()
+            try:
+                status, payload, keep_alive = await self._roundtrip(reader, writer, body)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                self._discard(writer)
+                if not (reused and retry_stale):
+                    raise RPCTransportError(f"Connection to {self.host}:{self.port} lost: {e}")
+                
+                # The daemon closed an idle keep-alive connection under us;
+                # retry once on a fresh connection.
+                reader, writer = await self._open()
+                try:
+                    status, payload, keep_alive = await self._roundtrip(reader, writer, body)
+                except (ConnectionError, asyncio.IncompleteReadError) as e2:
+                    self._discard(writer)
+                    raise RPCTransportError(f"Connection to {self.host}:{self.port} lost: {e2}")
+            except BaseException:
+                # Timeouts and cancellation leave the stream in an unknown state
+                self._discard(writer)
+                raise
+            
+            if keep_alive:
+                self._idle.append((time.monotonic(), reader, writer))
+            else:
+                self._discard(writer)
+            
+            return status, payload
+    
+    async def close(self):
+        """Close all idle connections"""
+        self._closed = True
+        while self._idle:
+            _, _, writer = self._idle.pop()
+            self._discard(writer)
+    
+    async def _acquire(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        """Take a live idle connection or open a new one"""
+        now = time.monotonic()
+        while self._idle:
+            last_used, reader, writer = self._idle.pop()
+            if now - last_used > self.idle_timeout or reader.at_eof() or writer.is_closing():
+                self._discard(writer)
+                continue
+            return reader, writer, True
+        
+        reader, writer = await self._open()
+        return reader, writer, False
+    
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open a new TCP connection to the daemon"""
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port),
+                timeout=self.connect_timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise RPCConnectError(f"Cannot connect to {self.host}:{self.port}: {e}")
+        
+        self.connections_opened += 1
+        return reader, writer
+    
+    def _discard(self, writer: asyncio.StreamWriter):
+        try:
+            writer.close()
+        except Exception:
+            pass
+    
+    async def _roundtrip(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                         body: bytes) -> Tuple[int, bytes, bool]:
+        """Write one request and read one response"""
+        head = (
+            f"POST / HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"Authorization: {self._auth_header}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: keep-alive\r\n"
+            f"\r\n"
+        ).encode('latin-1')
+        
+        writer.write(head + body)
+        await writer.drain()
+        self.requests_sent += 1
+        
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by daemon")
+        
+        parts = status_line.decode('latin-1').split(' ', 2)
+        try:
+            status = int(parts[1])
+        except (IndexError, ValueError):
+            raise RPCTransportError(f"Malformed HTTP status line: {status_line!r}")
+        
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+        
+        keep_alive = headers.get('connection', '').lower() != 'close'
+        
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            payload = await self._read_chunked(reader)
+        elif 'content-length' in headers:
+            payload = await reader.readexactly(int(headers['content-length']))
+        else:
+            payload = await reader.read()
+            keep_alive = False
+        
+        return status, payload, keep_alive
+    
+    async def _read_chunked(self, reader: asyncio.StreamReader) -> bytes:
+        """Read a chunked transfer-encoded body"""
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b';', 1)[0].strip() or b'0', 16)
+            if size == 0:
+                # Skip trailers
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        return b''.join(chunks)
+
+
+class JsonRpcClient:
+    """JSON-RPC client for one coin daemon"""
+    
+    def __init__(self, coin_symbol: str, coin_config: dict, pool_size: int = 4, idle_timeout: float = 15.0):
+        self.coin_symbol = coin_symbol
+        self.pool = RPCConnectionPool(
+            host=coin_config.get('rpc_host', '127.0.0.1'),
+            port=coin_config['rpc_port'],
+            user=coin_config.get('rpc_user', ''),
+            password=coin_config.get('rpc_password', ''),
+            max_connections=pool_size,
+            idle_timeout=idle_timeout
+        )
+        self._ids = itertools.count(1)
+    
+    async def call(self, method: str, params: Optional[List[Any]] = None) -> Any:
+        """Call a daemon method and return its result"""
+        request_id = next(self._ids)
+        body = json.dumps({
+            'jsonrpc': '1.0',
+            'id': request_id,
+            'method': method,
+            'params': params or []
+        }).encode()
+        
+        status, payload = await self.pool.post(body, retry_stale=method not in WRITE_METHODS)
+        response = self._decode(status, payload)
+        
+        if not isinstance(response, dict):
+            raise RPCTransportError(f"Unexpected response for {method}: {response!r}")
+        
+        error = response.get('error')
+        if error:
+            raise RPCError(error.get('code', -1), error.get('message', 'Unknown error'))
+        
+        return response.get('result')
+    
+    async def batch(self, calls: List[Tuple[str, Optional[List[Any]]]]) -> List[Any]:
+        """Send several calls in one JSON-RPC batch request
+        
+        Returns one entry per call, in order: the call's result, or an
+        RPCError instance if that call failed.
+        """
+        if not calls:
+            return []
+        
+        requests = []
+        for method, params in calls:
+            requests.append({
+                'jsonrpc': '1.0',
+                'id': next(self._ids),
+                'method': method,
+                'params': params or []
+            })
+        
+        body = json.dumps(requests).encode()
+        retry_stale = not any(method in WRITE_METHODS for method, _ in calls)
+        
+        status, payload = await self.pool.post(body, retry_stale=retry_stale)
+        response = self._decode(status, payload)
+        
+        if not isinstance(response, list):
+            # Daemons without batch support answer with a single error object
+            if isinstance(response, dict) and response.get('error'):
+                error = response['error']
+                raise RPCError(error.get('code', -1), error.get('message', 'Unknown error'))
+            raise RPCTransportError(f"Unexpected batch response: {response!r}")
+        
+        # Replies may arrive in any order; match them up by id
+        by_id = {item.get('id'): item for item in response if isinstance(item, dict)}
+        
+        results = []
+        for request in requests:
+            item = by_id.get(request['id'])
+            if item is None:
+                results.append(RPCError(-1, f"No reply for {request['method']} in batch"))
+            elif item.get('error'):
+                error = item['error']
+                results.append(RPCError(error.get('code', -1), error.get('message', 'Unknown error')))
+            else:
+                results.append(item.get('result'))
+        
+        return results
+    
+    async def close(self):
+        await self.pool.close()
+    
+    def _decode(self, status: int, payload: bytes) -> Any:
+        """Decode an HTTP response body from the daemon"""
+        if status in (401, 403):
+            # Wrong credentials: the CLI may still work via the daemon's cookie file
+            raise RPCConnectError(f"RPC authentication failed for {self.coin_symbol} (HTTP {status})")
+        
+        try:
+            return json.loads(payload.decode())
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise RPCTransportError(f"Invalid response from {self.coin_symbol} daemon (HTTP {status})")
@@ -6,30 +6,113 @@ Powered By Aegisum EcoSystem
 
 import asyncio
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Set, Optional
 from telegram import Bot
 from telegram.error import TelegramError
 
+from daemon_scheduler import Priority
 from utils import format_amount, get_powered_by_text
 
 logger = logging.getLogger(__name__)
 
+# Deposit outputs remembered in memory; older ones are looked up in the deposits table
+RECENT_DEPOSITS_LIMIT = 10000
+
+# Weight of the newest block interval in a coin's average block time
+BLOCK_TIME_SMOOTHING = 0.2
+
+# Block times without a blocknotify push after which tip polling speeds up again
+PUSH_SILENCE_BLOCKS = 3
+
+class RecentKeys:
+    """Set that forgets its oldest keys beyond a size limit"""
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.keys: OrderedDict = OrderedDict()
+    
+    def __contains__(self, key) -> bool:
+        return key in self.keys
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def add(self, key):
+        self.keys[key] = None
+        self.keys.move_to_end(key)
+        if len(self.keys) > self.limit:
+            self.keys.popitem(last=False)
+
+def mined_height(tx: Dict, tip_height: Optional[int]) -> Optional[int]:
+    """Height of the block a listed transaction is in, or None while it is unconfirmed"""
+    if tx.get('blockheight') is not None:
+        return tx['blockheight']
+    confirmations = tx.get('confirmations', 0)
+    if confirmations <= 0 or tip_height is None:
+        return None
+    return tip_height - confirmations + 1
+
+class ChainWatch:
+    """What was last seen of one coin's chain tip and wallet, and how often to look again"""
+    
+    def __init__(self, block_time: float):
+        self.tip: Optional[str] = None
+        self.tx_count: Optional[int] = None
+        self.block_time = block_time
+        self.tip_changed_at: Optional[float] = None
+        self.last_pass: Optional[float] = None
+        self.block_pushed_at: Optional[float] = None
+    
+    def push_active(self) -> bool:
+        """Whether the daemon's blocknotify has been heard from within the last few block times"""
+        return (self.block_pushed_at is not None
+                and time.monotonic() - self.block_pushed_at < PUSH_SILENCE_BLOCKS * self.block_time)
+    
+    def observe(self, tip: str, tx_count: Optional[int]) -> bool:
+        """Record a poll; returns whether a new block or wallet transaction appeared since the last one"""
+        now = time.monotonic()
+        changed = tip != self.tip or (tx_count is not None and tx_count != self.tx_count)
+        
+        if self.tip is not None and tip != self.tip:
+            # Learn the block time from tips seen changing, not from the first poll
+            if self.tip_changed_at is not None:
+                self.block_time += BLOCK_TIME_SMOOTHING * (now - self.tip_changed_at - self.block_time)
+            self.tip_changed_at = now
+        
+        self.tip = tip
+        if tx_count is not None:
+            self.tx_count = tx_count
+        return changed
+
 class TransactionMonitor:
-    def __init__(self, config: dict, database, coin_interface):
+    def __init__(self, config: dict, database, coin_interface, ledger=None):
         self.config = config
         self.db = database
         self.coin_interface = coin_interface
+        self.ledger = ledger
         self.bot = None
         self.monitoring = False
         
-        # Track processed transactions to avoid duplicates
-        self.processed_deposits = set()
-        self.processed_withdrawals = set()
+        # Deposit outputs already recorded, as (coin, txid bytes, vout); the deposits
+        # table is the durable record, this only spares it the lookups of recent ones
+        self.processed_deposits = RecentKeys(RECENT_DEPOSITS_LIMIT)
+        
+        # Each coin's tip is polled cheaply; the full deposit and withdrawal pass only runs
+        # when it moves, when the wallet sees a new transaction, or as a periodic safety net
+        monitor_config = config.get('monitor', {})
+        self.min_poll_interval = monitor_config.get('min_poll_interval', 1)
+        self.max_poll_interval = monitor_config.get('max_poll_interval', 15)
+        self.polls_per_block = monitor_config.get('polls_per_block', 60)
+        self.full_check_interval = monitor_config.get('full_check_interval', 300)
+        self.watches: Dict[str, ChainWatch] = {}
         
-        # Monitoring intervals
-        self.deposit_check_interval = 30  # seconds
-        self.withdrawal_check_interval = 60  # seconds
+        # Daemon walletnotify/blocknotify pushes wake a coin's loop at once; while blocks are
+        # being pushed, tip polling is only a slow safety net
+        self.safety_poll_interval = config.get('notify', {}).get('safety_poll_interval', 60)
+        self.wakeups: Dict[str, asyncio.Event] = {}
     
     async def start(self):
         """Start the transaction monitoring service"""
@@ -41,8 +124,8 @@ class TransactionMonitor:
             logger.info("Transaction monitor started")
             
             # Start monitoring tasks
-            asyncio.create_task(self._monitor_deposits())
-            asyncio.create_task(self._monitor_withdrawals())
+            for coin_symbol in self.coin_interface.get_supported_coins():
+                asyncio.create_task(self._monitor_coin(coin_symbol))
             
         except Exception as e:
             logger.error(f"Failed to start transaction monitor: {e}")
@@ -53,198 +136,270 @@ class TransactionMonitor:
         self.monitoring = False
         logger.info("Transaction monitor stopped")
     
-    async def _monitor_deposits(self):
-        """Monitor for new deposits"""
+    def poll_interval(self, coin_symbol: str) -> float:
+        """Seconds between tip polls, a fraction of the coin's observed block time"""
+        watch = self.watches.get(coin_symbol)
+        if watch is None:
+            return self.max_poll_interval
+        if watch.push_active():
+            return max(self.max_poll_interval, self.safety_poll_interval)
+        return min(self.max_poll_interval, max(self.min_poll_interval, watch.block_time / self.polls_per_block))
+    
+    async def _monitor_coin(self, coin_symbol: str):
+        """Monitor one coin's deposits and withdrawals, following its chain tip"""
+        block_time = self.config['coins'][coin_symbol].get('block_time', 60)
+        watch = self.watches.setdefault(coin_symbol, ChainWatch(block_time))
+        pushed = False
+        
         while self.monitoring:
             try:
-                await self._check_all_deposits()
-                await asyncio.sleep(self.deposit_check_interval)
+                if self.coin_interface.is_coin_available(coin_symbol):
+                    changed = await self._poll_tip(coin_symbol, watch)
+                    overdue = (watch.last_pass is None
+                               or time.monotonic() - watch.last_pass >= self.full_check_interval)
+                    if pushed or changed or overdue:
+                        # A failed pass leaves the cursor where it was, so it runs again at the next poll
+                        passed = await self._check_coin(coin_symbol)
+                        watch.last_pass = time.monotonic() if passed else None
             except Exception as e:
-                logger.error(f"Error in deposit monitoring: {e}")
-                await asyncio.sleep(self.deposit_check_interval)
+                logger.error(f"Error monitoring {coin_symbol}: {e}")
+                # The cursor did not move, so run the pass again at the next poll
+                watch.last_pass = None
+            
+            pushed = await self._wait_for_push(coin_symbol)
     
-    async def _monitor_withdrawals(self):
-        """Monitor withdrawal confirmations"""
-        while self.monitoring:
+    def notify(self, coin_symbol: str, kind: str, item_hash: str):
+        """Wake a coin's loop for a transaction or block pushed by its daemon"""
+        logger.debug(f"{coin_symbol} {kind} notification: {item_hash}")
+        if kind == 'block':
+            watch = self.watches.get(coin_symbol)
+            if watch is not None:
+                watch.block_pushed_at = time.monotonic()
+        self.wakeups.setdefault(coin_symbol, asyncio.Event()).set()
+    
+    async def _wait_for_push(self, coin_symbol: str) -> bool:
+        """Sleep until the next poll is due or a push arrives; returns whether one did"""
+        wakeup = self.wakeups.setdefault(coin_symbol, asyncio.Event())
+        try:
+            await asyncio.wait_for(wakeup.wait(), self.poll_interval(coin_symbol))
+        except asyncio.TimeoutError:
+            return False
+        
+        # Pushes arriving during the pass wake the loop again for one more
+        wakeup.clear()
+        return True
+    
+    async def _poll_tip(self, coin_symbol: str, watch: ChainWatch) -> bool:
+        """Read the best block and wallet transaction count; returns whether either changed"""
+        results = await self.coin_interface.batch(coin_symbol, [
+            ('getbestblockhash', []),
+            ('getwalletinfo', [])
+        ], priority=Priority.BACKGROUND)
+        
+        if not results[0]['success']:
+            logger.error(f"Failed to get {coin_symbol} best block: {results[0]['error']}")
+            return False
+        
+        # Without getwalletinfo, mempool deposits wait for the next block or safety pass
+        info = results[1]['result'] if results[1]['success'] else None
+        tx_count = info.get('txcount') if isinstance(info, dict) else None
+        return watch.observe(results[0]['result'], tx_count)
+    
+    async def _check_coin(self, coin_symbol: str) -> bool:
+        """Open the coin's ledger if needed, then run the full deposit and withdrawal pass; False if it failed"""
+        # Coins the ledger could not take over at startup
+        if self.ledger and not self.ledger.is_open(coin_symbol):
             try:
-                await self._check_withdrawal_confirmations()
-                await asyncio.sleep(self.withdrawal_check_interval)
+                await self.ledger.open_coin(coin_symbol, self.coin_interface)
             except Exception as e:
-                logger.error(f"Error in withdrawal monitoring: {e}")
-                await asyncio.sleep(self.withdrawal_check_interval)
+                logger.error(f"Failed to open {coin_symbol} ledger: {e}")
+        
+        return await self._check_coin_deposits(coin_symbol)
     
-    async def _check_all_deposits(self):
-        """Check for deposits across all users and coins"""
-        try:
-            # Get all user addresses
-            cursor = self.db.connection.cursor()
-            cursor.execute('''
-                SELECT DISTINCT user_id, coin_symbol, address 
-                FROM user_addresses 
-                WHERE coin_symbol IN ({})
-            '''.format(','.join(['?' for _ in self.coin_interface.get_supported_coins()])),
-                      self.coin_interface.get_supported_coins())
-            
-            user_addresses = cursor.fetchall()
-            
-            for user_id, coin_symbol, address in user_addresses:
-                await self._check_user_deposits(user_id, coin_symbol, address)
-                
-        except Exception as e:
-            logger.error(f"Failed to check all deposits: {e}")
+    async def _check_coin_deposits(self, coin_symbol: str) -> bool:
+        """Process a coin's wallet transactions since the last processed block, then promote
+        every deposit and withdrawal that has enough confirmations at the current tip
+        
+        Returns False if the daemon could not be read, so the pass is retried at the next poll.
+        """
+        since_block = self.db.get_deposit_cursor(coin_symbol)
+        if since_block is None:
+            since_block = await self._initial_deposit_cursor(coin_symbol)
+            if since_block is None:
+                return False
+        
+        # Transactions stay in the listing until they reach min_confirmations, as lastblock
+        # trails the tip by that many blocks; the height comes along to place them in blocks
+        min_confirmations = self.config['coins'][coin_symbol]['min_confirmations']
+        results = await self.coin_interface.batch(coin_symbol, [
+            ('getblockcount', []),
+            ('listsinceblock', [since_block, min_confirmations, False])
+        ], priority=Priority.BACKGROUND)
+        
+        if not results[0]['success']:
+            logger.error(f"Failed to get {coin_symbol} block count: {results[0]['error']}")
+            return False
+        height = results[0]['result']
+        since = results[1]
+        
+        if not since['success']:
+            if since.get('code') == -5:
+                # The cursor block is unknown to the daemon; start over from the ledger's first block
+                logger.warning(f"{coin_symbol} deposit cursor {since_block} not found, restarting it")
+                self.db.clear_deposit_cursor(coin_symbol)
+            else:
+                logger.error(f"Failed to list {coin_symbol} transactions since {since_block}: {since['error']}")
+            return False
+        
+        transactions = since['result'].get('transactions', [])
+        owners = self.db.get_address_owners(coin_symbol)
+        deposit_heights = []
+        withdrawal_heights = {}
+        
+        for tx in transactions:
+            if tx.get('category') == 'send':
+                withdrawal_heights[tx['txid']] = mined_height(tx, height)
+                continue
+            if tx.get('category') != 'receive':
+                continue
+            user_id = owners.get(tx.get('address'))
+            if user_id is not None:
+                await self._check_user_deposits(user_id, coin_symbol, tx['address'], [tx], height)
+                deposit_heights.append((mined_height(tx, height), tx['txid'], tx.get('vout', 0)))
+        
+        # Recorded deposits and sent withdrawals learn their block once; a reorg clears it again
+        self.db.set_deposit_heights(coin_symbol, deposit_heights)
+        await self._find_withdrawal_heights(coin_symbol, withdrawal_heights, height)
+        
+        await self._confirm_deposits(coin_symbol, height, min_confirmations)
+        await self._confirm_withdrawals(coin_symbol, height, min_confirmations)
+        
+        self.db.set_deposit_cursor(coin_symbol, since['result']['lastblock'])
+        return True
     
-    async def _check_user_deposits(self, user_id: int, coin_symbol: str, address: str):
-        """Check for deposits for a specific user and coin"""
-        try:
-            # Get recent transactions for this address
-            unspent = await self.coin_interface.list_unspent(
-                coin_symbol, 
-                min_confirmations=0,
-                addresses=[address]
+    async def _initial_deposit_cursor(self, coin_symbol: str) -> Optional[str]:
+        """Block to list a coin's deposits from the first time"""
+        if self.ledger:
+            # Everything after the block the ledger's opening balances were taken at
+            if not self.ledger.is_open(coin_symbol):
+                return None
+            start = await self.coin_interface.call(
+                coin_symbol, 'getblockhash', [self.ledger.first_credit_heights[coin_symbol] - 1], Priority.BACKGROUND
             )
-            
-            for utxo in unspent:
-                tx_id = utxo.get('txid')
-                amount = utxo.get('amount', 0)
-                confirmations = utxo.get('confirmations', 0)
-                
-                if not tx_id or amount <= 0:
-                    continue
-                
-                # Check if we've already processed this deposit
-                deposit_key = f"{user_id}_{coin_symbol}_{tx_id}"
-                
-                if deposit_key not in self.processed_deposits:
-                    # New deposit detected
-                    await self._handle_new_deposit(user_id, coin_symbol, address, tx_id, amount, confirmations)
-                    self.processed_deposits.add(deposit_key)
-                
-                elif confirmations > 0:
-                    # Check if deposit needs confirmation update
-                    await self._update_deposit_confirmations(user_id, coin_symbol, tx_id, confirmations)
-                    
-        except Exception as e:
-            logger.error(f"Failed to check deposits for user {user_id}, coin {coin_symbol}: {e}")
+        else:
+            start = await self.coin_interface.call(coin_symbol, 'getbestblockhash', [], Priority.BACKGROUND)
+        
+        if not start['success']:
+            logger.error(f"Failed to find the first {coin_symbol} deposit block: {start['error']}")
+            return None
+        return start['result']
     
-    async def _handle_new_deposit(self, user_id: int, coin_symbol: str, address: str, tx_id: str, amount: float, confirmations: int):
-        """Handle a newly detected deposit"""
+    async def _check_user_deposits(self, user_id: int, coin_symbol: str, address: str, transactions: List[Dict],
+                                   height: Optional[int] = None):
+        """Record newly listed deposits to a specific user and coin
+        
+        Errors propagate, so the deposit cursor is not moved past a deposit that failed.
+        """
+        for tx in transactions:
+            tx_id = tx.get('txid')
+            vout = tx.get('vout', 0)
+            amount = tx.get('amount', 0)
+            
+            if not tx_id or amount <= 0:
+                continue
+            
+            deposit_key = (coin_symbol, bytes.fromhex(tx_id), vout)
+            if deposit_key not in self.processed_deposits:
+                await self._handle_new_deposit(
+                    user_id, coin_symbol, address, tx_id, vout, amount, tx.get('confirmations', 0), height
+                )
+                self.processed_deposits.add(deposit_key)
+    
+    async def _handle_new_deposit(self, user_id: int, coin_symbol: str, address: str, tx_id: str, vout: int,
+                                  amount: float, confirmations: int, height: Optional[int] = None) -> bool:
+        """Handle a newly detected deposit; False if it was already recorded
+        
+        Deposits that already have enough confirmations are credited by the confirmation pass.
+        """
         try:
             # Record deposit in database
-            self.db.record_deposit(user_id, coin_symbol, amount, address, tx_id, confirmations)
-            
-            # Send notification based on confirmation status
-            if confirmations == 0:
+            block_height = mined_height({'confirmations': confirmations}, height)
+            if not self.db.record_deposit(user_id, coin_symbol, amount, address, tx_id, confirmations, vout,
+                                          block_height):
+                return False
+            
+            if confirmations < self.config['coins'][coin_symbol]['min_confirmations']:
+                self._record_pending_deposit(user_id, coin_symbol, address, tx_id, vout, amount, confirmations,
+                                             height)
                 await self._send_pending_deposit_notification(user_id, coin_symbol, amount, tx_id)
-            else:
-                await self._send_confirmed_deposit_notification(user_id, coin_symbol, amount, tx_id, confirmations)
             
             logger.info(f"New deposit detected: {amount} {coin_symbol} for user {user_id}, TX: {tx_id}")
+            return True
             
         except Exception as e:
             logger.error(f"Failed to handle new deposit: {e}")
+            raise
     
-    async def _update_deposit_confirmations(self, user_id: int, coin_symbol: str, tx_id: str, confirmations: int):
-        """Update deposit confirmation count"""
-        try:
-            cursor = self.db.connection.cursor()
-            
-            # Get current deposit status
-            cursor.execute('''
-                SELECT confirmations, status FROM deposits 
-                WHERE user_id = ? AND coin_symbol = ? AND tx_id = ?
-            ''', (user_id, coin_symbol, tx_id))
-            
-            result = cursor.fetchone()
-            if not result:
-                return
-            
-            old_confirmations, status = result
-            min_confirmations = self.config['coins'][coin_symbol]['min_confirmations']
-            
-            # Update confirmations
-            cursor.execute('''
-                UPDATE deposits 
-                SET confirmations = ?, 
-                    status = CASE 
-                        WHEN ? >= ? THEN 'confirmed' 
-                        ELSE 'pending' 
-                    END,
-                    confirmed_at = CASE 
-                        WHEN ? >= ? AND status != 'confirmed' THEN CURRENT_TIMESTAMP 
-                        ELSE confirmed_at 
-                    END
-                WHERE user_id = ? AND coin_symbol = ? AND tx_id = ?
-            ''', (confirmations, confirmations, min_confirmations, 
-                  confirmations, min_confirmations, user_id, coin_symbol, tx_id))
-            
-            self.db.connection.commit()
-            
-            # Send confirmation notification if just confirmed
-            if old_confirmations < min_confirmations and confirmations >= min_confirmations:
-                cursor.execute('''
-                    SELECT amount FROM deposits 
-                    WHERE user_id = ? AND coin_symbol = ? AND tx_id = ?
-                ''', (user_id, coin_symbol, tx_id))
-                
-                amount_result = cursor.fetchone()
-                if amount_result:
-                    amount = amount_result[0]
-                    await self._send_confirmed_deposit_notification(user_id, coin_symbol, amount, tx_id, confirmations)
-            
-        except Exception as e:
-            logger.error(f"Failed to update deposit confirmations: {e}")
+    async def _confirm_deposits(self, coin_symbol: str, height: int, min_confirmations: int):
+        """Credit and notify every deposit that reached min_confirmations at this height"""
+        def credit(deposit: Dict):
+            self._credit_deposit(deposit['user_id'], coin_symbol, deposit['address'], deposit['tx_id'],
+                                 deposit['vout'], deposit['amount'], height - deposit['block_height'] + 1, height)
+        
+        for deposit in self.db.confirm_deposits(coin_symbol, height, min_confirmations, credit):
+            await self._send_confirmed_deposit_notification(
+                deposit['user_id'], coin_symbol, deposit['amount'], deposit['tx_id'],
+                height - deposit['block_height'] + 1
+            )
     
-    async def _check_withdrawal_confirmations(self):
-        """Check for withdrawal confirmations"""
-        try:
-            cursor = self.db.connection.cursor()
-            
-            # Get pending withdrawals
-            cursor.execute('''
-                SELECT user_id, coin_symbol, amount, address, tx_id, fee
-                FROM withdrawals 
-                WHERE status = 'pending'
-            ''')
-            
-            pending_withdrawals = cursor.fetchall()
-            
-            for user_id, coin_symbol, amount, address, tx_id, fee in pending_withdrawals:
-                await self._check_withdrawal_status(user_id, coin_symbol, amount, address, tx_id, fee)
-                
-        except Exception as e:
-            logger.error(f"Failed to check withdrawal confirmations: {e}")
+    def _record_pending_deposit(self, user_id: int, coin_symbol: str, address: str, tx_id: str, vout: int,
+                                amount: float, confirmations: int, height: Optional[int]):
+        """Show an unconfirmed deposit in the user's pending balance"""
+        if not self.ledger or height is None:
+            return
+        
+        if self.ledger.should_credit_deposit(coin_symbol, height - confirmations + 1):
+            self.ledger.record_pending_deposit(user_id, coin_symbol, amount, tx_id, vout, address)
     
-    async def _check_withdrawal_status(self, user_id: int, coin_symbol: str, amount: float, address: str, tx_id: str, fee: float):
-        """Check the status of a specific withdrawal"""
-        try:
-            # Get transaction details
-            tx_info = await self.coin_interface.get_transaction(coin_symbol, tx_id)
-            
-            if 'error' in tx_info:
-                logger.warning(f"Could not get transaction info for {tx_id}: {tx_info['error']}")
-                return
-            
-            confirmations = tx_info.get('confirmations', 0)
-            min_confirmations = self.config['coins'][coin_symbol]['min_confirmations']
-            
-            if confirmations >= min_confirmations:
-                # Mark as confirmed
-                cursor = self.db.connection.cursor()
-                cursor.execute('''
-                    UPDATE withdrawals 
-                    SET status = 'confirmed', confirmed_at = CURRENT_TIMESTAMP
-                    WHERE user_id = ? AND coin_symbol = ? AND tx_id = ?
-                ''', (user_id, coin_symbol, tx_id))
-                
-                self.db.connection.commit()
-                
-                # Send confirmation notification
-                await self._send_confirmed_withdrawal_notification(user_id, coin_symbol, amount, address, tx_id, confirmations)
-                
-                logger.info(f"Withdrawal confirmed: {amount} {coin_symbol} for user {user_id}, TX: {tx_id}")
-            
-        except Exception as e:
-            logger.error(f"Failed to check withdrawal status for {tx_id}: {e}")
+    def _credit_deposit(self, user_id: int, coin_symbol: str, address: str, tx_id: str, vout: int,
+                        amount: float, confirmations: int, height: Optional[int]):
+        """Credit a confirmed deposit to the user's ledger balance, once"""
+        if not self.ledger or height is None:
+            return
+        
+        # Deposits mined before the ledger took over are in the opening balances
+        if not self.ledger.should_credit_deposit(coin_symbol, height - confirmations + 1):
+            return
+        
+        if self.ledger.credit_deposit(user_id, coin_symbol, amount, tx_id, vout, address):
+            logger.info(f"Credited deposit of {amount} {coin_symbol} to user {user_id}, TX: {tx_id}")
+    
+    async def _find_withdrawal_heights(self, coin_symbol: str, listed: Dict[str, Optional[int]], height: int):
+        """Store the block of sent withdrawals; ones missing from the listing are looked up once"""
+        unlisted = [tx_id for tx_id in self.db.get_unmined_withdrawals(coin_symbol) if tx_id not in listed]
+        
+        # Sent before the cursor, e.g. by an older version; the listing covers everything newer
+        if unlisted:
+            results = await self.coin_interface.batch(
+                coin_symbol, [('gettransaction', [tx_id]) for tx_id in unlisted], priority=Priority.BACKGROUND
+            )
+            for tx_id, result in zip(unlisted, results):
+                if result['success']:
+                    listed[tx_id] = mined_height(result['result'], height)
+                else:
+                    logger.warning(f"Could not get transaction info for {tx_id}: {result['error']}")
+        
+        self.db.set_withdrawal_heights(coin_symbol, [(block_height, tx_id) for tx_id, block_height in listed.items()])
+    
+    async def _confirm_withdrawals(self, coin_symbol: str, height: int, min_confirmations: int):
+        """Notify every withdrawal that reached min_confirmations at this height"""
+        for withdrawal in self.db.confirm_withdrawals(coin_symbol, height, min_confirmations):
+            await self._send_confirmed_withdrawal_notification(
+                withdrawal['user_id'], coin_symbol, withdrawal['amount'], withdrawal['address'],
+                withdrawal['tx_id'], height - withdrawal['block_height'] + 1
+            )
+            logger.info(f"Withdrawal confirmed: {withdrawal['amount']} {coin_symbol} "
+                        f"for user {withdrawal['user_id']}, TX: {withdrawal['tx_id']}")
     
     async def _send_pending_deposit_notification(self, user_id: int, coin_symbol: str, amount: float, tx_id: str):
         """Send pending deposit notification"""
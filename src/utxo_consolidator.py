@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+UTXO Consolidator - Sweeps small hot wallet outputs together while fees and traffic are low
+Powered By Aegisum EcoSystem
+"""
+
+import asyncio
+import logging
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from coin_interface import DaemonError, is_method_missing
+from daemon_scheduler import Priority
+from ledger import from_units, to_units
+
+logger = logging.getLogger(__name__)
+
+# Approximate P2PKH transaction sizes in bytes
+TX_OVERHEAD_BYTES = 10
+INPUT_BYTES = 148
+OUTPUT_BYTES = 34
+
+
+class UtxoConsolidator:
+    """Periodically merge a coin's dust outputs into one output per transaction"""
+    
+    def __init__(self, config: dict, coin_interface):
+        self.config = config
+        self.coin_interface = coin_interface
+        
+        consolidation_config = config.get('consolidation', {})
+        self.enabled = consolidation_config.get('enabled', False)
+        self.interval = consolidation_config.get('interval', 3600)
+        self.dust_threshold = consolidation_config.get('dust_threshold', 0.01)
+        self.min_utxos = consolidation_config.get('min_utxos', 50)
+        self.max_inputs = consolidation_config.get('max_inputs', 100)
+        self.max_fee_rate = consolidation_config.get('max_fee_rate', 0.0001)
+        self.max_fee = consolidation_config.get('max_fee', 0.01)
+        self.min_confirmations = consolidation_config.get('min_confirmations', 6)
+        
+        # Last run per coin, for admins
+        self.reports: Dict[str, Dict[str, Any]] = {}
+        
+        self.task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the background consolidation job"""
+        if self.enabled and self.task is None:
+            self.task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background consolidation job"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+    
+    def get_reports(self) -> Dict[str, Dict[str, Any]]:
+        """Result of the last consolidation run of every coin"""
+        return dict(self.reports)
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            
+            for coin_symbol in self.coin_interface.get_supported_coins():
+                if not self.coin_interface.is_coin_available(coin_symbol):
+                    continue
+                try:
+                    await self.consolidate(coin_symbol)
+                except Exception as e:
+                    logger.error(f"Error consolidating {coin_symbol} outputs: {e}")
+    
+    def _decimals(self, coin_symbol: str) -> int:
+        return self.config['coins'][coin_symbol].get('decimals', 8)
+    
+    def _fee_units(self, fee_rate: float, inputs: int, decimals: int) -> int:
+        """Fee in base units of a transaction with this many inputs and one output"""
+        size = TX_OVERHEAD_BYTES + INPUT_BYTES * inputs + OUTPUT_BYTES
+        return math.ceil(fee_rate * size / 1000 * 10 ** decimals)
+    
+    async def consolidate(self, coin_symbol: str) -> Dict[str, Any]:
+        """Sweep a coin's small outputs if fees and daemon load allow; returns the run's report"""
+        report = {
+            'coin_symbol': coin_symbol,
+            'started_at': datetime.now().isoformat(),
+            'utxos_before': None,
+            'utxos_after': None,
+            'transactions': [],
+            'inputs_swept': 0,
+            'fees_paid': 0.0,
+            'skipped': None
+        }
+        self.reports[coin_symbol] = report
+        
+        # Only when nothing else is waiting for this daemon
+        if self.coin_interface.get_scheduler_stats().get(coin_symbol, {}).get('queue_depth'):
+            report['skipped'] = 'daemon busy'
+            return report
+        
+        fee_rate = await self.coin_interface.estimate_fee(coin_symbol, priority=Priority.BACKGROUND)
+        if fee_rate > self.max_fee_rate:
+            report['skipped'] = f"fee rate {fee_rate} above {self.max_fee_rate}"
+            return report
+        
+        unspent = await self._list_unspent(coin_symbol)
+        report['utxos_before'] = len(unspent)
+        
+        decimals = self._decimals(coin_symbol)
+        threshold = to_units(self.dust_threshold, decimals)
+        input_fee = self._fee_units(fee_rate, 1, decimals) - self._fee_units(fee_rate, 0, decimals)
+        
+        # Small, confirmed, spendable outputs worth more than the fee to spend them
+        dust = [
+            utxo for utxo in unspent
+            if utxo.get('spendable', True)
+            and utxo.get('confirmations', 0) >= self.min_confirmations
+            and input_fee < to_units(utxo['amount'], decimals) < threshold
+        ]
+        if len(dust) < self.min_utxos:
+            report['skipped'] = f"{len(dust)} small outputs, fewer than {self.min_utxos}"
+            report['utxos_after'] = len(unspent)
+            return report
+        
+        dust.sort(key=lambda utxo: utxo['amount'])
+        budget = to_units(self.max_fee, decimals)
+        spent_fees = 0
+        
+        for start in range(0, len(dust), self.max_inputs):
+            batch = dust[start:start + self.max_inputs]
+            if len(batch) < 2:
+                break
+            
+            fee = self._fee_units(fee_rate, len(batch), decimals)
+            if spent_fees + fee > budget:
+                report['skipped'] = 'fee budget reached'
+                break
+            
+            tx_id = await self._sweep(coin_symbol, batch, fee, decimals)
+            if tx_id is None:
+                break
+            
+            spent_fees += fee
+            report['transactions'].append(tx_id)
+            report['inputs_swept'] += len(batch)
+        
+        report['fees_paid'] = from_units(spent_fees, decimals)
+        report['utxos_after'] = len(await self._list_unspent(coin_symbol))
+        
+        logger.info(f"{coin_symbol} consolidation: {report['utxos_before']} -> {report['utxos_after']} outputs "
+                    f"in {len(report['transactions'])} transactions, fees {report['fees_paid']}")
+        return report
+    
+    async def _list_unspent(self, coin_symbol: str) -> List[Dict[str, Any]]:
+        result = await self.coin_interface.call(coin_symbol, 'listunspent', [0, 9999999], Priority.BACKGROUND)
+        if not result['success']:
+            raise DaemonError(f"Failed to list {coin_symbol} outputs: {result['error']}")
+        return result['result'] or []
+    
+    async def _sweep(self, coin_symbol: str, utxos: List[Dict[str, Any]], fee: int, decimals: int) -> Optional[str]:
+        """Spend outputs into a single new wallet output; returns the txid or None"""
+        address = await self.coin_interface.call(coin_symbol, 'getrawchangeaddress', [], Priority.BACKGROUND)
+        if not address['success']:
+            logger.error(f"Failed to get a {coin_symbol} change address: {address['error']}")
+            return None
+        
+        total = sum(to_units(utxo['amount'], decimals) for utxo in utxos)
+        inputs = [{'txid': utxo['txid'], 'vout': utxo['vout']} for utxo in utxos]
+        outputs = {address['result']: from_units(total - fee, decimals)}
+        
+        raw = await self.coin_interface.call(
+            coin_symbol, 'createrawtransaction', [inputs, outputs], Priority.BACKGROUND
+        )
+        if not raw['success']:
+            logger.error(f"Failed to build {coin_symbol} consolidation: {raw['error']}")
+            return None
+        
+        signed = await self.coin_interface.call(
+            coin_symbol, 'signrawtransactionwithwallet', [raw['result']], Priority.BACKGROUND
+        )
+        if not signed['success'] and is_method_missing(signed):
+            # Older daemons
+            signed = await self.coin_interface.call(
+                coin_symbol, 'signrawtransaction', [raw['result']], Priority.BACKGROUND
+            )
+        if not signed['success'] or not signed['result'].get('complete'):
+            logger.error(f"Failed to sign {coin_symbol} consolidation: {signed['error'] or 'incomplete'}")
+            return None
+        
+        sent = await self.coin_interface.call(
+            coin_symbol, 'sendrawtransaction', [signed['result']['hex']], Priority.BACKGROUND
+        )
+        if not sent['success']:
+            logger.error(f"Failed to send {coin_symbol} consolidation: {sent['error']}")
+            return None
+        
+        return sent['result']
@@ -9,14 +9,24 @@ import json
 import logging
 import os
 import subprocess
-from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 from cryptography.fernet import Fernet
 import sqlite3
 
+from coin_interface import CoinInterface, DaemonError, DaemonTimeoutError
+from ledger import Ledger
+from rain_settlement import RainSettlement
+from restore_queue import RestoreQueue
+
 logger = logging.getLogger(__name__)
 
+# Coins whose keys are fetched at once while building a backup
+BACKUP_CONCURRENCY = 4
+
 class WalletManager:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, coin_interface: Optional[CoinInterface] = None, address_pool=None,
+                 ledger: Optional[Ledger] = None):
         self.config = config
         self.wallets_dir = "data/wallets"
         os.makedirs(self.wallets_dir, exist_ok=True)
@@ -29,28 +39,30 @@ class WalletManager:
             logger.warning("Generated new encryption key. Update your config!")
         
         self.cipher = Fernet(self.encryption_key)
+        
+        # All daemon traffic goes through the shared client so pooling,
+        # scheduling, timeouts and metrics apply to every call
+        self.coin_interface = coin_interface or CoinInterface(config)
+        
+        # Pre-generated deposit addresses, if the bot keeps a pool
+        self.address_pool = address_pool
+        
+        # Internal ledger holding user balances; tips and rain never touch the daemons
+        self.ledger = ledger
+        self.rain_settlement = RainSettlement(config, ledger)
+        
+        # Restores run in the background so key imports and rescans never block a command
+        self.restore_queue = RestoreQueue(config, self.coin_interface)
     
     async def generate_address(self, user_id: int, coin_symbol: str) -> str:
         """Generate a new address for a user and coin"""
         try:
-            coin_config = self.config['coins'][coin_symbol]
-            cli_path = coin_config['cli_path']
-            
-            # Generate new address using CLI
-            cmd = [cli_path, 'getnewaddress', f'user_{user_id}']
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            result = await self.coin_interface.call(coin_symbol, 'getnewaddress', [f'user_{user_id}'])
             
-            stdout, stderr = await process.communicate()
+            if not result['success']:
+                raise Exception(f"Daemon error: {result['error']}")
             
-            if process.returncode != 0:
-                raise Exception(f"CLI error: {stderr.decode()}")
-            
-            address = stdout.decode().strip()
+            address = result['result']
             
             # Store the address mapping
             await self._store_address_mapping(user_id, coin_symbol, address)
@@ -62,66 +74,28 @@ class WalletManager:
             logger.error(f"Failed to generate {coin_symbol} address for user {user_id}: {e}")
             raise
     
+    async def assign_address(self, user_id: int, coin_symbol: str) -> str:
+        """Give a user a deposit address, from the address pool when it has one"""
+        if self.address_pool:
+            address = self.address_pool.assign(user_id, coin_symbol)
+            if address:
+                await self._store_address_mapping(user_id, coin_symbol, address)
+                logger.info(f"Assigned pooled {coin_symbol} address to user {user_id}: {address}")
+                return address
+        
+        return await self.generate_address(user_id, coin_symbol)
+    
     async def get_balance(self, user_id: int, coin_symbol: str) -> float:
-        """Get user's balance for a specific coin"""
-        try:
-            coin_config = self.config['coins'][coin_symbol]
-            cli_path = coin_config['cli_path']
-            
-            # Get balance using CLI
-            cmd = [cli_path, 'getbalance', f'user_{user_id}']
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                # If account doesn't exist, return 0
-                if "Account does not exist" in stderr.decode():
-                    return 0.0
-                raise Exception(f"CLI error: {stderr.decode()}")
-            
-            balance = float(stdout.decode().strip())
-            return balance
-            
-        except Exception as e:
-            logger.error(f"Failed to get {coin_symbol} balance for user {user_id}: {e}")
-            return 0.0
+        """Get user's balance for a specific coin from the ledger"""
+        return self.ledger.get_balance(user_id, coin_symbol)
     
     async def send_tip(self, from_user_id: int, to_user_id: int, coin_symbol: str, amount: float) -> str:
         """Send a tip from one user to another"""
         try:
-            coin_config = self.config['coins'][coin_symbol]
-            cli_path = coin_config['cli_path']
-            
-            # Move coins from sender to receiver account
-            cmd = [
-                cli_path, 'move', 
-                f'user_{from_user_id}', 
-                f'user_{to_user_id}', 
-                str(amount)
-            ]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                raise Exception(f"CLI error: {stderr.decode()}")
-            
-            # Generate a pseudo transaction ID for internal tracking
-            tx_id = f"tip_{from_user_id}_{to_user_id}_{coin_symbol}_{int(asyncio.get_event_loop().time())}"
+            transfer_id = self.ledger.tip(from_user_id, to_user_id, coin_symbol, amount)
             
             logger.info(f"Tip sent: {amount} {coin_symbol} from user {from_user_id} to user {to_user_id}")
-            return tx_id
+            return f"tip_{transfer_id}"
             
         except Exception as e:
             logger.error(f"Failed to send tip: {e}")
@@ -130,29 +104,31 @@ class WalletManager:
     async def withdraw(self, user_id: int, coin_symbol: str, amount: float, address: str) -> str:
         """Withdraw coins to external address"""
         try:
-            coin_config = self.config['coins'][coin_symbol]
-            cli_path = coin_config['cli_path']
-            
-            # Send from user account to external address
-            cmd = [
-                cli_path, 'sendfrom', 
-                f'user_{user_id}', 
-                address, 
-                str(amount)
-            ]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                raise Exception(f"CLI error: {stderr.decode()}")
-            
-            tx_id = stdout.decode().strip()
+            # Lock the amount and fees first, so they can't be spent twice
+            withdrawal_fee = self.config['coins'][coin_symbol]['withdrawal_fee']
+            network_fee = self.coin_interface.fees.get_network_fee(coin_symbol)
+            transfer_id = self.ledger.debit_withdrawal(user_id, coin_symbol, amount, withdrawal_fee, network_fee, address)
+            
+            # Send from the wallet as a whole; balances live in the ledger, not daemon accounts
+            try:
+                result = await self.coin_interface.call(coin_symbol, 'sendtoaddress', [address, amount])
+            except DaemonTimeoutError:
+                # The daemon may still have sent it, so the funds stay locked until checked
+                logger.error(f"Withdrawal {transfer_id} for user {user_id} timed out, check {coin_symbol} wallet before refunding")
+                raise
+            except DaemonError:
+                self.ledger.reverse(transfer_id, 'withdrawal_refund')
+                raise
+            
+            if not result['success']:
+                self.ledger.reverse(transfer_id, 'withdrawal_refund')
+                raise Exception(f"Daemon error: {result['error']}")
+            
+            tx_id = result['result']
+            # The user pays what the transaction cost; the rest of the estimate goes back to them
+            network_fee_paid = await self.coin_interface.get_transaction_fee(coin_symbol, tx_id)
+            self.ledger.complete_withdrawal(transfer_id, amount, withdrawal_fee, network_fee, tx_id,
+                                            network_fee_paid=network_fee_paid)
             
             logger.info(f"Withdrawal sent: {amount} {coin_symbol} from user {user_id} to {address}, TX: {tx_id}")
             return tx_id
@@ -161,21 +137,17 @@ class WalletManager:
             logger.error(f"Failed to process withdrawal: {e}")
             raise
     
-    async def process_rain(self, sender_id: int, coin_symbol: str, total_amount: float, recipients: List[dict]) -> str:
+    async def process_rain(self, sender_id: int, coin_symbol: str, total_amount: float, recipients: List[dict],
+                           chat_id: Optional[int] = None) -> Dict[str, Any]:
         """Process rain distribution to multiple users"""
         try:
-            amount_per_user = total_amount / len(recipients)
-            
-            # Process each rain payment
-            for recipient in recipients:
-                recipient_id = recipient['user_id']
-                await self.send_tip(sender_id, recipient_id, coin_symbol, amount_per_user)
-            
-            # Generate rain ID for tracking
-            rain_id = f"rain_{sender_id}_{coin_symbol}_{int(asyncio.get_event_loop().time())}"
+            # One transaction: every recipient is paid and recorded, or nobody is
+            rain = self.rain_settlement.settle(
+                sender_id, coin_symbol, total_amount, [recipient['user_id'] for recipient in recipients], chat_id
+            )
             
-            logger.info(f"Rain processed: {total_amount} {coin_symbol} from user {sender_id} to {len(recipients)} recipients")
-            return rain_id
+            logger.info(f"Rain processed: {total_amount} {coin_symbol} from user {sender_id} to {rain['recipient_count']} recipients ({rain['rain_id']})")
+            return rain
             
         except Exception as e:
             logger.error(f"Failed to process rain: {e}")
@@ -184,27 +156,17 @@ class WalletManager:
     async def get_transaction_history(self, user_id: int, coin_symbol: str, limit: int = 10) -> List[dict]:
         """Get transaction history for a user"""
         try:
-            coin_config = self.config['coins'][coin_symbol]
-            cli_path = coin_config['cli_path']
-            
             # Get transactions for user account
-            cmd = [cli_path, 'listtransactions', f'user_{user_id}', str(limit)]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            result = await self.coin_interface.call(
+                coin_symbol, 'listtransactions', [f'user_{user_id}', limit]
             )
             
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                if "Account does not exist" in stderr.decode():
+            if not result['success']:
+                if "Account does not exist" in (result['error'] or ''):
                     return []
-                raise Exception(f"CLI error: {stderr.decode()}")
+                raise Exception(f"Daemon error: {result['error']}")
             
-            transactions = json.loads(stdout.decode())
-            return transactions
+            return result['result']
             
         except Exception as e:
             logger.error(f"Failed to get transaction history for user {user_id}: {e}")
@@ -217,29 +179,41 @@ class WalletManager:
                 'user_id': user_id,
                 'addresses': {},
                 'private_keys': {},
+                'key_times': {},
                 'timestamp': asyncio.get_event_loop().time()
             }
             
-            # Get addresses and private keys for all coins
-            for coin_symbol in self.config['coins']:
-                if self.config['coins'][coin_symbol]['enabled']:
-                    try:
-                        # Get address
-                        address = await self._get_user_address(user_id, coin_symbol)
-                        if address:
-                            backup_data['addresses'][coin_symbol] = address
-                            
-                            # Get private key
-                            private_key = await self._get_private_key(coin_symbol, address)
-                            if private_key:
-                                backup_data['private_keys'][coin_symbol] = private_key
-                                
-                    except Exception as e:
-                        logger.warning(f"Failed to backup {coin_symbol} for user {user_id}: {e}")
-            
-            # Encrypt backup data
+            # All of the user's addresses in one query
+            addresses = {
+                coin_symbol: entry
+                for coin_symbol, entry in self._get_user_addresses(user_id).items()
+                if coin_symbol in self.config['coins'] and self.config['coins'][coin_symbol]['enabled']
+            }
+            
+            # Fetch every coin's key at once; each daemon still bounds its own calls
+            limit = asyncio.Semaphore(BACKUP_CONCURRENCY)
+            
+            async def fetch_key(coin_symbol: str, address: str) -> Optional[str]:
+                async with limit:
+                    return await self._get_private_key(coin_symbol, address)
+            
+            private_keys = await asyncio.gather(
+                *(fetch_key(coin_symbol, address) for coin_symbol, (address, _) in addresses.items()),
+                return_exceptions=True
+            )
+            
+            for (coin_symbol, (address, created_at)), private_key in zip(addresses.items(), private_keys):
+                backup_data['addresses'][coin_symbol] = address
+                if isinstance(private_key, Exception):
+                    logger.warning(f"Failed to backup {coin_symbol} for user {user_id}: {private_key}")
+                elif private_key:
+                    backup_data['private_keys'][coin_symbol] = private_key
+                    # Lets a restore rescan from when the address was created
+                    backup_data['key_times'][coin_symbol] = created_at
+            
+            # Encrypt off the event loop so other users aren't kept waiting
             backup_json = json.dumps(backup_data)
-            encrypted_backup = self.cipher.encrypt(backup_json.encode())
+            encrypted_backup = await asyncio.to_thread(self.cipher.encrypt, backup_json.encode())
             
             return {
                 'encrypted_data': encrypted_backup.decode(),
@@ -251,32 +225,39 @@ class WalletManager:
             raise
     
     async def restore_wallet(self, user_id: int, encrypted_backup: str) -> dict:
-        """Restore wallet from encrypted backup"""
+        """Queue a restore from an encrypted backup; progress comes from get_restore_status"""
         try:
             # Decrypt backup data
-            decrypted_data = self.cipher.decrypt(encrypted_backup.encode())
+            decrypted_data = await asyncio.to_thread(self.cipher.decrypt, encrypted_backup.strip().encode())
             backup_data = json.loads(decrypted_data.decode())
             
-            restored_coins = []
-            
-            # Restore each coin
+            keys = {}
             for coin_symbol, private_key in backup_data['private_keys'].items():
                 if coin_symbol in self.config['coins'] and self.config['coins'][coin_symbol]['enabled']:
-                    try:
-                        await self._import_private_key(coin_symbol, private_key, f'user_{user_id}')
-                        restored_coins.append(coin_symbol)
-                    except Exception as e:
-                        logger.warning(f"Failed to restore {coin_symbol} for user {user_id}: {e}")
+                    keys[coin_symbol] = {
+                        'private_key': private_key,
+                        'address': backup_data['addresses'].get(coin_symbol),
+                        # Backups made before key times were recorded rescan the whole chain
+                        'timestamp': backup_data.get('key_times', {}).get(coin_symbol)
+                    }
+            
+            job = self.restore_queue.submit(user_id, keys)
             
             return {
-                'restored_coins': restored_coins,
-                'total_coins': len(backup_data['private_keys'])
+                'job_id': job['job_id'],
+                'queued_coins': list(keys),
+                'total_coins': len(backup_data['private_keys']),
+                'position': job['position']
             }
             
         except Exception as e:
             logger.error(f"Failed to restore wallet for user {user_id}: {e}")
             raise
     
+    def get_restore_status(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Progress of the user's latest wallet restore, if any"""
+        return self.restore_queue.get_user_job(user_id)
+    
     async def _store_address_mapping(self, user_id: int, coin_symbol: str, address: str):
         """Store address mapping in local database"""
         db_path = "data/address_mappings.db"
@@ -326,56 +307,49 @@ class WalletManager:
             logger.error(f"Failed to get address for user {user_id}, coin {coin_symbol}: {e}")
             return None
     
-    async def _get_private_key(self, coin_symbol: str, address: str) -> Optional[str]:
-        """Get private key for an address"""
+    def _get_user_addresses(self, user_id: int) -> Dict[str, Tuple[str, Optional[int]]]:
+        """All of a user's addresses as {coin: (address, unix time it was stored)}"""
+        db_path = "data/address_mappings.db"
+        
         try:
-            coin_config = self.config['coins'][coin_symbol]
-            cli_path = coin_config['cli_path']
-            
-            cmd = [cli_path, 'dumpprivkey', address]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
             
-            stdout, stderr = await process.communicate()
+            cursor.execute('''
+                SELECT coin_symbol, address, created_at FROM address_mappings 
+                WHERE user_id = ?
+            ''', (user_id,))
             
-            if process.returncode != 0:
-                raise Exception(f"CLI error: {stderr.decode()}")
+            rows = cursor.fetchall()
+            conn.close()
             
-            private_key = stdout.decode().strip()
-            return private_key
+            addresses = {}
+            for coin_symbol, address, created_at in rows:
+                timestamp = None
+                if created_at:
+                    # SQLite's CURRENT_TIMESTAMP is UTC
+                    timestamp = int(datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+                                    .replace(tzinfo=timezone.utc).timestamp())
+                addresses[coin_symbol] = (address, timestamp)
+            return addresses
             
         except Exception as e:
-            logger.error(f"Failed to get private key for {coin_symbol} address {address}: {e}")
-            return None
+            logger.error(f"Failed to get addresses for user {user_id}: {e}")
+            return {}
     
-    async def _import_private_key(self, coin_symbol: str, private_key: str, account: str):
-        """Import private key into wallet"""
+    async def _get_private_key(self, coin_symbol: str, address: str) -> Optional[str]:
+        """Get private key for an address"""
         try:
-            coin_config = self.config['coins'][coin_symbol]
-            cli_path = coin_config['cli_path']
-            
-            cmd = [cli_path, 'importprivkey', private_key, account]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            result = await self.coin_interface.call(coin_symbol, 'dumpprivkey', [address])
             
-            stdout, stderr = await process.communicate()
+            if not result['success']:
+                raise Exception(f"Daemon error: {result['error']}")
             
-            if process.returncode != 0:
-                raise Exception(f"CLI error: {stderr.decode()}")
-            
-            logger.info(f"Imported private key for {coin_symbol} into account {account}")
+            return result['result']
             
         except Exception as e:
-            logger.error(f"Failed to import private key for {coin_symbol}: {e}")
-            raise
+            logger.error(f"Failed to get private key for {coin_symbol} address {address}: {e}")
+            return None
     
     async def check_deposits(self, user_id: int, coin_symbol: str) -> List[dict]:
         """Check for new deposits for a user"""
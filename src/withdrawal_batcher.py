@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Withdrawal Batcher - Queues withdrawals and pays them per coin with one sendmany
+Powered By Aegisum EcoSystem
+"""
+
+import asyncio
+import logging
+import secrets
+import time
+from typing import Dict, List, Optional, Set
+
+from coin_interface import DaemonError, DaemonTimeoutError
+from daemon_scheduler import Priority
+from ledger import from_units, to_units
+
+logger = logging.getLogger(__name__)
+
+# sendmany comment identifying a batch in the wallet's transaction list
+BATCH_COMMENT_PREFIX = 'tipbot-batch:'
+TRANSACTIONS_PAGE = 100
+
+
+class WithdrawalBatcher:
+    """Collect withdrawals in the database and flush them into one transaction per coin"""
+    
+    def __init__(self, config: dict, database, coin_interface, ledger):
+        self.config = config
+        self.db = database
+        self.coin_interface = coin_interface
+        self.ledger = ledger
+        
+        batch_config = config.get('withdrawal_batching', {})
+        self.enabled = batch_config.get('enabled', False)
+        self.flush_interval = batch_config.get('flush_interval', 60)
+        self.max_batch = batch_config.get('max_batch', 50)
+        # How long a batch whose sendmany never answered may be missing from the wallet before it is requeued
+        self.recovery_delay = batch_config.get('recovery_delay', 600)
+        
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+    
+    def start(self):
+        """Start the background flusher"""
+        if self.enabled and self.task is None:
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background flusher"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+    
+    def queue(self, user_id: int, coin_symbol: str, amount: float, address: str) -> int:
+        """Lock a withdrawal in the ledger and queue it for the next batch; returns its id"""
+        withdrawal_fee = self.config['coins'][coin_symbol]['withdrawal_fee']
+        network_fee = self.coin_interface.fees.get_network_fee(coin_symbol)
+        
+        withdrawal_ids = []
+        
+        def record(cursor, transfer_id: int):
+            withdrawal_ids.append(self.db.insert_queued_withdrawal(
+                cursor, user_id, coin_symbol, amount, address, withdrawal_fee, network_fee, transfer_id
+            ))
+        
+        self.ledger.debit_withdrawal(user_id, coin_symbol, amount, withdrawal_fee, network_fee, address,
+                                     on_applied=record)
+        
+        # A full batch goes out without waiting for the interval
+        if self.wakeup is not None and self.db.count_withdrawals(coin_symbol, 'queued') >= self.max_batch:
+            self.wakeup.set()
+        
+        logger.info(f"Queued withdrawal {withdrawal_ids[0]}: {amount} {coin_symbol} from user {user_id} to {address}")
+        return withdrawal_ids[0]
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            
+            for coin_symbol in self.coin_interface.get_supported_coins():
+                if not self.coin_interface.is_coin_available(coin_symbol):
+                    continue
+                try:
+                    await self.recover(coin_symbol)
+                    await self.flush(coin_symbol)
+                except Exception as e:
+                    logger.error(f"Error sending {coin_symbol} withdrawal batch: {e}")
+    
+    async def flush(self, coin_symbol: str) -> int:
+        """Send every queued withdrawal of a coin, max_batch per transaction; returns how many were sent"""
+        sent = 0
+        while True:
+            withdrawals = self.db.get_queued_withdrawals(coin_symbol, self.max_batch)
+            if not withdrawals:
+                return sent
+            
+            paid = await self._send_batch(coin_symbol, withdrawals)
+            if paid is None:
+                return sent
+            sent += paid
+    
+    async def _send_batch(self, coin_symbol: str, withdrawals: List[Dict]) -> Optional[int]:
+        """Pay withdrawals in one sendmany; None if the daemon could not be used"""
+        decimals = self.ledger.decimals(coin_symbol)
+        
+        # sendmany takes each address once, so payments to the same address are combined
+        amounts: Dict[str, int] = {}
+        for withdrawal in withdrawals:
+            amounts[withdrawal['address']] = amounts.get(withdrawal['address'], 0) + to_units(withdrawal['amount'], decimals)
+        
+        ids = [withdrawal['id'] for withdrawal in withdrawals]
+        batch_id = secrets.token_hex(8)
+        self.db.start_withdrawal_batch(ids, batch_id)
+        
+        try:
+            result = await self.coin_interface.call(
+                coin_symbol, 'sendmany',
+                ['', {address: from_units(units, decimals) for address, units in amounts.items()},
+                 1, f"{BATCH_COMMENT_PREFIX}{batch_id}"],
+                Priority.SEND
+            )
+        except DaemonTimeoutError:
+            # The daemon may still have sent it; recover() looks for the batch's comment in the wallet
+            logger.error(f"{coin_symbol} withdrawal batch {batch_id} ({ids}) timed out, "
+                         f"it will be completed or requeued once the wallet has been checked")
+            return None
+        except DaemonError as e:
+            self.db.set_withdrawals_status(ids, 'queued')
+            logger.warning(f"{coin_symbol} withdrawal batch postponed: {e}")
+            return None
+        
+        if result['success']:
+            paid = await self._network_fee_shares(coin_symbol, result['result'], len(withdrawals))
+            self._complete(withdrawals, result['result'], paid)
+            logger.info(f"Sent {len(withdrawals)} {coin_symbol} withdrawals in one transaction, TX: {result['result']}")
+            return len(withdrawals)
+        
+        if len(withdrawals) == 1:
+            self._refund(coin_symbol, withdrawals[0], result['error'])
+            return 0
+        
+        # One bad withdrawal fails the whole batch, so send them one by one instead
+        logger.warning(f"{coin_symbol} withdrawal batch refused ({result['error']}), sending individually")
+        self.db.set_withdrawals_status(ids, 'queued')
+        paid = 0
+        for withdrawal in withdrawals:
+            sent = await self._send_batch(coin_symbol, [withdrawal])
+            if sent is None:
+                return None
+            paid += sent
+        return paid
+    
+    async def _network_fee_shares(self, coin_symbol: str, tx_id: str, count: int) -> Optional[List[float]]:
+        """The batch transaction's fee split evenly over its withdrawals, or None if it is unknown"""
+        fee = await self.coin_interface.get_transaction_fee(coin_symbol, tx_id)
+        if fee is None:
+            logger.warning(f"Keeping the network fees charged for {coin_symbol} batch {tx_id}")
+            return None
+        
+        decimals = self.ledger.decimals(coin_symbol)
+        share, remainder = divmod(to_units(fee, decimals), count)
+        return [from_units(share + (1 if i < remainder else 0), decimals) for i in range(count)]
+    
+    def _complete(self, withdrawals: List[Dict], tx_id: str, network_fees: Optional[List[float]] = None):
+        """Release the sent withdrawals in one database transaction, refunding any network fee
+        charged beyond their share"""
+        if network_fees is None:
+            network_fees = [withdrawal['network_fee'] for withdrawal in withdrawals]
+        
+        def record(cursor):
+            self.db.mark_withdrawals_sent(cursor, tx_id, [
+                (min(paid, withdrawal['network_fee']), withdrawal['id'])
+                for withdrawal, paid in zip(withdrawals, network_fees)
+            ])
+        
+        self.ledger.complete_withdrawals(
+            [dict(withdrawal, network_fee_paid=paid) for withdrawal, paid in zip(withdrawals, network_fees)],
+            tx_id, on_applied=record
+        )
+    
+    async def recover(self, coin_symbol: str) -> int:
+        """Settle batches left 'sending' by a timeout or restart: complete the ones the wallet sent,
+        requeue the ones it still has no trace of after recovery_delay; returns how many withdrawals"""
+        batches = self.db.get_sending_batches(coin_symbol)
+        if not batches:
+            return 0
+        
+        oldest = max(withdrawal['age'] for withdrawals in batches.values() for withdrawal in withdrawals)
+        sent = await self._find_batch_transactions(coin_symbol, set(batches), oldest)
+        
+        settled = 0
+        for batch_id, withdrawals in batches.items():
+            tx_id = sent.get(batch_id)
+            if tx_id:
+                paid = await self._network_fee_shares(coin_symbol, tx_id, len(withdrawals))
+                self._complete(withdrawals, tx_id, paid)
+                logger.info(f"Found {coin_symbol} withdrawal batch {batch_id} in the wallet, TX: {tx_id}")
+            elif withdrawals[0]['age'] >= self.recovery_delay:
+                self.db.set_withdrawals_status([withdrawal['id'] for withdrawal in withdrawals], 'queued')
+                logger.warning(f"{coin_symbol} withdrawal batch {batch_id} was never sent, requeued it")
+            else:
+                continue
+            settled += len(withdrawals)
+        return settled
+    
+    async def _find_batch_transactions(self, coin_symbol: str, batch_ids: Set[str], max_age: int) -> Dict[str, str]:
+        """Transaction ids of the batches the wallet has sent, by batch id"""
+        # Wallet times come from the daemon's clock, so allow some skew
+        since = time.time() - max_age - 3600
+        found: Dict[str, str] = {}
+        skip = 0
+        while len(found) < len(batch_ids):
+            result = await self.coin_interface.call(
+                coin_symbol, 'listtransactions', ['*', TRANSACTIONS_PAGE, skip], Priority.SEND
+            )
+            if not result['success']:
+                raise DaemonError(f"Failed to list {coin_symbol} transactions: {result['error']}")
+            
+            page = result['result'] or []
+            for tx in page:
+                comment = tx.get('comment') or ''
+                if tx.get('category') == 'send' and comment.startswith(BATCH_COMMENT_PREFIX):
+                    batch_id = comment[len(BATCH_COMMENT_PREFIX):]
+                    if batch_id in batch_ids:
+                        found[batch_id] = tx['txid']
+            
+            # Pages run from the newest transactions back; stop before the first batch was attempted
+            if len(page) < TRANSACTIONS_PAGE or min(tx.get('time', 0) for tx in page) < since:
+                break
+            skip += TRANSACTIONS_PAGE
+        return found
+    
+    def _refund(self, coin_symbol: str, withdrawal: Dict, error: str):
+        self.db.set_withdrawals_status([withdrawal['id']], 'failed')
+        self.ledger.reverse(withdrawal['transfer_id'], 'withdrawal_refund')
+        logger.error(f"{coin_symbol} withdrawal {withdrawal['id']} for user {withdrawal['user_id']} "
+                     f"refused and refunded: {error}")
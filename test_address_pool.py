@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test Address Pool - Refilling, assigning and labeling pooled addresses against the mock daemon
+"""
+
+import asyncio
+
+import pytest
+
+from address_pool import AddressPool
+from coin_interface import CoinInterface
+from database import Database
+
+
+@pytest.mark.parametrize('disabled_methods', [[], ['setaccount']])
+def test_assigned_addresses_are_labeled_once(config, tmp_path, disabled_methods):
+    async def run():
+        db = Database(str(tmp_path / "tipbot.db"))
+        await db.initialize()
+        coin_interface = CoinInterface(config)
+        pool = AddressPool({**config, 'address_pool': {'enabled': True}}, db, coin_interface)
+        try:
+            await coin_interface.call('AEGS', 'mock_set', [{'disabled_methods': disabled_methods}])
+            assert await pool.refill('AEGS') == pool.high_watermark
+            
+            address = pool.assign(5, 'AEGS')
+            assert address is not None
+            
+            assert await pool.label_assigned('AEGS') == 1
+            assert await pool.label_assigned('AEGS') == 0
+            
+            account = await coin_interface.call('AEGS', 'getaccount', [address])
+            assert account['result'] == ('address_pool' if disabled_methods else 'user_5')
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_pool_is_off_unless_enabled(tmp_path):
+    async def run():
+        db = Database(str(tmp_path / "tipbot.db"))
+        await db.initialize()
+        pool = AddressPool({'coins': {}}, db, None)
+        
+        pool.start()
+        assert pool.task is None
+        assert pool.assign(5, 'AEGS') is None
+    
+    asyncio.run(run())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test Coin Interface - Coalescing and deadlines of daemon calls against the mock daemon
+"""
+
+import asyncio
+import sys
+import time
+
+import pytest
+
+from coin_interface import CoinInterface, DaemonTimeoutError, run_cli_command
+
+
+async def method_calls(coin_interface, method):
+    """How many times the mock daemon has answered a method"""
+    stats = await coin_interface.call('AEGS', 'mock_stats')
+    return stats['result']['methods'].get(method, 0)
+
+
+def test_identical_reads_in_flight_share_one_request(config):
+    async def run():
+        coin_interface = CoinInterface(config)
+        try:
+            await coin_interface.call('AEGS', 'mock_set', [{'latency_ms': 100}])
+            
+            results = await asyncio.gather(*[
+                coin_interface.call('AEGS', 'getbalance', ['user_1']) for _ in range(10)
+            ])
+            assert all(result == results[0] for result in results)
+            assert await method_calls(coin_interface, 'getbalance') == 1
+            assert coin_interface.inflight.shared_calls == 9
+            
+            # Different parameters are different requests
+            await asyncio.gather(*[
+                coin_interface.call('AEGS', 'getbalance', [f"user_{n}"]) for n in range(3)
+            ])
+            assert await method_calls(coin_interface, 'getbalance') == 4
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_calls_that_change_state_are_never_shared(config):
+    async def run():
+        coin_interface = CoinInterface(config)
+        try:
+            await coin_interface.call('AEGS', 'mock_set', [{'latency_ms': 50}])
+            
+            addresses = await asyncio.gather(*[
+                coin_interface.call('AEGS', 'getnewaddress', ['user_1']) for _ in range(5)
+            ])
+            assert len({address['result'] for address in addresses}) == 5
+            assert coin_interface.inflight.shared_calls == 0
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_one_caller_giving_up_does_not_cancel_the_shared_call(config):
+    async def run():
+        coin_interface = CoinInterface(config)
+        try:
+            await coin_interface.call('AEGS', 'mock_set', [{'latency_ms': 100}])
+            
+            first = asyncio.ensure_future(coin_interface.call('AEGS', 'getblockcount'))
+            second = asyncio.ensure_future(coin_interface.call('AEGS', 'getblockcount'))
+            await asyncio.sleep(0.02)
+            first.cancel()
+            
+            result = await second
+            assert result['success']
+            assert first.cancelled()
+            assert await method_calls(coin_interface, 'getblockcount') == 1
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_slow_call_raises_a_timeout_at_its_deadline(config):
+    async def run():
+        coin_interface = CoinInterface({**config, 'daemon': {'timeouts': {'read': 0.2}}})
+        try:
+            await coin_interface.call('AEGS', 'mock_set', [{'latency_ms': 1000}])
+            
+            started = time.monotonic()
+            with pytest.raises(DaemonTimeoutError) as error:
+                await coin_interface.call('AEGS', 'getblockcount')
+            assert time.monotonic() - started < 0.9
+            assert (error.value.coin_symbol, error.value.method, error.value.timeout) == ('AEGS', 'getblockcount', 0.2)
+            assert coin_interface.get_latency_stats()['AEGS']['getblockcount']['timeouts'] == 1
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_deadline_includes_the_wait_for_a_slot(config):
+    async def run():
+        coin_interface = CoinInterface({**config, 'daemon': {'max_concurrent_calls': 1, 'timeouts': {'read': 0.2}}})
+        scheduler = coin_interface.scheduler.schedulers['AEGS']
+        try:
+            await scheduler.acquire()
+            with pytest.raises(DaemonTimeoutError):
+                await coin_interface.call('AEGS', 'getblockcount')
+            
+            # The abandoned wait does not keep the slot once it is free again
+            scheduler.release()
+            assert (await coin_interface.call('AEGS', 'getblockcount'))['success']
+            assert scheduler.in_flight == 0
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_cli_command_is_killed_at_its_deadline():
+    async def run():
+        started = time.monotonic()
+        with pytest.raises(DaemonTimeoutError):
+            await run_cli_command('AEGS', 'getblockcount', [sys.executable, '-c', 'import time; time.sleep(10)'], 0.2)
+        assert time.monotonic() - started < 5
+    
+    asyncio.run(run())
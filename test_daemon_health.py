@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test Daemon Health - Circuit breakers and the saved health snapshot
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from coin_interface import CoinInterface, DaemonUnavailableError
+from daemon_health import CircuitBreaker, load_snapshot
+
+
+def test_circuit_opens_after_repeated_failures_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    
+    time.sleep(0.06)
+    # One trial call at a time while half open
+    assert breaker.allow()
+    assert not breaker.allow()
+    
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_down_daemon_fails_fast_and_is_saved_as_unavailable(config, tmp_path):
+    snapshot_path = str(tmp_path / "daemon_health.json")
+    
+    async def run():
+        coin_interface = CoinInterface({**config, 'daemon': {'health': {
+            'failure_threshold': 2, 'reset_timeout': 60, 'snapshot_path': snapshot_path
+        }}})
+        try:
+            await coin_interface.refresh_health()
+            assert load_snapshot(snapshot_path)['coins']['AEGS']['available']
+            
+            await coin_interface.call('AEGS', 'mock_set', [{'down': True}])
+            for _ in range(2):
+                result = await coin_interface.call('AEGS', 'getblockcount')
+                assert not result['success']
+            
+            with pytest.raises(DaemonUnavailableError):
+                await coin_interface.call('AEGS', 'getblockcount')
+            assert not await coin_interface.check_daemon_status('AEGS')
+            
+            await coin_interface.refresh_health()
+            coin = load_snapshot(snapshot_path)['coins']['AEGS']
+            assert (coin['available'], coin['state'], coin['consecutive_failures']) == (False, 'open', 2)
+            assert coin['last_error']
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_missing_snapshot_loads_as_none(tmp_path):
+    assert load_snapshot(str(tmp_path / "daemon_health.json")) is None
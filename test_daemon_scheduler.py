@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test Daemon Scheduler - Concurrency caps and priority order of daemon call slots
+"""
+
+import asyncio
+
+from daemon_scheduler import CoinScheduler, DaemonScheduler, Priority
+
+
+def test_calls_never_exceed_the_concurrency_cap():
+    async def run():
+        scheduler = CoinScheduler('AEGS', max_concurrent=2)
+        running = []
+        peak = 0
+        
+        async def work():
+            nonlocal peak
+            async with scheduler.slot():
+                running.append(1)
+                peak = max(peak, len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+        
+        await asyncio.gather(*[work() for _ in range(10)])
+        assert peak == 2
+        assert scheduler.in_flight == 0
+        assert scheduler.get_stats()['waits']['user']['calls'] == 10
+    
+    asyncio.run(run())
+
+
+def test_waiting_sends_go_before_user_reads_before_background_work():
+    async def run():
+        scheduler = CoinScheduler('AEGS', max_concurrent=1)
+        order = []
+        
+        async def work(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+        
+        await scheduler.acquire()
+        tasks = []
+        for name, priority in [('sweep', Priority.BACKGROUND), ('balance', Priority.USER),
+                               ('withdraw', Priority.SEND), ('backup', Priority.BACKGROUND)]:
+            tasks.append(asyncio.ensure_future(work(name, priority)))
+            await asyncio.sleep(0)
+        assert scheduler.get_stats()['queue_depth'] == 4
+        
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        # Equal priorities keep their arrival order
+        assert order == ['withdraw', 'balance', 'sweep', 'backup']
+    
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_hold_a_slot():
+    async def run():
+        scheduler = CoinScheduler('AEGS', max_concurrent=1)
+        await scheduler.acquire()
+        
+        waiter = asyncio.ensure_future(scheduler.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth() == 0
+        
+        scheduler.release()
+        assert scheduler.in_flight == 0
+        await asyncio.wait_for(scheduler.acquire(), 1)
+    
+    asyncio.run(run())
+
+
+def test_coins_can_override_the_default_cap():
+    scheduler = DaemonScheduler({
+        'daemon': {'max_concurrent_calls': 8},
+        'coins': {
+            'AEGS': {'enabled': True},
+            'PEPE': {'enabled': True, 'max_concurrent_calls': 2},
+            'SHIC': {'enabled': False}
+        }
+    })
+    
+    stats = scheduler.get_stats()
+    assert {coin: coin_stats['max_concurrent'] for coin, coin_stats in stats.items()} == {'AEGS': 8, 'PEPE': 2}
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test Database - The in-memory index of deposit addresses
+"""
+
+import asyncio
+
+from database import Database
+
+
+def test_stored_addresses_are_indexed_per_coin(tmp_path):
+    async def run():
+        db = Database(str(tmp_path / "tipbot.db"))
+        await db.initialize()
+        db.store_user_address(1, 'AEGS', 'Aaddress1')
+        db.store_user_address(2, 'AEGS', 'Aaddress2')
+        db.store_user_address(1, 'SHIC', 'Saddress1')
+        
+        assert db.get_address_owners('AEGS') == {'Aaddress1': 1, 'Aaddress2': 2}
+        assert db.get_address_owners('SHIC') == {'Saddress1': 1}
+        assert db.get_address_owners('PEPE') == {}
+        
+        # A replaced address still belongs to its user, for deposits sent to it late
+        db.store_user_address(1, 'AEGS', 'Aaddress3')
+        assert db.get_address_owners('AEGS') == {'Aaddress1': 1, 'Aaddress2': 2, 'Aaddress3': 1}
+        db.connection.close()
+    
+    asyncio.run(run())
+
+
+def test_index_is_loaded_at_startup(tmp_path):
+    async def run():
+        db = Database(str(tmp_path / "tipbot.db"))
+        await db.initialize()
+        db.store_user_address(1, 'AEGS', 'Aaddress1')
+        db.store_user_address(2, 'SHIC', 'Saddress2')
+        db.connection.close()
+        
+        restarted = Database(str(tmp_path / "tipbot.db"))
+        await restarted.initialize()
+        assert restarted.get_address_owners('AEGS') == {'Aaddress1': 1}
+        assert restarted.get_address_owners('SHIC') == {'Saddress2': 2}
+        restarted.connection.close()
+    
+    asyncio.run(run())
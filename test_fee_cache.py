@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test Fee Cache - Cached fee estimates, their fallbacks and refreshes from the mock daemon
+"""
+
+import asyncio
+
+from coin_interface import CoinInterface
+from fee_cache import FeeCache
+
+CONFIG = {'coins': {'AEGS': {'enabled': True, 'network_fee': 0.001}}}
+
+
+def test_configured_fee_is_used_until_an_estimate_arrives():
+    fees = FeeCache(CONFIG)
+    assert fees.get('AEGS')['source'] == 'config'
+    assert fees.get_network_fee('AEGS') == 0.001
+    
+    # 0.25 kB at 0.01 per kB, never below the configured fee
+    fees.update('AEGS', 0.01, height=100)
+    assert fees.get('AEGS')['source'] == 'live'
+    assert fees.get_network_fee('AEGS') == 0.0025
+    fees.update('AEGS', 0.0001, height=100)
+    assert fees.get_network_fee('AEGS') == 0.001
+
+
+def test_estimate_expires_with_its_ttl_or_a_new_block():
+    fees = FeeCache(CONFIG)
+    assert fees.needs_refresh('AEGS')
+    
+    fees.update('AEGS', 0.01, height=100)
+    assert not fees.needs_refresh('AEGS', 100)
+    assert fees.needs_refresh('AEGS', 101)
+    
+    expired = FeeCache({**CONFIG, 'daemon': {'fees': {'ttl': 0}}})
+    expired.update('AEGS', 0.01, height=100)
+    assert expired.needs_refresh('AEGS', 100)
+    # The last good estimate is still served, marked stale
+    assert expired.get_fee_rate('AEGS', fresh_only=True) is None
+    assert (expired.get('AEGS')['source'], expired.get_fee_rate('AEGS')) == ('stale', 0.01)
+
+
+def health_config(config, tmp_path):
+    return {**config, 'daemon': {'health': {'snapshot_path': str(tmp_path / "daemon_health.json")}}}
+
+
+def test_health_refresh_fills_the_cache_and_estimates_skip_the_daemon(config, tmp_path):
+    async def run():
+        coin_interface = CoinInterface(health_config(config, tmp_path))
+        try:
+            await coin_interface.refresh_health()
+            assert coin_interface.get_fee_estimate('AEGS')['fee_rate'] == 0.0001
+            
+            stats = await coin_interface.call('AEGS', 'mock_stats')
+            calls = stats['result']['methods']['estimatefee']
+            for _ in range(5):
+                assert await coin_interface.estimate_fee('AEGS') == 0.0001
+            stats = await coin_interface.call('AEGS', 'mock_stats')
+            assert stats['result']['methods']['estimatefee'] == calls
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_failed_refresh_keeps_the_last_good_estimate(config, tmp_path):
+    async def run():
+        coin_interface = CoinInterface(health_config(config, tmp_path))
+        try:
+            await coin_interface.refresh_health()
+            await coin_interface.call('AEGS', 'mock_set', [{'disabled_methods': ['estimatefee', 'estimatesmartfee']}])
+            await coin_interface.call('AEGS', 'mock_mine', [1])
+            
+            await coin_interface.refresh_health()
+            assert coin_interface.fees.needs_refresh('AEGS', coin_interface.health.blocks['AEGS'])
+            assert coin_interface.get_fee_estimate('AEGS')['fee_rate'] == 0.0001
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Test HD Wallet - BIP32 derivation, addresses and WIF keys
+"""
+
+from hd_wallet import ExtendedKey, derive_key, get_hd_config
+
+# BIP32 test vector 1
+MASTER = ExtendedKey.from_seed(bytes.fromhex('000102030405060708090a0b0c0d0e0f'))
+
+
+def test_master_key_matches_the_bip32_test_vector():
+    assert MASTER.private_key == 0xe8f32e723decf4051aefac8e2c93c9c5b214313817cdb01a1494b917c8436b35
+    assert MASTER.address(0) == '15mKKb2eos1hWa6tisdPwwDC1a5J1y9nma'
+    assert MASTER.wif(128) == 'L52XzL2cMkHxqxBXRyEpnPQZGUs3uKiL3R11XbAdHigRzDozKZeW'
+
+
+def test_hardened_child_matches_the_bip32_test_vector():
+    assert MASTER.derive_path("m/0'").address(0) == '19Q2WoS5hSS6T8GjhK8KZLMgmWaq4neXrh'
+
+
+def test_public_derivation_matches_private_derivation():
+    account = MASTER.derive_path("m/44'/0'/0'")
+    assert account.neuter().derive_path('0/5').address(0) == account.derive_path('0/5').address(0)
+
+
+def test_wif_version_defaults_to_128_above_the_address_version():
+    config = {'coins': {'DOGE': {'hd': {'enabled': True, 'coin_type': 3, 'pubkey_version': 30}}}}
+    assert get_hd_config(config, 'DOGE')['wif_version'] == 158
+    assert get_hd_config({'coins': {'DOGE': {}}}, 'DOGE') is None
+
+
+def test_derived_key_belongs_to_the_derived_address():
+    hd_config = {'coin_type': 0, 'pubkey_version': 0, 'wif_version': 128, 'account': 0}
+    address, wif, path = derive_key(MASTER, hd_config)
+    
+    assert path == "m/44'/0'/0'/0/0"
+    key = MASTER.derive_path(path)
+    assert (address, wif) == (key.address(0), key.wif(128))
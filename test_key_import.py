@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test Key Importer - Importing derived keys into the daemon, with a rescan for restored seeds
+"""
+
+import asyncio
+import sqlite3
+
+from key_import import KeyImporter
+
+
+class ReversingCipher:
+    """Stands in for the Fernet cipher"""
+    
+    def encrypt(self, data: bytes) -> bytes:
+        return data[::-1]
+    
+    def decrypt(self, data: bytes) -> bytes:
+        return data[::-1]
+
+
+class RecordingDaemon:
+    """Stands in for the coin interface, keeping calls"""
+    
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = missing
+    
+    def get_supported_coins(self):
+        return ['AEGS']
+    
+    async def call(self, coin_symbol, method, params=None, priority=None):
+        self.calls.append((method, params))
+        if method in self.missing:
+            return {'success': False, 'error': 'Method not found', 'code': -32601}
+        if method == 'importmulti':
+            return {'success': True, 'result': [{'success': True} for _ in params[0]]}
+        return {'success': True, 'result': None}
+    
+    async def batch(self, coin_symbol, calls, priority=None):
+        return [await self.call(coin_symbol, method, params) for method, params in calls]
+
+
+def stored_keys(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT address, encrypted_key, imported FROM hd_key_imports ORDER BY address").fetchall()
+    conn.close()
+    return rows
+
+
+def test_new_keys_are_imported_without_a_rescan(tmp_path):
+    db_path = str(tmp_path / "wallets.db")
+    daemon = RecordingDaemon()
+    importer = KeyImporter({}, db_path, daemon, ReversingCipher())
+    
+    async def run():
+        importer.queue('AEGS', 'Aaddress1', 'Kkey1', 'user_1')
+        importer.queue('AEGS', 'Aaddress2', 'Kkey2', 'user_2')
+        await importer.stop()
+        return await importer.flush('AEGS')
+    
+    assert asyncio.run(run()) == 2
+    assert daemon.calls == [('importmulti', [[
+        {'scriptPubKey': {'address': 'Aaddress1'}, 'keys': ['Kkey1'], 'label': 'user_1', 'timestamp': 'now'},
+        {'scriptPubKey': {'address': 'Aaddress2'}, 'keys': ['Kkey2'], 'label': 'user_2', 'timestamp': 'now'}
+    ], {'rescan': False}])]
+    # Keys are erased once the daemon has them
+    assert stored_keys(db_path) == [('Aaddress1', None, 1), ('Aaddress2', None, 1)]
+
+
+def test_restored_seeds_rescan_once_from_the_oldest_birth_height(tmp_path):
+    db_path = str(tmp_path / "wallets.db")
+    daemon = RecordingDaemon()
+    importer = KeyImporter({}, db_path, daemon, ReversingCipher())
+    
+    async def run():
+        importer.queue('AEGS', 'Aaddress1', 'Kkey1', 'user_1', rescan_from=500)
+        importer.queue('AEGS', 'Aaddress2', 'Kkey2', 'user_2', rescan_from=200)
+        importer.queue('AEGS', 'Aaddress3', 'Kkey3', 'user_3')
+        await importer.stop()
+        return await importer.flush('AEGS')
+    
+    assert asyncio.run(run()) == 3
+    assert [method for method, _ in daemon.calls] == ['importmulti', 'rescanblockchain']
+    assert daemon.calls[1] == ('rescanblockchain', [200])
+
+
+def test_restored_keys_stay_queued_until_the_rescan_succeeds(tmp_path):
+    db_path = str(tmp_path / "wallets.db")
+    daemon = RecordingDaemon(missing=('rescanblockchain', 'importprivkey'))
+    importer = KeyImporter({}, db_path, daemon, ReversingCipher())
+    
+    async def run():
+        importer.queue('AEGS', 'Aaddress1', 'Kkey1', 'user_1', rescan_from=0)
+        importer.queue('AEGS', 'Aaddress2', 'Kkey2', 'user_2')
+        await importer.stop()
+        return await importer.flush('AEGS')
+    
+    assert asyncio.run(run()) == 1
+    assert importer.count_pending('AEGS') == 1
+    # The restored key is still encrypted while it waits
+    assert stored_keys(db_path) == [('Aaddress1', '1yekK', 0), ('Aaddress2', None, 1)]
+
+
+def test_daemons_without_importmulti_import_keys_one_by_one(tmp_path):
+    daemon = RecordingDaemon(missing=('importmulti', 'rescanblockchain'))
+    importer = KeyImporter({}, str(tmp_path / "wallets.db"), daemon, ReversingCipher())
+    
+    async def run():
+        importer.queue('AEGS', 'Aaddress1', 'Kkey1', 'user_1', rescan_from=0)
+        await importer.stop()
+        return await importer.flush('AEGS')
+    
+    assert asyncio.run(run()) == 1
+    assert daemon.calls[1:] == [
+        ('importprivkey', ['Kkey1', 'user_1', False]),
+        ('rescanblockchain', [0]),
+        # Older daemons rescan as part of an import instead
+        ('importprivkey', ['Kkey1', 'user_1', True])
+    ]
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test Ledger - Double-entry transfers, user balances, deposits and withdrawals
+"""
+
+import asyncio
+
+import pytest
+
+from database import Database
+from ledger import (
+    FEES_ACCOUNT, NETWORK_FEES_ACCOUNT, InsufficientFundsError, Ledger, LedgerError, from_units, to_units
+)
+
+CONFIG = {'coins': {'AEGS': {'enabled': True, 'decimals': 8}}}
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    db = Database(str(tmp_path / "tipbot.db"))
+    asyncio.run(db.initialize())
+    ledger = Ledger(CONFIG, db)
+    ledger.initialize()
+    yield ledger
+    db.connection.close()
+
+
+def transfer_count(ledger):
+    return ledger.connection.execute("SELECT COUNT(*) FROM ledger_transfers").fetchone()[0]
+
+
+def assert_books_balance(ledger, user_ids):
+    assert ledger.connection.execute("SELECT COALESCE(SUM(amount), 0) FROM ledger_entries").fetchone()[0] == 0
+    assert ledger.find_balance_mismatches('AEGS', user_ids) == []
+
+
+def test_units_round_down_to_the_base_unit():
+    assert to_units(0.123456789, 8) == 12_345_678
+    assert to_units(0.1 + 0.2, 8) == 30_000_000
+    assert from_units(12_345_678, 8) == 0.12345678
+
+
+def test_tip_moves_available_balance(ledger):
+    ledger.faucet(1, 'AEGS', 5)
+    ledger.tip(1, 2, 'AEGS', 1.5)
+    
+    assert ledger.get_balance(1, 'AEGS') == 3.5
+    assert ledger.get_balance(2, 'AEGS') == 1.5
+    assert ledger.get_liabilities_units('AEGS') == 500_000_000
+    assert_books_balance(ledger, [1, 2])
+
+
+def test_overdraft_is_rejected_without_side_effects(ledger):
+    ledger.faucet(1, 'AEGS', 1)
+    transfers = transfer_count(ledger)
+    
+    with pytest.raises(InsufficientFundsError):
+        ledger.tip(1, 2, 'AEGS', 1.00000001)
+    
+    assert ledger.get_balance(1, 'AEGS') == 1.0
+    assert ledger.get_balance(2, 'AEGS') == 0.0
+    assert transfer_count(ledger) == transfers
+
+
+def test_unbalanced_transfer_is_rejected(ledger):
+    with pytest.raises(LedgerError):
+        ledger.transfer('AEGS', 'broken', [(FEES_ACCOUNT, 1)])
+    assert transfer_count(ledger) == 0
+
+
+def test_failed_record_rolls_the_transfer_back(ledger):
+    def record(cursor, transfer_id):
+        raise RuntimeError("record failed")
+    
+    ledger.faucet(1, 'AEGS', 1)
+    with pytest.raises(RuntimeError):
+        ledger.transfer('AEGS', 'tip', [('user:1', -100), ('user:2', 100)], on_applied=record)
+    
+    assert ledger.get_balance(1, 'AEGS') == 1.0
+    assert ledger.get_balance(2, 'AEGS') == 0.0
+
+
+def test_deposit_outputs_are_credited_once_each(ledger):
+    ledger.record_pending_deposit(1, 'AEGS', 1, 'aa' * 32, 0, 'Aaddress')
+    ledger.record_pending_deposit(1, 'AEGS', 2, 'aa' * 32, 1, 'Aaddress')
+    assert ledger.get_balances(1)['AEGS'] == {'available': 0.0, 'pending': 3.0, 'locked': 0.0}
+    
+    assert ledger.credit_deposit(1, 'AEGS', 1, 'aa' * 32, 0, 'Aaddress') is not None
+    assert ledger.credit_deposit(1, 'AEGS', 2, 'aa' * 32, 1, 'Aaddress') is not None
+    assert ledger.credit_deposit(1, 'AEGS', 2, 'aa' * 32, 1, 'Aaddress') is None
+    
+    assert ledger.get_balances(1)['AEGS'] == {'available': 3.0, 'pending': 0.0, 'locked': 0.0}
+    assert ledger.get_deposit_credits('AEGS', [1]) == {'Aaddress': 300_000_000}
+    assert_books_balance(ledger, [1])
+
+
+def test_withdrawal_locks_then_refunds_unused_network_fee(ledger):
+    ledger.faucet(1, 'AEGS', 10)
+    transfer_id = ledger.debit_withdrawal(1, 'AEGS', 2, 0.1, 0.01, 'Aexternal')
+    assert ledger.get_balances(1)['AEGS'] == {'available': 7.89, 'pending': 0.0, 'locked': 2.11}
+    
+    ledger.complete_withdrawal(transfer_id, 2, 0.1, 0.01, 'bb' * 32, network_fee_paid=0.004)
+    
+    assert ledger.get_balances(1)['AEGS'] == {'available': 7.896, 'pending': 0.0, 'locked': 0.0}
+    assert ledger.get_balance_units(FEES_ACCOUNT, 'AEGS') == 10_000_000
+    assert ledger.get_balance_units(NETWORK_FEES_ACCOUNT, 'AEGS') == 400_000
+    assert_books_balance(ledger, [1])
+
+
+def test_completing_a_withdrawal_with_other_amounts_is_rejected(ledger):
+    ledger.faucet(1, 'AEGS', 10)
+    transfer_id = ledger.debit_withdrawal(1, 'AEGS', 2, 0.1, 0.01, 'Aexternal')
+    
+    with pytest.raises(LedgerError):
+        ledger.complete_withdrawal(transfer_id, 3, 0.1, 0.01, 'bb' * 32)
+
+
+def test_refused_withdrawal_is_reversed(ledger):
+    ledger.faucet(1, 'AEGS', 10)
+    transfer_id = ledger.debit_withdrawal(1, 'AEGS', 2, 0.1, 0.01, 'Aexternal')
+    
+    ledger.reverse(transfer_id, 'withdrawal_refund')
+    
+    assert ledger.get_balances(1)['AEGS'] == {'available': 10.0, 'pending': 0.0, 'locked': 0.0}
+    assert_books_balance(ledger, [1])
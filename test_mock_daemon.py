@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test Mock Daemon - Wallet behaviour, failure injection and the CLI mode of the mock coin daemon
+"""
+
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from rpc_client import JsonRpcClient, RPCError
+
+MOCK_DAEMON = Path(__file__).parent / "scripts" / "mock_daemon.py"
+
+
+def test_deposits_confirm_as_blocks_are_mined(mock_coins):
+    async def run():
+        client = JsonRpcClient('AEGS', mock_coins['AEGS'])
+        try:
+            tip = await client.call('getbestblockhash')
+            address = await client.call('getnewaddress', ['user_1'])
+            txid = await client.call('mock_receive', [address, 1.5])
+            assert (await client.call('gettransaction', [txid]))['confirmations'] == 0
+            
+            await client.call('mock_mine', [3])
+            assert (await client.call('gettransaction', [txid]))['confirmations'] == 3
+            assert await client.call('getbalance', ['user_1']) == 1.5
+            
+            since = await client.call('listsinceblock', [tip])
+            assert [(tx['txid'], tx['category'], tx['amount']) for tx in since['transactions']] == [
+                (txid, 'receive', 1.5)
+            ]
+            assert since['lastblock'] == await client.call('getbestblockhash')
+        finally:
+            await client.close()
+    
+    asyncio.run(run())
+
+
+def test_sendmany_pays_everyone_in_one_transaction(mock_coins):
+    async def run():
+        client = JsonRpcClient('AEGS', mock_coins['AEGS'])
+        try:
+            hot = await client.call('getnewaddress', [''])
+            await client.call('mock_receive', [hot, 10])
+            await client.call('mock_mine', [1])
+            
+            txid = await client.call('sendmany', ['', {'Aexternal1': 1, 'Aexternal2': 2}])
+            assert (await client.call('gettransaction', [txid]))['fee'] == -0.0001
+            assert await client.call('getbalance') == 6.9999
+            
+            with pytest.raises(RPCError) as error:
+                await client.call('sendtoaddress', ['Aexternal1', 100])
+            assert error.value.code == -6
+        finally:
+            await client.close()
+    
+    asyncio.run(run())
+
+
+def test_injected_errors_and_disabled_methods(mock_coins):
+    async def run():
+        client = JsonRpcClient('AEGS', mock_coins['AEGS'])
+        try:
+            await client.call('mock_set', [{'disabled_methods': ['listsinceblock']}])
+            with pytest.raises(RPCError) as error:
+                await client.call('listsinceblock', [''])
+            assert error.value.code == -32601
+            
+            await client.call('mock_set', [{'error_rate': 1}])
+            with pytest.raises(RPCError) as error:
+                await client.call('getblockcount')
+            assert error.value.message == "Injected failure"
+            
+            # Test controls are never failed, so a test can always undo its settings
+            await client.call('mock_set', [{'error_rate': 0}])
+            stats = await client.call('mock_stats')
+            assert stats['errors'] == 1
+        finally:
+            await client.close()
+    
+    asyncio.run(run())
+
+
+def test_cli_mode_prints_results_and_fails_on_errors(mock_coins):
+    coin = mock_coins['AEGS']
+    command = [sys.executable, str(MOCK_DAEMON), f"-rpcport={coin['rpc_port']}",
+               f"-rpcuser={coin['rpc_user']}", f"-rpcpassword={coin['rpc_password']}"]
+    
+    height = subprocess.run(command + ['getblockcount'], capture_output=True, text=True)
+    assert height.returncode == 0
+    assert int(height.stdout) >= 1000
+    
+    missing = subprocess.run(command + ['nosuchmethod'], capture_output=True, text=True)
+    assert missing.returncode == 1
+    assert "Method not found" in missing.stderr
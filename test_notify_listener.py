@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test Notify Listener - walletnotify/blocknotify pushes through the hook script to the monitor
+"""
+
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from coin_interface import CoinInterface
+from database import Database
+from ledger import Ledger
+from notify_listener import NotifyListener
+from transaction_monitor import TransactionMonitor
+
+HOOK = Path(__file__).parent / "scripts" / "notify_hook.py"
+
+
+class RecordingMonitor:
+    """Stands in for the transaction monitor, keeping notifications"""
+    
+    def __init__(self):
+        self.notifications = []
+        self.coin_interface = self
+    
+    def get_supported_coins(self):
+        return ['AEGS']
+    
+    def notify(self, coin_symbol, kind, item_hash):
+        self.notifications.append((coin_symbol, kind, item_hash))
+
+
+class RecordingBot:
+    """Stands in for the Telegram bot, keeping sent messages"""
+    
+    def __init__(self):
+        self.messages = []
+    
+    async def send_message(self, chat_id, text, **kwargs):
+        self.messages.append((chat_id, text.split('\n')[0]))
+
+
+def test_only_wellformed_lines_reach_the_monitor():
+    monitor = RecordingMonitor()
+    listener = NotifyListener({}, monitor)
+    
+    assert listener.handle_line(f"aegs block {'ab' * 32}\n")
+    assert not listener.handle_line(f"SHIC block {'ab' * 32}")
+    assert not listener.handle_line("AEGS block nothex")
+    assert not listener.handle_line(f"AEGS mempool {'ab' * 32}")
+    assert not listener.handle_line("AEGS block")
+    
+    assert monitor.notifications == [('AEGS', 'block', 'ab' * 32)]
+
+
+def test_hook_script_delivers_to_the_socket(tmp_path):
+    async def run():
+        socket_path = str(tmp_path / "notify.sock")
+        monitor = RecordingMonitor()
+        listener = NotifyListener({'notify': {'enabled': True, 'socket_path': socket_path}}, monitor)
+        listener.start()
+        try:
+            for _ in range(100):
+                if Path(socket_path).exists():
+                    break
+                await asyncio.sleep(0.01)
+            
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, str(HOOK), '--socket', socket_path, 'AEGS', 'wallet', 'cd' * 32
+            )
+            assert await process.wait() == 0
+            
+            for _ in range(100):
+                if monitor.notifications:
+                    break
+                await asyncio.sleep(0.01)
+            assert monitor.notifications == [('AEGS', 'wallet', 'cd' * 32)]
+        finally:
+            await listener.stop()
+        assert not Path(socket_path).exists()
+    
+    asyncio.run(run())
+
+
+def test_hook_script_fails_without_the_bot(tmp_path):
+    result = subprocess.run(
+        [sys.executable, str(HOOK), '--socket', str(tmp_path / "missing.sock"), 'AEGS', 'block', 'ab' * 32],
+        capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert 'could not reach' in result.stderr
+
+
+def test_pushed_deposit_is_seen_without_waiting_for_a_poll(config, tmp_path):
+    config = {**config, 'monitor': {'min_poll_interval': 30, 'max_poll_interval': 30},
+              'notify': {'enabled': True, 'socket_path': str(tmp_path / "notify.sock")}}
+    
+    async def run():
+        db = Database(str(tmp_path / "tipbot.db"))
+        await db.initialize()
+        coin_interface = CoinInterface(config)
+        ledger = Ledger(config, db)
+        ledger.initialize()
+        await ledger.open_coins(coin_interface)
+        
+        monitor = TransactionMonitor(config, db, coin_interface, ledger)
+        monitor.bot = RecordingBot()
+        monitor.monitoring = True
+        listener = NotifyListener(config, monitor)
+        listener.start()
+        loop = asyncio.create_task(monitor._monitor_coin('AEGS'))
+        try:
+            address = (await coin_interface.call('AEGS', 'getnewaddress', ['user_1']))['result']
+            db.store_user_address(1, 'AEGS', address)
+            while monitor.watches['AEGS'].last_pass is None:
+                await asyncio.sleep(0.01)
+            
+            # What the daemon's -walletnotify would run for the deposit
+            tx_id = (await coin_interface.call('AEGS', 'mock_receive', [address, 5]))['result']
+            started = time.monotonic()
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, str(HOOK), '--socket', config['notify']['socket_path'], 'AEGS', 'wallet', tx_id
+            )
+            assert await process.wait() == 0
+            
+            while ledger.get_balances(1)['AEGS']['pending'] != 5.0:
+                assert time.monotonic() - started < 10
+                await asyncio.sleep(0.01)
+            assert monitor.bot.messages == [(1, '⏳ **Pending Deposit Detected**')]
+        finally:
+            monitor.monitoring = False
+            loop.cancel()
+            await listener.stop()
+            await coin_interface.close()
+    
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test Rain Settlement - Exact splits paid and recorded in one ledger transaction
+"""
+
+import asyncio
+
+import pytest
+
+from database import Database
+from ledger import InsufficientFundsError, Ledger
+from rain_settlement import RainSettlement, split_rain
+
+CONFIG = {'coins': {'AEGS': {'enabled': True, 'decimals': 8}}}
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    db = Database(str(tmp_path / "tipbot.db"))
+    asyncio.run(db.initialize())
+    ledger = Ledger(CONFIG, db)
+    ledger.initialize()
+    yield ledger
+    db.connection.close()
+
+
+def transfer_count(ledger):
+    return ledger.connection.execute("SELECT COUNT(*) FROM ledger_transfers").fetchone()[0]
+
+
+def test_rain_split_hands_dust_to_the_lowest_user_ids():
+    assert split_rain(10, [3, 1, 2]) == [(1, 4), (2, 3), (3, 3)]
+    assert split_rain(9, [2, 2, 1]) == [(1, 5), (2, 4)]
+
+
+def test_rain_settles_the_whole_amount_in_one_transfer(ledger):
+    ledger.faucet(1, 'AEGS', 1)
+    transfers = transfer_count(ledger)
+    
+    rain = RainSettlement(CONFIG, ledger).settle(1, 'AEGS', 0.00000010, [1, 2, 3, 4])
+    
+    assert rain['recipient_count'] == 3
+    assert rain['shares'] == {2: 0.00000004, 3: 0.00000003, 4: 0.00000003}
+    # What the rain confirmation shows: 3 units each, one more for one user
+    assert (rain['base_share'], rain['unit'], rain['extra_unit_count']) == (0.00000003, 0.00000001, 1)
+    assert ledger.get_balance(1, 'AEGS') == 0.9999999
+    assert transfer_count(ledger) == transfers + 1
+    assert ledger.find_balance_mismatches('AEGS', [1, 2, 3, 4]) == []
+    
+    participants = ledger.connection.execute(
+        "SELECT user_id, amount FROM rain_participants ORDER BY user_id"
+    ).fetchall()
+    assert [tuple(row) for row in participants] == [(2, 0.00000004), (3, 0.00000003), (4, 0.00000003)]
+
+
+def test_rain_larger_than_the_balance_pays_nobody(ledger):
+    ledger.faucet(1, 'AEGS', 1)
+    
+    with pytest.raises(InsufficientFundsError):
+        RainSettlement(CONFIG, ledger).settle(1, 'AEGS', 2, [2, 3])
+    
+    assert ledger.get_balance(2, 'AEGS') == 0.0
+    assert ledger.connection.execute("SELECT COUNT(*) FROM rain").fetchone()[0] == 0
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test Reconciler - Ledger liabilities against the mock daemon's wallet, and the drill-down into users
+"""
+
+import asyncio
+
+from coin_interface import CoinInterface
+from database import Database
+from ledger import Ledger
+from reconciler import Reconciler
+
+
+async def setup_reconciler(config, tmp_path, wallet_balance):
+    db = Database(str(tmp_path / "tipbot.db"))
+    await db.initialize()
+    coin_interface = CoinInterface(config)
+    ledger = Ledger(config, db)
+    ledger.initialize()
+    await ledger.open_coins(coin_interface)
+    
+    hot = await coin_interface.call('AEGS', 'getnewaddress', [''])
+    await coin_interface.call('AEGS', 'mock_receive', [hot['result'], wallet_balance])
+    await coin_interface.call('AEGS', 'mock_mine', [3])
+    return db, coin_interface, ledger
+
+
+def test_covered_liabilities_are_ok(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger = await setup_reconciler(config, tmp_path, 10)
+        try:
+            ledger.faucet(1, 'AEGS', 1)
+            ledger.faucet(2, 'AEGS', 1)
+            
+            report = await Reconciler(config, db, coin_interface, ledger).reconcile('AEGS')
+            assert (report['status'], report['drift'], report['users_checked']) == ('ok', 8.0, 0)
+            assert db.get_reconciliation()['AEGS']['status'] == 'ok'
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_shortfall_is_checked_a_partition_at_a_time_across_restarts(config, tmp_path):
+    config = {**config, 'reconciliation': {'partition_size': 2, 'partitions_per_run': 1}}
+    
+    async def run():
+        db, coin_interface, ledger = await setup_reconciler(config, tmp_path, 10)
+        try:
+            for user_id in range(1, 6):
+                ledger.faucet(user_id, 'AEGS', 1)
+            # A balance row the journal does not account for
+            ledger.connection.execute("UPDATE user_balances SET available = available + 1000000000 WHERE user_id = 4")
+            ledger.connection.commit()
+            
+            report = await Reconciler(config, db, coin_interface, ledger).reconcile('AEGS')
+            assert (report['status'], report['drift'], report['users_checked']) == ('checking', -5.0, 2)
+            assert report['findings'] == []
+            
+            # A new instance carries on from the saved checkpoint
+            reconciler = Reconciler(config, db, coin_interface, ledger)
+            report = await reconciler.reconcile('AEGS')
+            assert (report['status'], report['users_checked']) == ('checking', 4)
+            assert [(f['user_id'], f['check'], f['bot'], f['expected']) for f in report['findings']] == [
+                (4, 'available balance', 11.0, 1.0)
+            ]
+            
+            assert (await reconciler.reconcile('AEGS'))['users_checked'] == 5
+            assert (await reconciler.reconcile('AEGS'))['status'] == 'drift'
+            report = await reconciler.reconcile('AEGS')
+            assert (report['status'], report['users_checked'], len(report['findings'])) == ('drift', 5, 1)
+            
+            # Once the wallet covers everyone again the findings are cleared
+            hot = await coin_interface.call('AEGS', 'getnewaddress', [''])
+            await coin_interface.call('AEGS', 'mock_receive', [hot['result'], 10])
+            report = await reconciler.reconcile('AEGS')
+            assert (report['status'], report['findings']) == ('ok', [])
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_credits_above_what_an_address_received_are_reported(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger = await setup_reconciler(config, tmp_path, 1)
+        try:
+            address = (await coin_interface.call('AEGS', 'getnewaddress', ['user_1']))['result']
+            txid = (await coin_interface.call('AEGS', 'mock_receive', [address, 1]))['result']
+            await coin_interface.call('AEGS', 'mock_mine', [3])
+            db.store_user_address(1, 'AEGS', address)
+            ledger.credit_deposit(1, 'AEGS', 5, txid, 0, address)
+            
+            report = await Reconciler(config, db, coin_interface, ledger).reconcile('AEGS')
+            assert (report['status'], report['drift']) == ('drift', -3.0)
+            assert [(f['user_id'], f['check'], f['bot'], f['expected']) for f in report['findings']] == [
+                (1, f"deposits to {address}", 5.0, 1.0)
+            ]
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
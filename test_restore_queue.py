@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test Restore Queue - Background key imports against the mock daemon
+"""
+
+import asyncio
+
+import pytest
+
+from coin_interface import CoinInterface
+from restore_queue import RestoreQueue
+
+
+async def restore(config, disabled_methods):
+    coin_interface = CoinInterface(config)
+    queue = RestoreQueue(config, coin_interface)
+    try:
+        await coin_interface.call('AEGS', 'mock_set', [{'disabled_methods': disabled_methods}])
+        job = queue.submit(7, {'AEGS': {'private_key': 'cTestKey', 'address': 'AtestAddress7', 'timestamp': 0}})
+        
+        for _ in range(100):
+            job = queue.get_job(job['job_id'])
+            if job['state'] in ('done', 'failed'):
+                break
+            await asyncio.sleep(0.05)
+        
+        account = await coin_interface.call('AEGS', 'getaccount', ['AtestAddress7'])
+        return job, account['result']
+    finally:
+        await queue.stop()
+        await coin_interface.close()
+
+
+@pytest.mark.parametrize('disabled_methods', [[], ['setaccount']])
+def test_restore_labels_imported_addresses(config, disabled_methods):
+    job, account = asyncio.run(restore(config, disabled_methods))
+    
+    assert job['state'] == 'done'
+    assert job['coins'] == {'AEGS': 'done'}
+    assert job['errors'] == {}
+    assert account == 'user_7'
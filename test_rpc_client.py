@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test RPC Client - Pooled JSON-RPC calls and batches against the mock daemon
+"""
+
+import asyncio
+
+import pytest
+
+from rpc_client import JsonRpcClient, RPCConnectError, RPCError
+
+
+def test_calls_reuse_one_connection(mock_coins):
+    async def run():
+        client = JsonRpcClient('AEGS', mock_coins['AEGS'], pool_size=1)
+        try:
+            heights = [await client.call('getblockcount') for _ in range(5)]
+            assert len(set(heights)) == 1
+            assert client.pool.connections_opened == 1
+            assert client.pool.requests_sent == 5
+        finally:
+            await client.close()
+    
+    asyncio.run(run())
+
+
+def test_daemon_errors_raise_rpc_error(mock_coins):
+    async def run():
+        client = JsonRpcClient('AEGS', mock_coins['AEGS'])
+        try:
+            with pytest.raises(RPCError) as error:
+                await client.call('nosuchmethod')
+            assert error.value.code == -32601
+        finally:
+            await client.close()
+    
+    asyncio.run(run())
+
+
+def test_batch_returns_results_and_errors_in_order(mock_coins):
+    async def run():
+        client = JsonRpcClient('AEGS', mock_coins['AEGS'])
+        try:
+            height, missing, block_hash = await client.batch([
+                ('getblockcount', []), ('nosuchmethod', []), ('getblockhash', [0])
+            ])
+            assert isinstance(height, int)
+            assert isinstance(missing, RPCError)
+            assert block_hash == await client.call('getblockhash', [0])
+        finally:
+            await client.close()
+    
+    asyncio.run(run())
+
+
+def test_wrong_credentials_are_a_connect_error(mock_coins):
+    async def run():
+        client = JsonRpcClient('AEGS', {**mock_coins['AEGS'], 'rpc_password': 'wrong'})
+        try:
+            with pytest.raises(RPCConnectError):
+                await client.call('getblockcount')
+        finally:
+            await client.close()
+    
+    asyncio.run(run())
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Test Transaction Monitor - Deposit detection, crediting and confirmation against the mock daemon
+"""
+
+import asyncio
+
+from coin_interface import CoinInterface
+from database import Database
+from ledger import Ledger
+from transaction_monitor import ChainWatch, TransactionMonitor
+
+
+class RecordingBot:
+    """Stands in for the Telegram bot, keeping sent messages"""
+    
+    def __init__(self):
+        self.messages = []
+    
+    async def send_message(self, chat_id, text, **kwargs):
+        self.messages.append((chat_id, text.split('\n')[0]))
+
+
+async def setup_monitor(config, tmp_path):
+    db = Database(str(tmp_path / "tipbot.db"))
+    await db.initialize()
+    coin_interface = CoinInterface(config)
+    ledger = Ledger(config, db)
+    ledger.initialize()
+    await ledger.open_coins(coin_interface)
+    
+    monitor = TransactionMonitor(config, db, coin_interface, ledger)
+    monitor.bot = RecordingBot()
+    return db, coin_interface, ledger, monitor
+
+
+async def mock(coin_interface, method, *params):
+    result = await coin_interface.call('AEGS', method, list(params))
+    assert result['success'], result['error']
+    return result['result']
+
+
+def test_two_outputs_to_one_address_are_both_credited(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, monitor = await setup_monitor(config, tmp_path)
+        try:
+            address = await mock(coin_interface, 'getnewaddress', 'user_1')
+            db.store_user_address(1, 'AEGS', address)
+            await monitor._check_coin_deposits('AEGS')
+            
+            tx_id = await mock(coin_interface, 'mock_receive', address, [1, 2])
+            await monitor._check_coin_deposits('AEGS')
+            assert ledger.get_balances(1)['AEGS'] == {'available': 0.0, 'pending': 3.0, 'locked': 0.0}
+            
+            await mock(coin_interface, 'mock_mine', 3)
+            await monitor._check_coin_deposits('AEGS')
+            assert ledger.get_balances(1)['AEGS'] == {'available': 3.0, 'pending': 0.0, 'locked': 0.0}
+            assert ledger.get_deposit_credits('AEGS', [1]) == {address: 300_000_000}
+            
+            rows = db.connection.execute(
+                "SELECT vout, amount, status FROM deposits WHERE tx_id = ? ORDER BY vout", (tx_id,)
+            ).fetchall()
+            assert [tuple(row) for row in rows] == [(0, 1.0, 'confirmed'), (1, 2.0, 'confirmed')]
+            
+            # Another pass at the same tip credits nothing twice
+            await monitor._check_coin_deposits('AEGS')
+            assert ledger.get_balance(1, 'AEGS') == 3.0
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_deposit_is_credited_at_exactly_min_confirmations(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, monitor = await setup_monitor(config, tmp_path)
+        try:
+            address = await mock(coin_interface, 'getnewaddress', 'user_1')
+            db.store_user_address(1, 'AEGS', address)
+            await monitor._check_coin_deposits('AEGS')
+            
+            await mock(coin_interface, 'mock_receive', address, 5)
+            await monitor._check_coin_deposits('AEGS')
+            assert monitor.bot.messages == [(1, '⏳ **Pending Deposit Detected**')]
+            
+            # min_confirmations is 3
+            for _ in range(2):
+                await mock(coin_interface, 'mock_mine', 1)
+                await monitor._check_coin_deposits('AEGS')
+            assert ledger.get_balances(1)['AEGS']['pending'] == 5.0
+            
+            await mock(coin_interface, 'mock_mine', 1)
+            await monitor._check_coin_deposits('AEGS')
+            assert ledger.get_balances(1)['AEGS'] == {'available': 5.0, 'pending': 0.0, 'locked': 0.0}
+            assert monitor.bot.messages[1:] == [(1, '✅ **Deposit Confirmed!**')]
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_restarted_monitor_does_not_repeat_deposits(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, monitor = await setup_monitor(config, tmp_path)
+        try:
+            address = await mock(coin_interface, 'getnewaddress', 'user_1')
+            db.store_user_address(1, 'AEGS', address)
+            await monitor._check_coin_deposits('AEGS')
+            
+            await mock(coin_interface, 'mock_receive', address, 5)
+            await monitor._check_coin_deposits('AEGS')
+            await mock(coin_interface, 'mock_mine', 3)
+            await monitor._check_coin_deposits('AEGS')
+            
+            # A new monitor remembers nothing in memory; the deposits table and cursor carry over
+            restarted = TransactionMonitor(config, db, coin_interface, ledger)
+            restarted.bot = RecordingBot()
+            db.clear_deposit_cursor('AEGS')
+            await restarted._check_coin_deposits('AEGS')
+            
+            assert restarted.bot.messages == []
+            assert ledger.get_balance(1, 'AEGS') == 5.0
+            assert db.connection.execute("SELECT COUNT(*) FROM deposits").fetchone()[0] == 1
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_sent_withdrawal_confirms_with_the_deposit_pass(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, monitor = await setup_monitor(config, tmp_path)
+        try:
+            await monitor._check_coin_deposits('AEGS')
+            hot = await mock(coin_interface, 'getnewaddress', '')
+            await mock(coin_interface, 'mock_receive', hot, 10)
+            tx_id = await mock(coin_interface, 'sendtoaddress', 'Aexternal', 1)
+            with db.connection:
+                db.connection.execute(
+                    "INSERT INTO withdrawals (user_id, coin_symbol, amount, address, tx_id, fee, status) "
+                    "VALUES (1, 'AEGS', 1, 'Aexternal', ?, 0.1, 'pending')", (tx_id,)
+                )
+            
+            await mock(coin_interface, 'mock_mine', 2)
+            await monitor._check_coin_deposits('AEGS')
+            assert db.connection.execute("SELECT status FROM withdrawals").fetchone()[0] == 'pending'
+            
+            await mock(coin_interface, 'mock_mine', 1)
+            await monitor._check_coin_deposits('AEGS')
+            assert db.connection.execute("SELECT status FROM withdrawals").fetchone()[0] == 'confirmed'
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+async def method_calls(coin_interface, *methods):
+    stats = await mock(coin_interface, 'mock_stats')
+    return [stats['methods'].get(method, 0) for method in methods]
+
+
+def test_deposit_pass_costs_one_listing_however_many_addresses(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, monitor = await setup_monitor(config, tmp_path)
+        try:
+            for user_id in range(1, 201):
+                db.store_user_address(user_id, 'AEGS', await mock(coin_interface, 'getnewaddress', f"user_{user_id}"))
+            address = db.get_user_address(150, 'AEGS')
+            await monitor._check_coin_deposits('AEGS')
+            await mock(coin_interface, 'mock_receive', address, 5)
+            await mock(coin_interface, 'mock_mine', 5)
+            
+            before = await method_calls(coin_interface, 'listsinceblock', 'listunspent', 'getreceivedbyaddress')
+            assert await monitor._check_coin_deposits('AEGS')
+            after = await method_calls(coin_interface, 'listsinceblock', 'listunspent', 'getreceivedbyaddress')
+            assert [b - a for a, b in zip(before, after)] == [1, 0, 0]
+            assert ledger.get_balance(150, 'AEGS') == 5.0
+            
+            # The cursor trails the tip by min_confirmations - 1 blocks
+            height = await mock(coin_interface, 'getblockcount')
+            assert db.get_deposit_cursor('AEGS') == await mock(coin_interface, 'getblockhash', height - 2)
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_unknown_cursor_is_restarted_without_losing_deposits(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, monitor = await setup_monitor(config, tmp_path)
+        try:
+            address = await mock(coin_interface, 'getnewaddress', 'user_1')
+            db.store_user_address(1, 'AEGS', address)
+            await mock(coin_interface, 'mock_receive', address, 5)
+            await mock(coin_interface, 'mock_mine', 3)
+            
+            # A block the daemon no longer knows, e.g. after a reorg or a reindex
+            db.set_deposit_cursor('AEGS', '00' * 32)
+            assert not await monitor._check_coin_deposits('AEGS')
+            assert db.get_deposit_cursor('AEGS') is None
+            
+            assert await monitor._check_coin_deposits('AEGS')
+            assert ledger.get_balance(1, 'AEGS') == 5.0
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_deposits_are_matched_without_reading_user_addresses(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, monitor = await setup_monitor(config, tmp_path)
+        try:
+            address = await mock(coin_interface, 'getnewaddress', 'user_1')
+            db.store_user_address(1, 'AEGS', address)
+            await monitor._check_coin_deposits('AEGS')
+            await mock(coin_interface, 'mock_receive', address, 5)
+            
+            statements = []
+            db.connection.set_trace_callback(statements.append)
+            await monitor._check_coin_deposits('AEGS')
+            db.connection.set_trace_callback(None)
+            
+            assert ledger.get_balances(1)['AEGS']['pending'] == 5.0
+            assert not [statement for statement in statements if 'user_addresses' in statement]
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def insert_pending_withdrawal(db, user_id, tx_id):
+    with db.connection:
+        db.connection.execute(
+            "INSERT INTO withdrawals (user_id, coin_symbol, amount, address, tx_id, fee, status) "
+            "VALUES (?, 'AEGS', 1, 'Aexternal', ?, 0.1, 'pending')", (user_id, tx_id)
+        )
+
+
+def test_confirmations_come_from_block_heights_not_per_transaction_calls(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, monitor = await setup_monitor(config, tmp_path)
+        try:
+            await monitor._check_coin_deposits('AEGS')
+            hot = await mock(coin_interface, 'getnewaddress', '')
+            await mock(coin_interface, 'mock_receive', hot, 100)
+            for user_id in range(1, 4):
+                address = await mock(coin_interface, 'getnewaddress', f"user_{user_id}")
+                db.store_user_address(user_id, 'AEGS', address)
+                await mock(coin_interface, 'mock_receive', address, user_id)
+                insert_pending_withdrawal(db, user_id, await mock(coin_interface, 'sendtoaddress', 'Aexternal', 1))
+            
+            await mock(coin_interface, 'mock_mine', 1)
+            mined = await mock(coin_interface, 'getblockcount')
+            [gettransaction] = await method_calls(coin_interface, 'gettransaction')
+            await monitor._check_coin_deposits('AEGS')
+            
+            heights = db.connection.execute(
+                "SELECT block_height FROM deposits UNION ALL SELECT block_height FROM withdrawals"
+            ).fetchall()
+            assert [row[0] for row in heights] == [mined] * 6
+            
+            await mock(coin_interface, 'mock_mine', 2)
+            await monitor._check_coin_deposits('AEGS')
+            rows = db.connection.execute("SELECT status, confirmations FROM deposits").fetchall()
+            assert [tuple(row) for row in rows] == [('confirmed', 3)] * 3
+            assert db.connection.execute(
+                "SELECT COUNT(*) FROM withdrawals WHERE status = 'confirmed'"
+            ).fetchone()[0] == 3
+            assert await method_calls(coin_interface, 'gettransaction') == [gettransaction]
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_withdrawal_sent_before_the_cursor_is_looked_up(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, monitor = await setup_monitor(config, tmp_path)
+        try:
+            await monitor._check_coin_deposits('AEGS')
+            hot = await mock(coin_interface, 'getnewaddress', '')
+            await mock(coin_interface, 'mock_receive', hot, 10)
+            tx_id = await mock(coin_interface, 'sendtoaddress', 'Aexternal', 1)
+            await mock(coin_interface, 'mock_mine', 5)
+            await monitor._check_coin_deposits('AEGS')
+            
+            # Recorded by an older version, after the cursor moved past its block
+            insert_pending_withdrawal(db, 1, tx_id)
+            [gettransaction] = await method_calls(coin_interface, 'gettransaction')
+            await monitor._check_coin_deposits('AEGS')
+            
+            assert await method_calls(coin_interface, 'gettransaction') == [gettransaction + 1]
+            assert db.connection.execute("SELECT status FROM withdrawals").fetchone()[0] == 'confirmed'
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_chain_watch_reports_new_blocks_and_wallet_transactions():
+    watch = ChainWatch(block_time=60)
+    
+    assert watch.observe('tip1', 5)
+    assert not watch.observe('tip1', 5)
+    assert watch.observe('tip1', 6)
+    assert watch.observe('tip2', 6)
+    # Without getwalletinfo only the tip counts
+    assert not watch.observe('tip2', None)
+
+
+def test_poll_interval_follows_the_block_time(config):
+    monitor = TransactionMonitor(config, None, CoinInterface(config))
+    
+    monitor.watches['AEGS'] = ChainWatch(block_time=60)
+    assert monitor.poll_interval('AEGS') == 1
+    monitor.watches['AEGS'] = ChainWatch(block_time=150)
+    assert monitor.poll_interval('AEGS') == 2.5
+    monitor.watches['AEGS'] = ChainWatch(block_time=3600)
+    assert monitor.poll_interval('AEGS') == 15
+
+
+def test_failed_pass_is_retried_at_the_next_poll(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, monitor = await setup_monitor(config, tmp_path)
+        try:
+            await mock(coin_interface, 'mock_set', {'disabled_methods': ['listsinceblock']})
+            assert not await monitor._check_coin_deposits('AEGS')
+            
+            monitor.monitoring = True
+            loop = asyncio.create_task(monitor._monitor_coin('AEGS'))
+            await asyncio.sleep(0.2)
+            assert monitor.watches['AEGS'].last_pass is None
+            
+            await mock(coin_interface, 'mock_set', {'disabled_methods': []})
+            # A poll without a new block or transaction still runs the pass again
+            await asyncio.sleep(1.2)
+            assert monitor.watches['AEGS'].last_pass is not None
+            assert db.get_deposit_cursor('AEGS') is not None
+            
+            monitor.monitoring = False
+            loop.cancel()
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_push_wakes_the_coin_loop(config):
+    async def run():
+        monitor = TransactionMonitor(config, None, CoinInterface(config))
+        monitor.watches['AEGS'] = ChainWatch(block_time=60)
+        assert monitor.poll_interval('AEGS') == 1
+        
+        waiting = asyncio.create_task(monitor._wait_for_push('AEGS'))
+        await asyncio.sleep(0)
+        monitor.notify('AEGS', 'block', 'cc' * 32)
+        
+        assert await waiting
+        # While blocks are pushed, tip polling is only a safety net
+        assert monitor.poll_interval('AEGS') == monitor.safety_poll_interval
+    
+    asyncio.run(run())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test UTXO Consolidator - Sweeping small outputs against the mock daemon
+"""
+
+import asyncio
+
+from coin_interface import CoinInterface
+from daemon_scheduler import Priority
+from utxo_consolidator import UtxoConsolidator
+
+
+class RecordingPriorities(CoinInterface):
+    """Coin interface that remembers the priority of every call"""
+    
+    def __init__(self, config):
+        super().__init__(config)
+        self.priorities = {}
+    
+    async def call(self, coin_symbol, method, params=None, priority=None):
+        self.priorities[method] = priority
+        return await super().call(coin_symbol, method, params, priority)
+
+
+def consolidation_config(config, **settings):
+    return {**config, 'consolidation': {'enabled': True, 'min_utxos': 5, 'max_inputs': 4, **settings}}
+
+
+async def receive_small_outputs(coin_interface, count):
+    address = await coin_interface.call('AEGS', 'getnewaddress', [''])
+    await coin_interface.call('AEGS', 'mock_receive', [address['result'], [0.001] * count])
+    await coin_interface.call('AEGS', 'mock_mine', [6])
+
+
+def test_small_outputs_are_swept_in_batches(config):
+    async def run():
+        coin_interface = RecordingPriorities(config)
+        consolidator = UtxoConsolidator(consolidation_config(config), coin_interface)
+        try:
+            await receive_small_outputs(coin_interface, 10)
+            
+            report = await consolidator.consolidate('AEGS')
+            assert report['skipped'] is None
+            assert (report['utxos_before'], report['utxos_after']) == (10, 3)
+            assert len(report['transactions']) == 3
+            assert report['inputs_swept'] == 10
+            assert report['fees_paid'] > 0
+            
+            # Even the fee estimate waits behind user requests
+            assert coin_interface.priorities['estimatefee'] == Priority.BACKGROUND
+            assert coin_interface.priorities['sendrawtransaction'] == Priority.BACKGROUND
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_run_is_skipped_above_the_fee_limit(config):
+    async def run():
+        coin_interface = CoinInterface(config)
+        consolidator = UtxoConsolidator(consolidation_config(config, max_fee_rate=0.00001), coin_interface)
+        try:
+            await receive_small_outputs(coin_interface, 10)
+            
+            report = await consolidator.consolidate('AEGS')
+            assert report['skipped'].startswith('fee rate')
+            assert report['transactions'] == []
+            
+            unspent = await coin_interface.call('AEGS', 'listunspent', [0, 9999999])
+            assert len(unspent['result']) == 10
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_too_few_outputs_are_left_alone(config):
+    async def run():
+        coin_interface = CoinInterface(config)
+        consolidator = UtxoConsolidator(consolidation_config(config), coin_interface)
+        try:
+            await receive_small_outputs(coin_interface, 4)
+            
+            report = await consolidator.consolidate('AEGS')
+            assert report['skipped'] == "4 small outputs, fewer than 5"
+            assert report['utxos_after'] == 4
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test Wallet Manager - Direct withdrawals, backups and the shared daemon client
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from coin_interface import CoinInterface, DaemonTimeoutError
+from database import Database
+from enhanced_wallet_manager import EnhancedWalletManager
+from ledger import NETWORK_FEES_ACCOUNT, Ledger
+from wallet_manager import WalletManager
+
+
+class SlowKeys:
+    """Stands in for the coin interface, answering dumpprivkey slowly and keeping the peak concurrency"""
+    
+    def __init__(self, failing=()):
+        self.failing = failing
+        self.running = 0
+        self.peak = 0
+    
+    async def call(self, coin_symbol, method, params=None, priority=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.1)
+        self.running -= 1
+        if coin_symbol in self.failing:
+            return {'success': False, 'result': None, 'error': 'Wallet is locked'}
+        return {'success': True, 'result': f"key_{params[0]}", 'error': None}
+
+
+def test_withdrawal_pays_the_actual_network_fee(config, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    
+    async def run():
+        db = Database(str(tmp_path / "tipbot.db"))
+        await db.initialize()
+        coin_interface = CoinInterface(config)
+        ledger = Ledger(config, db)
+        ledger.initialize()
+        await ledger.open_coins(coin_interface)
+        wallet_manager = WalletManager({**config, 'security': {'encryption_key': ''}}, coin_interface, ledger=ledger)
+        try:
+            hot = (await coin_interface.call('AEGS', 'getnewaddress', ['']))['result']
+            await coin_interface.call('AEGS', 'mock_receive', [hot, 100])
+            ledger.faucet(1, 'AEGS', 10)
+            
+            tx_id = await wallet_manager.withdraw(1, 'AEGS', 2, 'Aexternal')
+            
+            # 0.01 network fee was charged up front; the mock's transaction cost 0.0001
+            fee = await coin_interface.call('AEGS', 'gettransaction', [tx_id])
+            assert fee['result']['fee'] == -0.0001
+            assert ledger.get_balances(1)['AEGS'] == {'available': 7.8999, 'pending': 0.0, 'locked': 0.0}
+            assert ledger.get_balance_units(NETWORK_FEES_ACCOUNT, 'AEGS') == 10_000
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_timed_out_withdrawal_stays_locked(config, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {**config, 'daemon': {'timeouts': {'send': 0.2}}}
+    
+    async def run():
+        db = Database(str(tmp_path / "tipbot.db"))
+        await db.initialize()
+        coin_interface = CoinInterface(config)
+        ledger = Ledger(config, db)
+        ledger.initialize()
+        await ledger.open_coins(coin_interface)
+        wallet_manager = WalletManager({**config, 'security': {'encryption_key': ''}}, coin_interface, ledger=ledger)
+        try:
+            hot = (await coin_interface.call('AEGS', 'getnewaddress', ['']))['result']
+            await coin_interface.call('AEGS', 'mock_receive', [hot, 100])
+            ledger.faucet(1, 'AEGS', 10)
+            await coin_interface.call('AEGS', 'mock_set', [{'latency_ms': 1000}])
+            
+            with pytest.raises(DaemonTimeoutError):
+                await wallet_manager.withdraw(1, 'AEGS', 2, 'Aexternal')
+            
+            # The daemon may still send it, so nothing is refunded
+            assert ledger.get_balances(1)['AEGS'] == {'available': 7.89, 'pending': 0.0, 'locked': 2.11}
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_wallet_managers_share_one_daemon_client(config, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    
+    async def no_cli(*args, **kwargs):
+        raise AssertionError("a wallet manager spawned a CLI process")
+    monkeypatch.setattr(asyncio, 'create_subprocess_exec', no_cli)
+    
+    async def run():
+        coin_interface = CoinInterface(config)
+        wallet_manager = WalletManager({**config, 'security': {'encryption_key': ''}}, coin_interface)
+        enhanced_wallet_manager = EnhancedWalletManager(config, coin_interface)
+        try:
+            await wallet_manager.generate_address(1, 'AEGS')
+            await enhanced_wallet_manager.generate_address(2, 'AEGS')
+            assert await wallet_manager.get_transaction_history(1, 'AEGS') == []
+            
+            # One latency histogram covers both managers' calls
+            latency = coin_interface.get_latency_stats()['AEGS']
+            assert latency['getnewaddress']['calls'] == 2
+            assert latency['listtransactions']['calls'] == 1
+            assert enhanced_wallet_manager.key_importer.coin_interface is coin_interface
+            assert wallet_manager.restore_queue.coin_interface is coin_interface
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_backup_fetches_every_coins_key_at_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    coins = ['AEGS', 'SHIC', 'PEPE', 'ADVC']
+    config = {'coins': {coin: {'enabled': True} for coin in coins}, 'security': {'encryption_key': ''}}
+    
+    async def run():
+        daemon = SlowKeys(failing=['PEPE'])
+        wallet_manager = WalletManager(config, daemon)
+        for coin in coins:
+            await wallet_manager._store_address_mapping(1, coin, f"{coin}_address")
+        
+        started = time.monotonic()
+        backup = await wallet_manager.backup_wallet(1)
+        assert time.monotonic() - started < 0.3
+        assert daemon.peak == len(coins)
+        
+        assert sorted(backup['coins_backed_up']) == sorted(coins)
+        data = json.loads(wallet_manager.cipher.decrypt(backup['encrypted_data'].encode()))
+        # A coin whose key could not be read keeps its address but has no key to restore
+        assert data['private_keys'] == {coin: f"key_{coin}_address" for coin in coins if coin != 'PEPE'}
+        assert set(data['key_times']) == set(data['private_keys'])
+        
+        restore = await wallet_manager.restore_wallet(1, backup['encrypted_data'])
+        assert sorted(restore['queued_coins']) == ['ADVC', 'AEGS', 'SHIC']
+    
+    asyncio.run(run())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test Withdrawal Batcher - Queueing and sending withdrawals against the mock daemon
+"""
+
+import asyncio
+
+import pytest
+
+from coin_interface import CoinInterface, DaemonTimeoutError
+from database import Database
+from ledger import Ledger, LedgerError
+from withdrawal_batcher import WithdrawalBatcher
+
+
+class TimingOutSends(CoinInterface):
+    """Times out every sendmany, after passing it to the daemon if deliver is set"""
+    
+    deliver = False
+    
+    async def call(self, coin_symbol, method, params=None, priority=None):
+        if method == 'sendmany':
+            if self.deliver:
+                await super().call(coin_symbol, method, params, priority)
+            raise DaemonTimeoutError(coin_symbol, method, 30)
+        return await super().call(coin_symbol, method, params, priority)
+
+
+async def setup_batcher(config, tmp_path, interface=CoinInterface):
+    db = Database(str(tmp_path / "tipbot.db"))
+    await db.initialize()
+    coin_interface = interface(config)
+    ledger = Ledger(config, db)
+    ledger.initialize()
+    await ledger.open_coins(coin_interface)
+    
+    # Hot wallet funds to pay withdrawals from
+    address = (await coin_interface.call('AEGS', 'getnewaddress', ['']))['result']
+    await coin_interface.call('AEGS', 'mock_receive', [address, 100])
+    await coin_interface.call('AEGS', 'mock_mine', [1])
+    
+    return db, coin_interface, ledger, WithdrawalBatcher(config, db, coin_interface, ledger)
+
+
+def test_queue_returns_the_withdrawal_id(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, batcher = await setup_batcher(config, tmp_path)
+        try:
+            for user_id in (1, 2, 3):
+                ledger.faucet(user_id, 'AEGS', 10)
+            
+            # An older withdrawal, so withdrawal ids differ from the rowids of other tables
+            with db.connection:
+                db.connection.execute(
+                    "INSERT INTO withdrawals (user_id, coin_symbol, amount, status) VALUES (9, 'AEGS', 1, 'confirmed')"
+                )
+            
+            queued = {
+                user_id: batcher.queue(user_id, 'AEGS', user_id, f"Aexternal{user_id}") for user_id in (1, 2, 3)
+            }
+            
+            for user_id, withdrawal_id in queued.items():
+                row = db.connection.execute(
+                    "SELECT user_id, amount, status FROM withdrawals WHERE id = ?", (withdrawal_id,)
+                ).fetchone()
+                assert tuple(row) == (user_id, float(user_id), 'queued')
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_flush_sends_queued_withdrawals_in_one_transaction(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, batcher = await setup_batcher(config, tmp_path)
+        try:
+            for user_id in (1, 2):
+                ledger.faucet(user_id, 'AEGS', 10)
+                batcher.queue(user_id, 'AEGS', 2, f"Aexternal{user_id}")
+            assert ledger.get_balances(1)['AEGS']['locked'] > 0
+            
+            assert await batcher.flush('AEGS') == 2
+            
+            rows = db.connection.execute("SELECT status, tx_id FROM withdrawals").fetchall()
+            assert {row['status'] for row in rows} == {'pending'}
+            assert len({row['tx_id'] for row in rows}) == 1
+            assert ledger.get_balances(1)['AEGS']['locked'] == 0
+            assert ledger.find_balance_mismatches('AEGS', [1, 2]) == []
+            
+            # The mock charges 0.0001 per transaction, shared by both; the rest of the 0.01 charged is refunded
+            network_fees = db.connection.execute("SELECT network_fee FROM withdrawals").fetchall()
+            assert [row['network_fee'] for row in network_fees] == [0.00005, 0.00005]
+            for user_id in (1, 2):
+                assert ledger.get_balance(user_id, 'AEGS') == 7.89995
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_timed_out_batch_the_wallet_sent_is_completed(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, batcher = await setup_batcher(config, tmp_path, TimingOutSends)
+        try:
+            for user_id in (1, 2):
+                ledger.faucet(user_id, 'AEGS', 10)
+                batcher.queue(user_id, 'AEGS', 2, f"Aexternal{user_id}")
+            
+            coin_interface.deliver = True
+            assert await batcher.flush('AEGS') == 0
+            assert {row[0] for row in db.connection.execute("SELECT status FROM withdrawals")} == {'sending'}
+            
+            assert await batcher.recover('AEGS') == 2
+            rows = db.connection.execute("SELECT status, tx_id FROM withdrawals").fetchall()
+            assert {row['status'] for row in rows} == {'pending'}
+            assert len({row['tx_id'] for row in rows}) == 1
+            assert ledger.get_balances(1)['AEGS']['locked'] == 0
+            assert ledger.find_balance_mismatches('AEGS', [1, 2]) == []
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_timed_out_batch_missing_from_the_wallet_is_requeued(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, batcher = await setup_batcher(config, tmp_path, TimingOutSends)
+        try:
+            ledger.faucet(1, 'AEGS', 10)
+            batcher.queue(1, 'AEGS', 2, "Aexternal1")
+            assert await batcher.flush('AEGS') == 0
+            
+            # Too early to tell a lost sendmany from a slow one
+            assert await batcher.recover('AEGS') == 0
+            
+            batcher.recovery_delay = 0
+            assert await batcher.recover('AEGS') == 1
+            assert db.connection.execute("SELECT status FROM withdrawals").fetchone()[0] == 'queued'
+            assert ledger.get_balances(1)['AEGS']['locked'] > 0
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())
+
+
+def test_batch_is_completed_all_or_nothing(config, tmp_path):
+    async def run():
+        db, coin_interface, ledger, batcher = await setup_batcher(config, tmp_path)
+        try:
+            for user_id in (1, 2):
+                ledger.faucet(user_id, 'AEGS', 10)
+                batcher.queue(user_id, 'AEGS', 2, f"Aexternal{user_id}")
+            withdrawals = db.get_queued_withdrawals('AEGS', 10)
+            # The second withdrawal no longer matches what its transfer locked
+            withdrawals[1]['amount'] = 3
+            
+            with pytest.raises(LedgerError):
+                batcher._complete(withdrawals, 'cc' * 32)
+            
+            assert {row[0] for row in db.connection.execute("SELECT status FROM withdrawals")} == {'queued'}
+            assert ledger.get_balances(1)['AEGS']['locked'] > 0
+        finally:
+            await coin_interface.close()
+    
+    asyncio.run(run())